@@ -0,0 +1,395 @@
+"""
+database/__init__.py eksport qiladigan har bir funksiya uchun mikro-benchmark.
+
+Har bir backend (PostgreSQL, SQLite) va har bir hajm uchun baza
+benchmarks.dataset bilan to'ldiriladi, keyin har bir funksiya --repeat marta
+chaqiriladi: median / p95 kechikish (ms) va chaqiruv boshiga so'rovlar soni.
+
+So'rovlar soni:
+    • PostgreSQL - SQLAlchemy before_cursor_execute hodisasi (QueryCounter)
+      va xom asyncpg o'qishlari (_raw_connection orqali)
+    • SQLite - aiosqlite ulanishidagi execute / executemany chaqiruvlari
+
+Yozuvchi funksiyalar (delete_*, submit_* ...) har chaqiruvdan oldin o'z
+qatorini yaratadi - tayyorlov vaqti va so'rovlari o'lchovga kirmaydi.
+clear_all_* funksiyalari bugungi ma'lumotni o'chiradi, shuning uchun oxirida
+bir marta o'lchanadi. Xodim keshi (EMPLOYEE_CACHE_SIZE) yoqilgan - o'qishlar
+ishchi holatdagidek.
+
+Natijalar JSON baseline ga saqlanadi (--save) va keyingi ishga tushirishda
+u bilan solishtiriladi (--compare): kechikish --threshold martadan oshsa yoki
+so'rovlar soni ko'paysa - regressiya, chiqish kodi 1.
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_db_api \\
+        --sizes 10x10,100x20 --save benchmarks/baselines/db_api.json
+    python -m benchmarks.bench_db_api --compare benchmarks/baselines/db_api.json
+"""
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Tuple, Union
+
+os.environ.setdefault("PHOTO_FILTER_ENABLED", "false")
+
+from benchmarks._common import QueryCounter, count_queries, print_table  # noqa: E402
+from benchmarks.dataset import generate  # noqa: E402
+import database  # noqa: E402
+from database import db_postgres  # noqa: E402
+from database.cache import employee_cache  # noqa: E402
+
+BACKENDS = ("postgres", "sqlite")
+
+# Ulanish hayot sikli - o'lchanmaydi
+SKIPPED = {"init_db", "close_db"}
+
+
+def exported_functions() -> List[str]:
+    """database/__init__.py dagi funksiya eksportlari (e'lon qilingan tartibda)"""
+    module = database._db_module.__name__
+    return [
+        name for name, value in vars(database).items()
+        if callable(value) and getattr(value, "__module__", None) == module
+        and name not in SKIPPED
+    ]
+
+
+# ============== Holat va o'lchov holatlari ==============
+
+class Context:
+    """O'lchovlar uchun ID lar: benchmark vazifasi (barcha filiallarga,
+    auditoriyaning yarmi bajargan) va uning bajargan xodimi.
+    """
+
+    def __init__(self, module):
+        self.db = module
+        self.seq = itertools.count(1)
+        self.branch_ids: List[int] = []
+        self.branch_id = self.branch_name = None
+        self.task_id = self.employee_id = self.telegram_id = None
+        self.shift = "kunduzgi"
+        self.result_id = None
+        self.file_unique_id = None
+        self.employee_ids: List[int] = []
+
+    async def prepare(self):
+        branches = await self.db.get_all_branches()
+        self.branch_ids = [b["id"] for b in branches]
+        self.branch_id, self.branch_name = branches[0]["id"], branches[0]["name"]
+
+        now = db_postgres._tashkent_now()
+        self.task_id = await self.db.create_task(
+            "Benchmark vazifasi", "Tavsif", "har_kunlik", "rasm", "hammasi",
+            now - timedelta(hours=1), now + timedelta(hours=1), self.branch_ids
+        )
+        audience = await self.db.get_employees_for_task(self.task_id)
+        for i, emp in enumerate(audience):
+            if i % 2 == 0:
+                await self.db.submit_task_result(
+                    self.task_id, emp["id"], None, f"bench_photo_{self.task_id}_{emp['id']}"
+                )
+        emp = audience[0]
+        self.employee_id, self.telegram_id = emp["id"], emp["telegram_id"]
+        self.shift = emp["shift"]
+        self.employee_ids = [e["id"] for e in audience[:100]]
+        self.result_id = (await self.db.get_task_result(self.task_id, self.employee_id))["id"]
+        self.file_unique_id = f"bench_photo_{self.task_id}_{self.employee_id}"
+
+    # ---------- Tayyorlov yordamchilari ----------
+
+    def unique(self, prefix: str) -> str:
+        return f"{prefix} {next(self.seq)}"
+
+    async def new_branch(self) -> int:
+        return await self.db.create_branch(self.unique("Bench filial"))
+
+    async def new_employee(self) -> tuple:
+        telegram_id = 20_000_000_000 + next(self.seq)
+        emp_id = await self.db.create_employee(
+            telegram_id, "Bench", "Xodim", self.branch_id, "kunduzgi"
+        )
+        return emp_id, telegram_id
+
+    async def new_employee_id(self) -> int:
+        return (await self.new_employee())[0]
+
+    async def new_employee_telegram_id(self) -> int:
+        return (await self.new_employee())[1]
+
+    def task_args(self, branch_ids: List[int]) -> tuple:
+        now = db_postgres._tashkent_now()
+        return (
+            self.unique("Bench vazifa"), "Tavsif", "bir_martalik", "matn", "hammasi",
+            now, now + timedelta(hours=2), branch_ids
+        )
+
+    async def new_task(self) -> int:
+        return await self.db.create_task(*self.task_args([self.branch_id]))
+
+    def notification_rows(self, with_text: bool = False) -> List[dict]:
+        notification_type = self.unique("bench").replace(" ", "_")
+        return [
+            {
+                "task_id": self.task_id, "employee_id": emp_id,
+                "notification_type": notification_type,
+                **({"chat_id": 20_000_000_000 + emp_id, "text": "Eslatma"} if with_text else {}),
+            }
+            for emp_id in self.employee_ids
+        ]
+
+    async def enqueue(self) -> List[dict]:
+        return await self.db.enqueue_notifications(self.notification_rows(with_text=True))
+
+
+# Argumentlar: ctx -> tuple yoki (tayyorlov kerak bo'lsa) awaitable[tuple]
+Setup = Callable[[Context], Union[tuple, Awaitable[tuple]]]
+
+
+async def _one(value: Awaitable) -> tuple:
+    return (await value,)
+
+
+async def _submit_new(ctx: Context) -> tuple:
+    emp_id, _ = await ctx.new_employee()
+    return ctx.task_id, emp_id, "ok"
+
+
+async def _submit_new_by_telegram_id(ctx: Context) -> tuple:
+    _, telegram_id = await ctx.new_employee()
+    return ctx.task_id, telegram_id, "ok"
+
+
+async def _outbox_ids(ctx: Context) -> tuple:
+    return ([row["id"] for row in await ctx.enqueue()],)
+
+
+async def _outbox_failures(ctx: Context) -> tuple:
+    return ([{"id": row["id"], "error": "bench", "retry_at": None} for row in await ctx.enqueue()],)
+
+
+def _no_args(ctx: Context) -> tuple:
+    return ()
+
+
+# (nomi, argumentlar, faqat bir marta) - o'qishlar avval, yozishlar keyin,
+# bugungi ma'lumotni o'chiradiganlar eng oxirida
+CASES: List[Tuple[str, Setup, bool]] = [
+    ("get_all_branches", _no_args, False),
+    ("get_branch", lambda ctx: (ctx.branch_id,), False),
+    ("get_branch_employees_count", lambda ctx: (ctx.branch_id,), False),
+    ("get_employee_by_telegram_id", lambda ctx: (ctx.telegram_id,), False),
+    ("get_employee", lambda ctx: (ctx.employee_id,), False),
+    ("get_all_employees", _no_args, False),
+    ("get_employees_by_branch", lambda ctx: (ctx.branch_id,), False),
+    ("get_total_employees_count", _no_args, False),
+    ("get_task", lambda ctx: (ctx.task_id,), False),
+    ("get_task_branches", lambda ctx: (ctx.task_id,), False),
+    ("get_active_tasks", _no_args, False),
+    ("get_employee_tasks", lambda ctx: (ctx.employee_id,), False),
+    ("get_employee_tasks_by_telegram_id", lambda ctx: (ctx.telegram_id,), False),
+    ("get_employees_for_task", lambda ctx: (ctx.task_id,), False),
+    ("get_daily_tasks", _no_args, False),
+    ("check_photo_used", lambda ctx: (ctx.file_unique_id,), False),
+    ("get_task_result", lambda ctx: (ctx.task_id, ctx.employee_id), False),
+    ("get_task_result_by_telegram_id", lambda ctx: (ctx.task_id, ctx.telegram_id), False),
+    ("has_submitted_result", lambda ctx: (ctx.task_id, ctx.telegram_id), False),
+    ("get_task_statistics", lambda ctx: (ctx.task_id,), False),
+    ("get_all_task_results", lambda ctx: (ctx.task_id,), False),
+    ("get_task_result_by_id", lambda ctx: (ctx.result_id,), False),
+    ("has_branch_completion", lambda ctx: (ctx.task_id, ctx.branch_id, ctx.shift), False),
+    ("check_notification_sent", lambda ctx: (ctx.task_id, ctx.employee_id, "reminder"), False),
+    ("get_notification_snapshot", lambda ctx: ([ctx.task_id],), False),
+    ("get_employee_cache_stats", _no_args, False),
+    ("get_photo_filter_stats", _no_args, False),
+    ("get_loader_stats", _no_args, False),
+
+    ("create_branch", lambda ctx: (ctx.unique("Bench filial"), "Manzil"), False),
+    ("update_branch", lambda ctx: (ctx.branch_id, ctx.branch_name, "Yangi manzil"), False),
+    ("delete_branch", lambda ctx: _one(ctx.new_branch()), False),
+    ("create_employee", lambda ctx: (
+        20_000_000_000 + next(ctx.seq), "Bench", "Xodim", ctx.branch_id, "kechki"
+    ), False),
+    ("update_employee", lambda ctx: (ctx.employee_id, ctx.unique("Ism")), False),
+    ("update_employee_by_telegram_id", lambda ctx: (ctx.telegram_id, ctx.unique("Ism")), False),
+    ("delete_employee", lambda ctx: _one(ctx.new_employee_id()), False),
+    ("delete_employee_by_telegram_id", lambda ctx: _one(ctx.new_employee_telegram_id()), False),
+    ("create_task", lambda ctx: ctx.task_args(ctx.branch_ids), False),
+    ("update_task", lambda ctx: (ctx.task_id, ctx.unique("Benchmark vazifasi")), False),
+    ("delete_task", lambda ctx: _one(ctx.new_task()), False),
+    ("deactivate_task", lambda ctx: _one(ctx.new_task()), False),
+    ("submit_task_result", _submit_new, False),
+    ("submit_task_result_by_telegram_id", _submit_new_by_telegram_id, False),
+    ("mark_notification_sent", lambda ctx: (
+        ctx.task_id, ctx.employee_id, ctx.unique("bench").replace(" ", "_")
+    ), False),
+    ("mark_notifications_sent", lambda ctx: (ctx.notification_rows(),), False),
+    ("clear_task_notifications", lambda ctx: (ctx.task_id,), False),
+    ("enqueue_notifications", lambda ctx: (ctx.notification_rows(with_text=True),), False),
+    ("claim_outbox_batch", lambda ctx: (100,), False),
+    ("mark_outbox_sent", _outbox_ids, False),
+    ("mark_outbox_failed", _outbox_failures, False),
+
+    ("clear_all_notifications", _no_args, True),
+    ("clear_all_task_results", _no_args, True),
+    ("clear_all_used_photos", _no_args, True),
+]
+
+
+async def _call(setup: Setup, ctx: Context) -> tuple:
+    """Argumentlarni tayyorlash (o'lchanmaydi)"""
+    args = setup(ctx)
+    if inspect.isawaitable(args):
+        args = await args
+    return args
+
+
+async def measure(func, setup: Setup, ctx: Context, counter: QueryCounter, repeat: int) -> dict:
+    timings, queries = [], 0
+    for _ in range(repeat):
+        args = await _call(setup, ctx)
+        counter.reset()
+        started = time.perf_counter()
+        result = func(*args)
+        if inspect.isawaitable(result):
+            await result
+        timings.append((time.perf_counter() - started) * 1000)
+        queries += counter.count
+
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "min_ms": round(timings[0], 3),
+        "queries": round(queries / repeat, 2),
+    }
+
+
+async def bench_size(target: str, branches: int, employees: int, args) -> dict:
+    counts = await generate(
+        target, branches=branches, employees=employees, days=args.days, seed=args.seed
+    )
+    employee_cache.clear()
+    if target == "sqlite":
+        from database import db as module
+    else:
+        module = db_postgres
+
+    ctx = Context(module)
+    await ctx.prepare()
+
+    counter = QueryCounter()
+    results = {}
+    with count_queries(target, counter):
+        for name, setup, once in CASES:
+            if name not in args.functions or not hasattr(module, name):
+                continue
+            func = getattr(module, name)
+            if not once:
+                for _ in range(args.warmup):
+                    warm = func(*(await _call(setup, ctx)))
+                    if inspect.isawaitable(warm):
+                        await warm
+            results[name] = await measure(func, setup, ctx, counter, 1 if once else args.repeat)
+    return {"rows": counts, "functions": results}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[list]:
+    """Baseline bilan solishtirish: [backend, hajm, funksiya, eski, yangi, nisbat, so'rovlar]"""
+    regressions = []
+    for target, sizes in results.items():
+        for size, data in sizes.items():
+            old_size = baseline.get("results", {}).get(target, {}).get(size, {})
+            for name, new in data["functions"].items():
+                old = old_size.get("functions", {}).get(name)
+                if not old:
+                    continue
+                ratio = new["median_ms"] / old["median_ms"] if old["median_ms"] else 1.0
+                if ratio > threshold or new["queries"] > old["queries"]:
+                    regressions.append([
+                        target, size, name, old["median_ms"], new["median_ms"],
+                        f"{ratio:.2f}x", f"{old['queries']} -> {new['queries']}",
+                    ])
+    return regressions
+
+
+def parse_sizes(value: str) -> List[tuple]:
+    return [tuple(int(n) for n in size.split("x")) for size in value.split(",")]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("10x10,50x20,200x25"),
+                        help="filiallar x filial boshiga xodimlar, vergul bilan")
+    parser.add_argument("--days", type=int, default=14, help="natijalar tarixi (kun)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", help="faqat shu funksiyalar (vergul bilan)")
+    parser.add_argument("--save", help="natijalarni JSON baseline ga yozish")
+    parser.add_argument("--compare", help="JSON baseline bilan solishtirish")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="median kechikish necha marta oshsa regressiya")
+    args = parser.parse_args()
+
+    exported = exported_functions()
+    missing = sorted(set(exported) - {name for name, _, _ in CASES})
+    if missing:
+        print(f"⚠️ O'lchov holati yo'q: {', '.join(missing)}")
+    args.functions = set(args.only.split(",")) if args.only else set(exported)
+
+    results = {}
+    try:
+        for target in args.backends.split(","):
+            for branches, employees in args.sizes:
+                size = f"{branches}x{employees}"
+                data = await bench_size(target, branches, employees, args)
+                results.setdefault(target, {})[size] = data
+
+                print(f"\n{target}, {branches} filial x {employees} xodim, "
+                      f"{sum(data['rows'].values())} qator")
+                print_table(
+                    ["funksiya", "median_ms", "p95_ms", "min_ms", "queries"],
+                    [[name, r["median_ms"], r["p95_ms"], r["min_ms"], r["queries"]]
+                     for name, r in data["functions"].items()]
+                )
+    finally:
+        await db_postgres.close_db()
+        if "sqlite" in args.backends:
+            from database import db as db_sqlite
+            await db_sqlite.close_db()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "seed": args.seed, "days": args.days, "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print(f"\n{args.compare} bilan solishtirish: {len(regressions)} ta regressiya")
+        if regressions:
+            print_table(
+                ["backend", "hajm", "funksiya", "eski_ms", "yangi_ms", "nisbat", "queries"],
+                regressions
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,209 @@
+"""
+Har bir update da chaqiriladigan o'qishlar: ORM (eski) va xom asyncpg variantlari.
+
+    get_employee_by_telegram_id, get_task, get_employee_tasks,
+    get_task_result, has_submitted_result
+
+Har bir funksiya uchun chaqiruv boshiga devor vaqti (wall) va CPU vaqti
+(process_time - ORM hydration narxi shu yerda ko'rinadi). Xodim keshi
+o'chiriladi - har bir chaqiruv bazaga boradi.
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_hot_reads --calls 2000
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+# Kesh o'chirilmasa get_employee_by_telegram_id bazaga umuman bormaydi
+os.environ["EMPLOYEE_CACHE_SIZE"] = "0"
+os.environ["PHOTO_FILTER_ENABLED"] = "false"
+
+from benchmarks._common import reset_database, print_table  # noqa: E402
+from database import db_postgres as db  # noqa: E402
+from database.db_postgres import (  # noqa: E402
+    Branch, Employee, Task, TaskBranch, TaskResult, get_session, select
+)
+from database.records import EmployeeRecord, TaskRecord, TaskResultRecord  # noqa: E402
+
+TASKS = 20
+
+
+# ---------- Eski ORM implementatsiyalari (taqqoslash uchun) ----------
+
+async def legacy_get_employee_by_telegram_id(telegram_id: int):
+    async with get_session() as session:
+        result = await session.execute(
+            select(Employee, Branch.name.label("branch_name"))
+            .outerjoin(Branch, Employee.branch_id == Branch.id)
+            .where(
+                Employee.telegram_id == telegram_id,
+                Employee.is_active == True,  # noqa: E712
+            )
+        )
+        row = result.first()
+        if row:
+            return EmployeeRecord.from_row(row[0], branch_name=row[1] or "Noma'lum")
+        return None
+
+
+async def legacy_get_task(task_id: int):
+    async with get_session() as session:
+        result = await session.execute(select(Task).where(Task.id == task_id))
+        return TaskRecord.from_row(result.scalar_one_or_none())
+
+
+async def legacy_get_employee_tasks(employee_id: int):
+    async with get_session() as session:
+        result = await session.execute(select(Employee).where(Employee.id == employee_id))
+        emp = result.scalar_one_or_none()
+        if not emp:
+            return []
+
+        result = await session.execute(
+            select(Task, TaskResult)
+            .join(TaskBranch, Task.id == TaskBranch.task_id)
+            .outerjoin(
+                TaskResult,
+                (Task.id == TaskResult.task_id) & (TaskResult.employee_id == employee_id),
+            )
+            .where(
+                TaskBranch.branch_id == emp.branch_id,
+                Task.is_active == True,  # noqa: E712
+                (Task.shift == "hammasi") | (Task.shift == emp.shift),
+            )
+            .order_by(Task.deadline.asc(), Task.id.asc())
+        )
+        seen_ids = set()
+        tasks = []
+        for task, task_result in result.all():
+            if task.id in seen_ids:
+                continue
+            seen_ids.add(task.id)
+            tasks.append(TaskRecord.from_row(
+                task,
+                is_completed=task_result is not None,
+                is_late=bool(task_result.is_late) if task_result else False,
+            ))
+        return tasks
+
+
+async def legacy_get_task_result(task_id: int, employee_id: int):
+    async with get_session() as session:
+        result = await session.execute(
+            select(TaskResult).where(
+                TaskResult.task_id == task_id,
+                TaskResult.employee_id == employee_id,
+            )
+        )
+        return TaskResultRecord.from_row(result.scalar_one_or_none())
+
+
+async def legacy_has_submitted_result(task_id: int, telegram_id: int) -> bool:
+    async with get_session() as session:
+        result = await session.execute(
+            select(TaskResult)
+            .outerjoin(Employee, TaskResult.employee_id == Employee.id)
+            .where(
+                TaskResult.task_id == task_id,
+                Employee.telegram_id == telegram_id,
+                Employee.is_active == True,  # noqa: E712
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
+
+# ---------- O'lchov ----------
+
+async def seed() -> dict:
+    """Bitta filial, bitta xodim, TASKS ta vazifa (yarmi bajarilgan)"""
+    await reset_database()
+    now = db._tashkent_now()
+    async with get_session() as session:
+        branch = Branch(name="Filial 1")
+        session.add(branch)
+        await session.flush()
+
+        emp = Employee(
+            telegram_id=10_000_000, first_name="Xodim", last_name="Test",
+            branch_id=branch.id, shift="kunduzgi",
+        )
+        tasks = [
+            Task(
+                title=f"Vazifa {i}", description="Tavsif", task_type="har_kunlik",
+                result_type="matn", shift="hammasi" if i % 2 else "kunduzgi",
+                start_time=now - timedelta(hours=1),
+                deadline=now + timedelta(minutes=i + 1),
+            )
+            for i in range(TASKS)
+        ]
+        session.add(emp)
+        session.add_all(tasks)
+        await session.flush()
+
+        session.add_all(TaskBranch(task_id=t.id, branch_id=branch.id) for t in tasks)
+        session.add_all(
+            TaskResult(task_id=t.id, employee_id=emp.id, result_text="ok", is_late=i % 4 == 0)
+            for i, t in enumerate(tasks) if i % 2 == 0
+        )
+        await session.commit()
+        return {"employee_id": emp.id, "telegram_id": emp.telegram_id, "task_id": tasks[0].id}
+
+
+async def measure(func, args: tuple, calls: int) -> list:
+    for _ in range(min(calls, 50)):     # pool va prepared statement keshini isitish
+        await func(*args)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(calls):
+        await func(*args)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    return [round(wall / calls * 1_000_000), round(cpu / calls * 1_000_000)]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    await db.init_db()
+    try:
+        ids = await seed()
+        cases = (
+            ("get_employee_by_telegram_id", (ids["telegram_id"],),
+             legacy_get_employee_by_telegram_id, db.get_employee_by_telegram_id),
+            ("get_task", (ids["task_id"],),
+             legacy_get_task, db.get_task),
+            ("get_employee_tasks", (ids["employee_id"],),
+             legacy_get_employee_tasks, db.get_employee_tasks),
+            ("get_task_result", (ids["task_id"], ids["employee_id"]),
+             legacy_get_task_result, db.get_task_result),
+            ("has_submitted_result", (ids["task_id"], ids["telegram_id"]),
+             legacy_has_submitted_result, db.has_submitted_result),
+        )
+
+        rows = []
+        for name, call_args, legacy, raw in cases:
+            # Ikkala variant bir xil natija qaytarishini tekshirish
+            assert await legacy(*call_args) == await raw(*call_args), name
+            legacy_wall, legacy_cpu = await measure(legacy, call_args, args.calls)
+            raw_wall, raw_cpu = await measure(raw, call_args, args.calls)
+            rows.append([
+                name, legacy_wall, raw_wall, legacy_cpu, raw_cpu,
+                f"{legacy_cpu / raw_cpu:.1f}x" if raw_cpu else "-",
+            ])
+
+        print(f"\n{args.calls} ta chaqiruv, mikrosekund / chaqiruv")
+        print_table(
+            ["funksiya", "orm_wall", "raw_wall", "orm_cpu", "raw_cpu", "cpu_tejash"], rows
+        )
+    finally:
+        await db.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+check_photo_used benchmark: Bloom filter bilan va filtrsiz.
+
+    1. Xotirada: N ta element uchun filtr hajmi, qurish vaqti va o'lchangan
+       false-positive ehtimoli (N ta bo'lmagan element bilan)
+    2. Bazada: used_photos ga N ta qator, load_photo_filter vaqti va
+       check_photo_used kechikishi (yangi rasm / ishlatilgan rasm)
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_photo_filter --rows 10000000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Filtr init_db da fonda emas, benchmark ichida aniq yuklanadi
+os.environ["PHOTO_FILTER_ENABLED"] = "false"
+
+from benchmarks._common import reset_database, time_async, print_table  # noqa: E402
+from database import db_postgres as db  # noqa: E402
+from database.cache import BloomFilter, photo_filter  # noqa: E402
+from database.db_postgres import get_session, text  # noqa: E402
+
+FP_PROBES = 1_000_000
+CHECKS = 1000
+
+
+def bench_memory(rows: int, fp_rate: float) -> list:
+    bloom = BloomFilter(rows, fp_rate)
+    started = time.perf_counter()
+    bloom.update(f"photo_{i}" for i in range(rows))
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    false_positives = sum(bloom.might_contain(f"new_{i}") for i in range(FP_PROBES))
+    check_us = (time.perf_counter() - started) / FP_PROBES * 1_000_000
+
+    stats = bloom.stats()
+    return [
+        rows, fp_rate, stats["size_mb"], stats["hashes"], round(build_s, 1),
+        round(check_us, 2), stats["expected_fp_rate"], round(false_positives / FP_PROBES, 6)
+    ]
+
+
+async def checks(prefix: str, start: int):
+    for i in range(start, start + CHECKS):
+        await db.check_photo_used(f"{prefix}{i}")
+
+
+async def bench_database(rows: int) -> list:
+    await reset_database()
+    async with get_session() as session:
+        await session.execute(
+            text(
+                "INSERT INTO used_photos (file_unique_id, task_id, employee_id) "
+                "SELECT 'photo_' || i, 0, 0 FROM generate_series(1, :rows) AS i"
+            ),
+            {"rows": rows}
+        )
+        await session.commit()
+
+    started = time.perf_counter()
+    await db.load_photo_filter()
+    load_s = round(time.perf_counter() - started, 1)
+    # Yuklash xatosi faqat logga yoziladi - filtr qurilmagan bo'lsa o'lchov ma'nosiz
+    assert photo_filter.ready, "load_photo_filter filtrni qurmadi (logni tekshiring)"
+    assert photo_filter.count == rows, f"filtrga {photo_filter.count} / {rows} ta rasm yuklandi"
+
+    results = []
+    for label, prefix, use_filter in (
+        ("yangi rasm, filtrsiz", "new_", False),
+        ("yangi rasm, filtr bilan", "new_", True),
+        ("ishlatilgan rasm, filtr bilan", "photo_", True),
+    ):
+        # Filtrsiz holat uchun yuklangan filtr vaqtincha o'chiriladi
+        photo_filter.ready = use_filter
+        try:
+            timing = await time_async(checks, prefix, 1, repeat=3)
+        finally:
+            photo_filter.ready = True
+        results.append([label, load_s, round(timing["median_ms"] / CHECKS * 1000, 1)])
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--fp-rate", type=float, default=0.001)
+    parser.add_argument("--skip-db", action="store_true", help="faqat xotiradagi o'lchov")
+    args = parser.parse_args()
+
+    print(f"\nBloom filter (xotirada), {FP_PROBES} ta bo'lmagan element bilan tekshiruv")
+    print_table(
+        ["rows", "fp_target", "size_mb", "hashes", "build_s", "check_us", "fp_expected", "fp_measured"],
+        [bench_memory(args.rows, args.fp_rate)]
+    )
+
+    if args.skip_db:
+        return
+
+    await db.init_db()
+    try:
+        print(f"\ncheck_photo_used, used_photos = {args.rows} qator, {CHECKS} ta tekshiruv")
+        print_table(["holat", "load_s", "us/check"], await bench_database(args.rows))
+        print(f"\n{db.get_photo_filter_stats()}")
+    finally:
+        await db.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
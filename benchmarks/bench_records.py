@@ -0,0 +1,79 @@
+"""
+dict_from_row va yozuv turlari (database.records) taqqoslanishi.
+
+Har bir qator uchun: ORM obyektidan konvertatsiya + scheduler dagi kabi
+start_time/deadline ni datetime sifatida qayta o'qish (helpers.to_naive).
+Bazaga ulanish kerak emas - ORM obyektlari xotirada yaratiladi.
+
+Ishga tushirish:
+    python -m benchmarks.bench_records --rows 100000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks._common import print_table
+from database.db_postgres import Task, dict_from_row
+from database.records import TaskRecord
+from utils import helpers
+
+
+def make_tasks(rows: int) -> list:
+    start = datetime(2026, 1, 1, 9, 0)
+    return [
+        Task(
+            id=i, title=f"Vazifa {i}", description="Tavsif", task_type="har_kunlik",
+            result_type="rasm", shift="hammasi", start_time=start,
+            deadline=start + timedelta(hours=8), created_at=start, is_active=True
+        )
+        for i in range(rows)
+    ]
+
+
+def legacy(task):
+    row = dict_from_row(task)
+    return row, helpers.to_naive(row["start_time"]), helpers.to_naive(row["deadline"])
+
+
+def record(task):
+    row = TaskRecord.from_row(task)
+    return row, helpers.to_naive(row["start_time"]), helpers.to_naive(row["deadline"])
+
+
+def measure(convert, tasks: list) -> list:
+    started = time.perf_counter()
+    for task in tasks:
+        convert(task)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    kept = [convert(task)[0] for task in tasks]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return [
+        round(elapsed / len(tasks) * 1_000_000, 2),
+        round(allocated / len(tasks)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.rows)
+    print(f"\n{args.rows} ta vazifa: konvertatsiya + start_time/deadline o'qish")
+    print_table(
+        ["variant", "us/row", "bytes/row"],
+        [
+            ["dict_from_row (strftime + strptime)", *measure(legacy, tasks)],
+            ["TaskRecord (__slots__, datetime)", *measure(record, tasks)],
+        ]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+get_task_statistics benchmark: eski (N+1) va yangi (JOIN) variantlar.
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_task_statistics
+"""
+import argparse
+import asyncio
+from datetime import timedelta
+
+from benchmarks._common import (
+    QueryCounter, reset_database, time_async, print_table
+)
+from database import db_postgres as db
+from database.db_postgres import (
+    Branch, Employee, Task, TaskBranch, TaskResult,
+    get_session, dict_from_row, _extract_number, select
+)
+
+EMPLOYEES_PER_BRANCH = 10
+
+
+async def legacy_get_task_statistics(task_id: int) -> dict:
+    """Eski implementatsiya (taqqoslash uchun): filial va xodim bo'yicha so'rovlar"""
+    async with get_session() as session:
+        result = await session.execute(select(Task).where(Task.id == task_id))
+        task = result.scalar_one_or_none()
+        if not task:
+            return {}
+
+        result = await session.execute(
+            select(Branch)
+            .join(TaskBranch, Branch.id == TaskBranch.branch_id)
+            .where(TaskBranch.task_id == task_id)
+            .order_by(Branch.id)
+        )
+        branches = result.scalars().all()
+        stats = {"branches": [], "task": dict_from_row(task)}
+
+        for branch in branches:
+            query = select(Employee).where(
+                Employee.branch_id == branch.id,
+                Employee.is_active == True  # noqa: E712
+            )
+            if task.shift != 'hammasi':
+                query = query.where(Employee.shift == task.shift)
+            # Yangi variant bilan bir xil tartib - natijalarni taqqoslash uchun
+            result = await session.execute(query.order_by(Employee.id))
+            employees = result.scalars().all()
+
+            completed, not_completed, late = [], [], []
+            for emp in employees:
+                result = await session.execute(
+                    select(TaskResult).where(
+                        TaskResult.task_id == task_id,
+                        TaskResult.employee_id == emp.id
+                    )
+                )
+                task_result = result.scalar_one_or_none()
+                emp_info = {
+                    "id": emp.id,
+                    "name": f"{emp.first_name} {emp.last_name}",
+                    "telegram_id": emp.telegram_id,
+                    "result": dict_from_row(task_result) if task_result else None
+                }
+                if task_result:
+                    (late if task_result.is_late else completed).append(emp_info)
+                else:
+                    not_completed.append(emp_info)
+
+            stats["branches"].append({
+                "id": branch.id, "name": branch.name,
+                "completed": completed, "not_completed": not_completed,
+                "late": late
+            })
+
+        stats["branches"].sort(key=lambda x: (_extract_number(x['name']), x['name']))
+        return stats
+
+
+async def seed(employees: int) -> int:
+    """Filiallar, xodimlar va yarmi bajarilgan vazifa yaratish"""
+    await reset_database()
+    branch_count = max(1, employees // EMPLOYEES_PER_BRANCH)
+    now = db._tashkent_now()
+
+    async with get_session() as session:
+        branches = [Branch(name=f"Filial {i + 1}") for i in range(branch_count)]
+        session.add_all(branches)
+        await session.flush()
+
+        emps = [
+            Employee(
+                telegram_id=10_000_000 + i,
+                first_name=f"Xodim{i}", last_name="Test",
+                branch_id=branches[i % branch_count].id,
+                shift="kunduzgi" if i % 2 else "kechki",
+            )
+            for i in range(employees)
+        ]
+        session.add_all(emps)
+
+        task = Task(
+            title="Benchmark", description="", task_type="bir_martalik",
+            result_type="matn", shift="hammasi",
+            start_time=now - timedelta(hours=1),
+            deadline=now + timedelta(hours=1),
+        )
+        session.add(task)
+        await session.flush()
+
+        session.add_all(TaskBranch(task_id=task.id, branch_id=b.id) for b in branches)
+        session.add_all(
+            TaskResult(task_id=task.id, employee_id=e.id, result_text="ok",
+                       is_late=bool(i % 4 == 0))
+            for i, e in enumerate(emps) if i % 2 == 0
+        )
+        await session.commit()
+        return task.id
+
+
+async def main(sizes, repeat):
+    await db.init_db()
+    counter = QueryCounter()
+    rows = []
+
+    for size in sizes:
+        task_id = await seed(size)
+
+        for name, func in (
+            ("legacy", legacy_get_task_statistics),
+            ("joined", db.get_task_statistics),
+        ):
+            with counter.attach():
+                counter.reset()
+                await func(task_id)
+                queries = counter.count
+            timing = await time_async(func, task_id, repeat=repeat)
+            rows.append((size, name, queries, timing["median_ms"], timing["max_ms"]))
+
+        # Ikkala variant bir xil natija qaytarishini tekshirish
+        assert await legacy_get_task_statistics(task_id) == await db.get_task_statistics(task_id)
+
+    print_table(("employees", "impl", "queries", "median_ms", "max_ms"), rows)
+    await db.close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
@@ -0,0 +1,402 @@
+"""
+Sintetik ma'lumotlar generatori: filiallar, xodimlar, vazifalar va oylar davomidagi natijalar.
+
+    • N filial, har birida M xodim (kunduzgi / kechki smenalarga teng bo'lingan,
+      ~3% i nofaol)
+    • har kunlik vazifalar - barcha filiallarga; bir martalik vazifalar -
+      tarix kunlariga tarqalgan, filiallarning tasodifiy qismiga
+    • --days kunlik task_results (auditoriyaning --completion qismi, ~10% kechikkan)
+      va rasmli natijalar uchun used_photos
+    • bugungi natijalar uchun task_result_counters
+
+Bir xil --seed bir xil ma'lumot beradi (ikkala backend uchun ham).
+
+PostgreSQL: jadvallar qayta yaratiladi, qatorlar asyncpg COPY bilan yoziladi.
+O'tgan kunlar natijalari kunlik qayta tiklashdagidek task_results_history
+bo'laklariga, bugungisi task_results ga tushadi. task_audience triggerlari
+yuklash vaqtida o'chiriladi va jadval oxirida bir so'rov bilan to'ldiriladi.
+
+SQLite (database/db.py): sxemada result_day yo'q (UNIQUE(task_id, employee_id)),
+shuning uchun faqat bugungi natijalar yoziladi; used_photos - barcha kunlar uchun.
+Yuklash bitta tranzaksiyada executemany bilan.
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.dataset \\
+        --branches 100 --employees 20 --days 90
+    BENCH_SQLITE_PATH=./data/bench.db python -m benchmarks.dataset --target sqlite
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+os.environ.setdefault("PHOTO_FILTER_ENABLED", "false")
+
+from sqlalchemy import text  # noqa: E402
+
+from benchmarks._common import reset_database, print_table  # noqa: E402
+from database import db_postgres  # noqa: E402
+
+FIRST_NAMES = (
+    "Aziz", "Bobur", "Dilshod", "Jasur", "Sardor", "Otabek", "Sherzod", "Ulug'bek",
+    "Dilnoza", "Gulnora", "Madina", "Nilufar", "Sevara", "Shahnoza", "Zarina", "Malika",
+)
+LAST_NAMES = (
+    "Karimov", "Rahimov", "Tursunov", "Yusupov", "Aliyev", "Saidov", "Ergashev",
+    "Xolmatov", "Nazarov", "Qodirov", "Mirzayev", "Abdullayev",
+)
+
+BRANCH_COLUMNS = ("id", "name", "address", "created_at")
+EMPLOYEE_COLUMNS = (
+    "id", "telegram_id", "first_name", "last_name", "branch_id", "shift", "is_active", "created_at"
+)
+TASK_COLUMNS = (
+    "id", "title", "description", "task_type", "result_type", "shift",
+    "start_time", "deadline", "created_at", "is_active",
+)
+TASK_BRANCH_COLUMNS = ("id", "task_id", "branch_id")
+RESULT_COLUMNS = (
+    "id", "result_day", "task_id", "employee_id", "result_text",
+    "result_photo_id", "file_unique_id", "is_late", "submitted_at",
+)
+PHOTO_COLUMNS = ("id", "file_unique_id", "task_id", "employee_id", "used_at")
+
+# SQLite sxemasida yo'q ustunlar
+SQLITE_SKIP = {"result_day"}
+
+
+class Dataset:
+    """Deterministik ma'lumotlar to'plami. Kichik jadvallar xotirada,
+    natijalar esa kunma-kun generator orqali (oylar davomida millionlab qator).
+    """
+
+    def __init__(
+        self, branches: int = 100, employees: int = 20, daily_tasks: int = 30,
+        one_off_tasks: int = 300, days: int = 90, completion: float = 0.8,
+        photo_share: float = 0.4, late_share: float = 0.1, seed: int = 1,
+        now: datetime = None
+    ):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.days = days
+        self.completion = completion
+        self.late_share = late_share
+        self.now = now or db_postgres._tashkent_now()
+        self.today = db_postgres.business_day(self.now)
+        self.first_day = self.today - timedelta(days=days)
+
+        self.branches = self._make_branches(branches)
+        self.employees = self._make_employees(employees)
+        self.tasks, self.task_days = self._make_tasks(daily_tasks, one_off_tasks, photo_share)
+        self.task_branches = self._make_task_branches()
+        self._audience = self._make_audience()
+        self.last_result_id = 0
+        self.last_photo_id = 0
+        self.today_counters: Dict[int, int] = {}
+
+    # ---------- Kichik jadvallar ----------
+
+    def _make_branches(self, count: int) -> List[tuple]:
+        created = datetime.combine(self.first_day, dt_time(9))
+        return [
+            (i, f"Filial {i}", f"Toshkent, {i}-ko'cha", created)
+            for i in range(1, count + 1)
+        ]
+
+    def _make_employees(self, per_branch: int) -> List[tuple]:
+        rows = []
+        created = datetime.combine(self.first_day, dt_time(10))
+        for branch_id, *_ in self.branches:
+            for i in range(per_branch):
+                emp_id = len(rows) + 1
+                rows.append((
+                    emp_id, 10_000_000 + emp_id,
+                    self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES),
+                    branch_id, "kunduzgi" if i % 2 == 0 else "kechki",
+                    self.rng.random() >= 0.03, created,
+                ))
+        return rows
+
+    def _task_times(self, day: date) -> Tuple[datetime, datetime]:
+        # 08:00-18:00 oralig'ida, 5 daqiqaga yaxlitlangan; muddat 1-4 soat
+        start = datetime.combine(day, dt_time(8)) + timedelta(minutes=5 * self.rng.randrange(120))
+        return start, start + timedelta(hours=self.rng.randint(1, 4))
+
+    def _make_tasks(self, daily: int, one_off: int, photo_share: float):
+        rows, task_days = [], {}
+        for i in range(daily + one_off):
+            task_id = i + 1
+            is_daily = i < daily
+            # Bir martalik vazifa tarixning bitta kunida; faqat bugungilari faol
+            day = self.first_day if is_daily else self.first_day + timedelta(
+                days=self.rng.randint(1, self.days)
+            )
+            start, deadline = self._task_times(day)
+            rows.append((
+                task_id, f"Vazifa {task_id}", "Sintetik vazifa",
+                "har_kunlik" if is_daily else "bir_martalik",
+                "rasm" if self.rng.random() < photo_share else "matn",
+                self.rng.choice(("hammasi", "hammasi", "kunduzgi", "kechki")),
+                start, deadline, start - timedelta(hours=1),
+                self.rng.random() >= 0.1 if is_daily else day == self.today,
+            ))
+            task_days[task_id] = None if is_daily else day
+        return rows, task_days
+
+    def _make_task_branches(self) -> List[tuple]:
+        branch_ids = [b[0] for b in self.branches]
+        rows = []
+        for task in self.tasks:
+            if self.task_days[task[0]] is None:
+                targets = branch_ids
+            else:
+                targets = sorted(self.rng.sample(branch_ids, self.rng.randint(1, len(branch_ids))))
+            first_id = len(rows) + 1
+            rows.extend((first_id + i, task[0], b) for i, b in enumerate(targets))
+        return rows
+
+    def _make_audience(self) -> Dict[int, List[int]]:
+        """task_audience qoidasi: filial mos, xodim faol, smena mos"""
+        by_branch: Dict[Tuple[int, str], List[int]] = {}
+        for emp_id, _, _, _, branch_id, shift, is_active, _ in self.employees:
+            if is_active:
+                by_branch.setdefault((branch_id, shift), []).append(emp_id)
+
+        shifts = {task[0]: task[5] for task in self.tasks}
+        audience: Dict[int, List[int]] = {}
+        for _, task_id, branch_id in self.task_branches:
+            task_shift = shifts[task_id]
+            for shift in ("kunduzgi", "kechki"):
+                if task_shift in ("hammasi", shift):
+                    audience.setdefault(task_id, []).extend(by_branch.get((branch_id, shift), ()))
+        return audience
+
+    # ---------- Natijalar ----------
+
+    def results_by_day(self) -> Iterator[Tuple[date, List[tuple], List[tuple]]]:
+        """Har bir kun uchun (kun, task_results qatorlari, used_photos qatorlari)"""
+        for offset in range(self.days + 1):
+            day = self.first_day + timedelta(days=offset)
+            results, photos = [], []
+            for task in self.tasks:
+                task_id, task_type, result_type = task[0], task[3], task[4]
+                task_day = self.task_days[task_id]
+                if task_day is None and not task[9]:
+                    continue
+                if task_day is not None and task_day != day:
+                    continue
+                start = datetime.combine(day, task[6].time())
+                deadline = datetime.combine(day, task[7].time())
+                # Bugun hali boshlanmagan vazifalarga natija yo'q
+                if start > self.now:
+                    continue
+
+                window = (min(deadline, self.now) - start).total_seconds()
+                for emp_id in self._audience.get(task_id, ()):
+                    if self.rng.random() >= self.completion:
+                        continue
+                    is_late = deadline < self.now and self.rng.random() < self.late_share
+                    if is_late:
+                        submitted = deadline + timedelta(minutes=self.rng.randint(1, 120))
+                    else:
+                        submitted = start + timedelta(seconds=self.rng.uniform(0, window))
+
+                    self.last_result_id += 1
+                    photo_id = file_unique_id = None
+                    result_text = None
+                    if result_type == "rasm":
+                        self.last_photo_id += 1
+                        file_unique_id = f"AQAD{self.seed:x}_{self.last_result_id:x}"
+                        photo_id = f"AgACAgIAAxkBAAI{file_unique_id}"
+                        photos.append((self.last_photo_id, file_unique_id, task_id, emp_id, submitted))
+                    else:
+                        result_text = f"Bajarildi ({task_type})"
+                    results.append((
+                        self.last_result_id, day, task_id, emp_id, result_text,
+                        photo_id, file_unique_id, is_late, submitted,
+                    ))
+                    if day == self.today:
+                        self.today_counters[task_id] = self.today_counters.get(task_id, 0) + 1
+            yield day, results, photos
+
+
+# ============== PostgreSQL ==============
+
+async def _copy(raw, table: str, columns: tuple, rows: list) -> int:
+    if rows:
+        await raw.copy_records_to_table(table, records=rows, columns=columns)
+    return len(rows)
+
+
+async def load_postgres(dataset: Dataset) -> Dict[str, int]:
+    """Benchmark bazasini qayta yaratib, to'plamni COPY bilan yuklash"""
+    await reset_database()
+    counts = {}
+    results_table = db_postgres.TaskResult.__tablename__
+    history_table = db_postgres.task_results_history.name
+
+    async with db_postgres.engine.begin() as conn:
+        # Birinchi so'rov tranzaksiyani ochadi - COPY ham shu tranzaksiyada
+        for table in ("employees", "task_branches"):
+            await conn.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER USER"))
+        raw = (await conn.get_raw_connection()).driver_connection
+
+        counts["branches"] = await _copy(raw, "branches", BRANCH_COLUMNS, dataset.branches)
+        counts["employees"] = await _copy(raw, "employees", EMPLOYEE_COLUMNS, dataset.employees)
+        counts["tasks"] = await _copy(raw, "tasks", TASK_COLUMNS, dataset.tasks)
+        counts["task_branches"] = await _copy(
+            raw, "task_branches", TASK_BRANCH_COLUMNS, dataset.task_branches
+        )
+
+        counts[results_table] = counts[history_table] = counts["used_photos"] = 0
+        for day, results, photos in dataset.results_by_day():
+            if day < dataset.today:
+                # Kunlik qayta tiklashdan keyingi holat: o'tgan kunlar tarix bo'laklarida
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {db_postgres._partition_name(results_table, day)} "
+                    f"PARTITION OF {history_table} {db_postgres._partition_bounds(day)}"
+                ))
+                counts[history_table] += await _copy(raw, history_table, RESULT_COLUMNS, results)
+            else:
+                counts[results_table] += await _copy(raw, results_table, RESULT_COLUMNS, results)
+            counts["used_photos"] += await _copy(raw, "used_photos", PHOTO_COLUMNS, photos)
+
+        counts["task_result_counters"] = await _copy(
+            raw, "task_result_counters", ("task_id", "submitted"),
+            sorted(dataset.today_counters.items())
+        )
+
+        # Aniq id lar bilan yozilgan jadvallar ketma-ketliklarini surish
+        for table, last_id in (
+            ("branches", len(dataset.branches)),
+            ("employees", len(dataset.employees)),
+            ("tasks", len(dataset.tasks)),
+            ("task_branches", len(dataset.task_branches)),
+            (results_table, dataset.last_result_id),
+            ("used_photos", dataset.last_photo_id),
+        ):
+            if last_id:
+                await conn.execute(
+                    text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :last_id)"),
+                    {"table": table, "last_id": last_id}
+                )
+
+        for table in ("employees", "task_branches"):
+            await conn.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER USER"))
+        await db_postgres.install_task_audience(conn, rebuild=True)
+        result = await conn.execute(text("SELECT count(*) FROM task_audience"))
+        counts["task_audience"] = result.scalar()
+
+    async with db_postgres.engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+    return counts
+
+
+# ============== SQLite ==============
+
+def _sqlite_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+async def _insert_many(conn, table: str, columns: tuple, rows: list) -> int:
+    keep = [i for i, name in enumerate(columns) if name not in SQLITE_SKIP]
+    names = ", ".join(columns[i] for i in keep)
+    marks = ", ".join("?" for _ in keep)
+    await conn.executemany(
+        f"INSERT INTO {table} ({names}) VALUES ({marks})",
+        [tuple(_sqlite_value(row[i]) for i in keep) for row in rows]
+    )
+    return len(rows)
+
+
+async def load_sqlite(dataset: Dataset) -> Dict[str, int]:
+    """database/db.py fayliga (BENCH_SQLITE_PATH) to'plamni yuklash"""
+    from database import db as db_sqlite
+
+    tables = (
+        "notification_outbox", "sent_notifications", "used_photos", "task_results",
+        "task_branches", "employees", "tasks", "branches",
+    )
+    async with db_sqlite.get_db() as conn:
+        for table in tables:
+            await conn.execute(f"DROP TABLE IF EXISTS {table}")
+        await conn.commit()
+    await db_sqlite.init_db()
+
+    counts = {}
+    async with db_sqlite.get_db() as conn:
+        await conn.execute("PRAGMA synchronous=OFF")
+        counts["branches"] = await _insert_many(conn, "branches", BRANCH_COLUMNS, dataset.branches)
+        counts["employees"] = await _insert_many(
+            conn, "employees", EMPLOYEE_COLUMNS, dataset.employees
+        )
+        counts["tasks"] = await _insert_many(conn, "tasks", TASK_COLUMNS, dataset.tasks)
+        counts["task_branches"] = await _insert_many(
+            conn, "task_branches", TASK_BRANCH_COLUMNS, dataset.task_branches
+        )
+
+        counts["task_results"] = counts["used_photos"] = 0
+        for day, results, photos in dataset.results_by_day():
+            if day == dataset.today:
+                counts["task_results"] += await _insert_many(
+                    conn, "task_results", RESULT_COLUMNS, results
+                )
+            counts["used_photos"] += await _insert_many(conn, "used_photos", PHOTO_COLUMNS, photos)
+
+        await conn.commit()
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("ANALYZE")
+        await conn.commit()
+    return counts
+
+
+async def generate(target: str = "postgres", **options) -> Dict[str, int]:
+    """Boshqa benchmarklar uchun: to'plamni yaratib, backendga yuklash"""
+    dataset = Dataset(**options)
+    if target == "sqlite":
+        return await load_sqlite(dataset)
+    return await load_postgres(dataset)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--target", choices=("postgres", "sqlite"), default="postgres")
+    parser.add_argument("--branches", type=int, default=100)
+    parser.add_argument("--employees", type=int, default=20, help="filial boshiga xodimlar")
+    parser.add_argument("--daily-tasks", type=int, default=30)
+    parser.add_argument("--one-off-tasks", type=int, default=300, help="tarix kunlariga tarqalgan")
+    parser.add_argument("--days", type=int, default=90, help="natijalar tarixi (kun)")
+    parser.add_argument("--completion", type=float, default=0.8,
+                        help="natija yuboradigan auditoriya ulushi")
+    parser.add_argument("--photo-share", type=float, default=0.4,
+                        help="rasm natijali vazifalar ulushi")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    options = dict(
+        branches=args.branches, employees=args.employees, daily_tasks=args.daily_tasks,
+        one_off_tasks=args.one_off_tasks, days=args.days, completion=args.completion,
+        photo_share=args.photo_share, seed=args.seed,
+    )
+    started = time.perf_counter()
+    try:
+        counts = await generate(args.target, **options)
+    finally:
+        if args.target == "postgres":
+            await db_postgres.close_db()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{args.target}: {elapsed:.1f} s")
+    print_table(["jadval", "qatorlar"], [[table, rows] for table, rows in counts.items()])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
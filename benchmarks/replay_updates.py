@@ -0,0 +1,292 @@
+"""
+Update replay yuklama testi: main.create_dispatcher() zanjiri orqali Dispatcher.feed_update.
+
+Har bir simulyatsiya qilingan xodim haqiqiy ssenariyni ketma-ket o'ynaydi:
+    1. "📋 Vazifalarim" xabari
+    2. vazifa tugmasi (emp_task_<id>)
+    3. natija tugmasi (submit_photo_<id> / submit_text_<id>)
+    4. rasm yoki matn xabari - natija saqlanadi
+Xodimlar parallel ishlaydi (--concurrency). Bot API so'rovlari soxta sessiyaga
+tushadi (tarmoq yo'q, --api-latency-ms bilan Telegram javob vaqtini qo'shish mumkin).
+
+O'lchanadi:
+    • handler kechikishi - feed_update boshidan oxirigacha (middlewarelar,
+      FSM, unit of work COMMIT bilan) p50 / p95 / p99, update turi bo'yicha
+    • DB pool kutish vaqti - engine pool dan ulanish olish (pool.connect)
+      davomiyligi: p50 / p95 / p99 va jami handler vaqtiga nisbatan ulushi
+    • o'tkazuvchanlik (update / s)
+
+Baza benchmarks.dataset bilan to'ldiriladi (--branches, --employees).
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.replay_updates \\
+        --users 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+os.environ.setdefault("PHOTO_FILTER_ENABLED", "false")
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.default import DefaultBotProperties  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import TelegramMethod  # noqa: E402
+from aiogram.types import Chat, Message, Update  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from benchmarks._common import print_table  # noqa: E402
+from benchmarks.dataset import generate  # noqa: E402
+from database import db_postgres  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+BOT_ID = 42
+BOT_TOKEN = f"{BOT_ID}:benchmark"
+
+
+# ============== Soxta Bot API ==============
+
+class StubSession(BaseSession):
+    """Bot API so'rovlariga tarmoqsiz javob beruvchi sessiya"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._message_ids = itertools.count(1_000_000)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None):
+        name = type(method).__name__
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method.__returning__ is bool:
+            return True
+        chat_id = getattr(method, "chat_id", None) or 0
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type="private"),
+            text=getattr(method, "text", None),
+        ).as_(bot)
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+# ============== Sintetik updatelar ==============
+
+class UpdateFactory:
+    """Telegram JSON ko'rinishidagi updatelar (Update.model_validate orqali)"""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def _user(self, telegram_id: int) -> dict:
+        return {"id": telegram_id, "is_bot": False, "first_name": "Xodim"}
+
+    def _message(self, telegram_id: int, **content) -> dict:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": telegram_id, "type": "private"},
+            "from": self._user(telegram_id),
+            **content,
+        }
+
+    def _update(self, **payload) -> Update:
+        return Update.model_validate(
+            {"update_id": next(self._update_ids), **payload}, context={"bot": self.bot}
+        )
+
+    def text(self, telegram_id: int, value: str) -> Update:
+        return self._update(message=self._message(telegram_id, text=value))
+
+    def photo(self, telegram_id: int, file_unique_id: str) -> Update:
+        return self._update(message=self._message(telegram_id, photo=[{
+            "file_id": f"AgACAgIAAxkBAAI{file_unique_id}",
+            "file_unique_id": file_unique_id,
+            "width": 1280, "height": 960,
+        }]))
+
+    def callback(self, telegram_id: int, data: str) -> Update:
+        # Tugma bot yuborgan xabarda turadi - edit_text shu xabarni tahrirlaydi
+        bot_message = self._message(telegram_id, text="📋 Vazifalar")
+        bot_message["from"] = {"id": BOT_ID, "is_bot": True, "first_name": "Bench"}
+        return self._update(callback_query={
+            "id": str(next(self._update_ids)),
+            "from": self._user(telegram_id),
+            "chat_instance": str(telegram_id),
+            "data": data,
+            "message": bot_message,
+        })
+
+    def scenario(self, telegram_id: int, task_id: int, result_type: str, run: int) -> List[tuple]:
+        """(tur, update) ketma-ketligi - bitta xodimning natija yuborishi"""
+        if result_type == "rasm":
+            start, final = "submit_photo", self.photo(telegram_id, f"replay_{run}_{telegram_id}_{task_id}")
+        else:
+            start, final = "submit_text", self.text(telegram_id, "Bajarildi")
+        return [
+            ("vazifalarim", self.text(telegram_id, "📋 Vazifalarim")),
+            ("view_task", self.callback(telegram_id, f"emp_task_{task_id}")),
+            (f"{start}_start", self.callback(telegram_id, f"{start}_{task_id}")),
+            (start, final),
+        ]
+
+
+# ============== O'lchov ==============
+
+class PoolWaitTimer:
+    """Engine pool dan ulanish olish vaqtini yozish (pool.connect atrofida)"""
+
+    def __init__(self, engine):
+        self.pool = engine.sync_engine.pool
+        self.waits: List[float] = []
+        self._original = None
+
+    def __enter__(self):
+        self._original = self.pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return self._original()
+            finally:
+                self.waits.append(time.perf_counter() - started)
+
+        # Engine ulanishni self.pool.connect() orqali oladi - instansiya atributi yetarli
+        self.pool.connect = timed_connect
+        return self
+
+    def __exit__(self, *exc):
+        del self.pool.connect
+
+
+def percentiles(values: List[float]) -> List[float]:
+    """[p50, p95, p99, max] millisekundda"""
+    if not values:
+        return [0, 0, 0, 0]
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+    return [pick(0.5), pick(0.95), pick(0.99), round(ordered[-1] * 1000, 2)]
+
+
+async def pick_tasks(users: int, seed: int) -> List[tuple]:
+    """Bugun hali natija yubormagan xodimlar va ularning faol vazifasi"""
+    async with db_postgres.engine.connect() as conn:
+        await conn.execute(text("SELECT setseed(:seed)"), {"seed": (seed % 1000) / 1000})
+        result = await conn.execute(
+            text(
+                "SELECT DISTINCT ON (e.id) e.telegram_id, t.id, t.result_type "
+                "FROM task_audience a "
+                "JOIN employees e ON e.id = a.employee_id "
+                "JOIN tasks t ON t.id = a.task_id "
+                "WHERE t.is_active AND e.is_active "
+                "  AND NOT EXISTS (SELECT 1 FROM task_results r "
+                "                  WHERE r.task_id = t.id AND r.employee_id = e.id) "
+                "ORDER BY e.id, random() "
+                "LIMIT :users"
+            ),
+            {"users": users}
+        )
+        return [tuple(row) for row in result.all()]
+
+
+async def replay(dp, bot: Bot, plan: List[tuple], concurrency: int, run: int) -> tuple:
+    factory = UpdateFactory(bot)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: Dict[str, List[float]] = {}
+    errors = 0
+
+    async def employee(telegram_id: int, task_id: int, result_type: str):
+        nonlocal errors
+        async with semaphore:
+            # Bitta xodimning updatelari ketma-ket (FSM holati tartibga bog'liq)
+            for kind, update in factory.scenario(telegram_id, task_id, result_type, run):
+                started = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"{kind} ({telegram_id}): {e}")
+                latencies.setdefault(kind, []).append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(employee(*row) for row in plan))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=2000, help="simulyatsiya qilingan xodimlar")
+    parser.add_argument("--concurrency", type=int, default=200, help="bir vaqtda faol xodimlar")
+    parser.add_argument("--branches", type=int, default=100)
+    parser.add_argument("--employees", type=int, default=25, help="filial boshiga xodimlar")
+    parser.add_argument("--days", type=int, default=7, help="natijalar tarixi (kun)")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0,
+                        help="soxta Bot API javob kechikishi")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # main.py logging ni sozlaydi; update boshiga INFO loglar o'lchovni buzmasin
+    from main import create_dispatcher
+    logging.getLogger().setLevel(logging.WARNING)
+
+    session = StubSession(latency=args.api_latency_ms / 1000)
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+    try:
+        counts = await generate(
+            "postgres", branches=args.branches, employees=args.employees,
+            days=args.days, seed=args.seed
+        )
+        plan = await pick_tasks(args.users, args.seed)
+        print(f"{counts['employees']} xodim, {counts['tasks']} vazifa; "
+              f"{len(plan)} xodim ssenariysi, concurrency={args.concurrency}")
+
+        dp = create_dispatcher()
+        with PoolWaitTimer(db_postgres.engine) as pool:
+            latencies, errors, elapsed = await replay(dp, bot, plan, args.concurrency, args.seed)
+    finally:
+        await db_postgres.close_db()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    print(f"\nHandler kechikishi (ms), {len(all_latencies)} update, {elapsed:.1f} s")
+    print_table(
+        ["update", "count", "p50", "p95", "p99", "max"],
+        [[kind, len(values), *percentiles(values)] for kind, values in latencies.items()]
+        + [["hammasi", len(all_latencies), *percentiles(all_latencies)]]
+    )
+
+    handler_total = sum(all_latencies)
+    print("\nDB pool dan ulanish olish (ms)")
+    print_table(
+        ["checkouts", "p50", "p95", "p99", "max", "jami_s", "handler_ulushi"],
+        [[len(pool.waits), *percentiles(pool.waits), round(sum(pool.waits), 2),
+          f"{sum(pool.waits) / handler_total:.1%}" if handler_total else "-"]]
+    )
+
+    print()
+    print(f"{'throughput':<18}{len(all_latencies) / elapsed:.0f} update/s")
+    print(f"{'errors':<18}{errors}")
+    print(f"{'mean_ms':<18}{statistics.mean(all_latencies) * 1000 if all_latencies else 0:.2f}")
+    print(f"{'bot_api_calls':<18}{sum(session.calls.values())} {session.calls}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,293 @@
+"""
+Scheduler masshtab benchmarki: soxta soat va soxta Bot bilan bitta kunni simulyatsiya qilish.
+
+Benchmark bazasiga N filial × M xodim va K ta faol vazifa yoziladi, keyin
+utils/scheduler haqiqiy kodi simulyatsiya qilingan kun bo'yicha daqiqama-daqiqa
+yuritiladi (helpers.set_clock - baza qatlami ham shu soatdan foydalanadi:
+ish kuni, kunlik bo'laklar, outbox vaqtlari):
+    • vazifa hodisalari - setup_scheduler / sync_task_events rejalashtirgan
+      DateTrigger joblari (scheduler to'xtatilgan holatda, vaqti kelganda
+      shu yerdan process_task_events ga beriladi)
+    • sync_task_events - har SYNC_INTERVAL_MINUTES da
+    • drain_outbox - har tikda
+    • reset_daily_results - DAILY_RESET_HOUR:DAILY_RESET_MINUTE da
+
+Har bir tik (1 daqiqa) uchun: devor vaqti, so'rovlar soni (SQLAlchemy va
+_raw_connection orqali xom asyncpg o'qishlari) va yuborilgan xabarlar.
+Birorta tik TICK_BUDGET (60 s) dan oshsa yoki rejalashtirilgan hodisalardan
+birortasi bajarilmay qolsa (lost_events) - chiqish kodi 1.
+
+--event-lag N - vaqti kelgan hodisalar N daqiqa kechikib bajariladi (band
+event loop). Hodisalar 5 daqiqalik vaqtlarga tushadi, shuning uchun
+--event-lag 5 da hodisa sync_task_events bilan bir tikka to'g'ri keladi -
+sinxronlash vaqti kelgan, lekin bajarilmagan joblarni o'chirmasligi tekshiriladi.
+
+Xodimlarning bir qismi vazifa boshlangandan keyin natija yuboradi
+(--completion) - eslatmalar faqat bajarmagan filiallarga ketadi.
+
+Ishga tushirish:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.scheduler_day \\
+        --branches 100 --employees 20 --tasks 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("PHOTO_FILTER_ENABLED", "false")
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from benchmarks._common import QueryCounter, count_queries, reset_database, print_table  # noqa: E402
+from config import DAILY_RESET_HOUR, DAILY_RESET_MINUTE  # noqa: E402
+from database import db_postgres as db  # noqa: E402
+from database.db_postgres import Branch, Employee, Task, TaskBranch, get_session  # noqa: E402
+from utils import helpers, outbox  # noqa: E402
+from utils import scheduler as task_scheduler  # noqa: E402
+from utils.broadcast import TokenBucket, broadcaster  # noqa: E402
+
+TICK = timedelta(minutes=1)
+TICK_BUDGET = 60.0
+
+
+class SimulatedClock:
+    """helpers.now() uchun qo'lda suriladigan soat"""
+
+    def __init__(self, start: datetime):
+        self.current = start
+
+    def __call__(self) -> datetime:
+        return self.current
+
+    def advance(self, delta: timedelta):
+        self.current += delta
+
+
+class _SentMessage:
+    def __init__(self, message_id: int, chat_id: int, text: str):
+        self.message_id = message_id
+        self.chat_id = chat_id
+        self.text = text
+
+
+class RecordingBot:
+    """Bot o'rnini bosuvchi: yuborilgan xabarlarni simulyatsiya vaqti bilan yozib boradi"""
+
+    def __init__(self, clock: SimulatedClock):
+        self.clock = clock
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str, parse_mode: str = None, **kwargs):
+        self.sent.append((self.clock(), chat_id, text))
+        return _SentMessage(len(self.sent), chat_id, text)
+
+
+async def seed(branches: int, employees: int, tasks: int, day: datetime, rng: random.Random) -> tuple:
+    """Filiallar, xodimlar (kunduzgi/kechki) va kun davomida tarqalgan vazifalar.
+    (xodimlar soni, vazifa ID lari) qaytaradi.
+    """
+    await reset_database()
+    async with get_session() as session:
+        branch_rows = [Branch(name=f"Filial {i + 1}") for i in range(branches)]
+        session.add_all(branch_rows)
+        await session.flush()
+
+        session.add_all(
+            Employee(
+                telegram_id=10_000_000 + b * employees + i,
+                first_name=f"Xodim{b * employees + i}", last_name="Test",
+                branch_id=branch.id,
+                shift="kunduzgi" if i % 2 else "kechki",
+            )
+            for b, branch in enumerate(branch_rows)
+            for i in range(employees)
+        )
+
+        task_rows = []
+        for i in range(tasks):
+            # Boshlanish 08:00-20:00 oralig'ida, 5 daqiqaga yaxlitlangan - hodisalar ustma-ust tushadi
+            start = day + timedelta(hours=8, minutes=5 * rng.randrange(0, 12 * 12))
+            task_rows.append(Task(
+                title=f"Vazifa {i + 1}", description="Benchmark",
+                task_type="har_kunlik" if i % 10 < 7 else "bir_martalik",
+                result_type="matn",
+                shift=rng.choice(("hammasi", "hammasi", "kunduzgi", "kechki")),
+                start_time=start,
+                deadline=start + timedelta(hours=rng.randint(1, 4)),
+            ))
+        session.add_all(task_rows)
+        await session.flush()
+
+        session.add_all(
+            TaskBranch(task_id=task.id, branch_id=branch.id)
+            for task in task_rows for branch in branch_rows
+        )
+        await session.commit()
+    return branches * employees, [task.id for task in task_rows]
+
+
+async def submit_results(task_ids: list, completion: float):
+    """Boshlangan vazifalar bo'yicha xodimlarning completion qismi natija yuboradi
+    (deterministik tanlov, scheduler vaqtiga kirmaydi)
+    """
+    if not task_ids or completion <= 0:
+        return
+    async with get_session() as session:
+        await session.execute(
+            text(
+                "INSERT INTO task_results (result_day, task_id, employee_id, result_text, is_late) "
+                "SELECT :result_day, task_id, employee_id, 'ok', false FROM task_audience "
+                "WHERE task_id = ANY(:task_ids) "
+                "  AND (employee_id * 2654435761 % 1000) < :threshold "
+                "ON CONFLICT DO NOTHING"
+            ),
+            {
+                "result_day": db.business_day(),
+                "task_ids": task_ids,
+                "threshold": int(completion * 1000),
+            }
+        )
+        await session.commit()
+
+
+def due_events(scheduler: AsyncIOScheduler, now: datetime) -> list:
+    """Vaqti kelgan vazifa hodisalari joblarini olib tashlab, (task_id, event) qaytarish"""
+    now = helpers.get_timezone().localize(now)
+    events = []
+    for job in scheduler.get_jobs():
+        if job.func is task_scheduler.run_task_event and job.next_run_time <= now:
+            _, task_id, event = job.args
+            events.append((task_id, event))
+            job.remove()
+    return events
+
+
+async def simulate_day(args, bot: RecordingBot, clock: SimulatedClock, scheduler) -> tuple:
+    counter = QueryCounter()
+    reset_at = (DAILY_RESET_HOUR, DAILY_RESET_MINUTE)
+    lag = timedelta(minutes=args.event_lag)
+    ticks = []
+    processed = set()
+
+    with count_queries("postgres", counter):
+        for _ in range(int(timedelta(days=1) / TICK)):
+            clock.advance(TICK)
+            now = clock()
+            counter.reset()
+            sent_before = len(bot.sent)
+            started = time.perf_counter()
+
+            # Avval rejalashtirish (shu daqiqadagi hodisalar ham qayta qo'shiladi),
+            # keyin vaqti kelgan hodisalar - har biri bir marta bajariladi
+            if (now.hour, now.minute) == reset_at:
+                await task_scheduler.reset_daily_results(bot)
+            if now.minute % task_scheduler.SYNC_INTERVAL_MINUTES == 0:
+                await task_scheduler.sync_task_events()
+            events = due_events(scheduler, now - lag)
+            processed.update(events)
+            if events:
+                await task_scheduler.process_task_events(bot, events)
+            await outbox.drain_outbox_job(bot)
+
+            elapsed = time.perf_counter() - started
+            ticks.append({
+                "time": now.strftime("%H:%M"),
+                "events": len(events),
+                "wall_s": elapsed,
+                "queries": counter.count,
+                "messages": len(bot.sent) - sent_before,
+            })
+
+            await submit_results(
+                [task_id for task_id, event in events if event == "task_started"],
+                args.completion
+            )
+
+    # Kechikish tufayli kun oxirida hali navbatda turgan hodisalar yo'qolmagan
+    processed.update(due_events(scheduler, clock()))
+    return ticks, processed
+
+
+def report(ticks: list, budget: float, lost: list) -> bool:
+    busy = [t for t in ticks if t["events"] or t["messages"]]
+    print(f"\nHodisali tiklar ({len(busy)} / {len(ticks)}):")
+    print_table(
+        ["time", "events", "wall_ms", "queries", "messages"],
+        [[t["time"], t["events"], round(t["wall_s"] * 1000, 1), t["queries"], t["messages"]]
+         for t in busy]
+    )
+
+    walls = sorted(t["wall_s"] for t in ticks)
+    over = [t for t in ticks if t["wall_s"] > budget]
+    print()
+    print(f"{'ticks':<18}{len(ticks)}")
+    print(f"{'max_tick_s':<18}{walls[-1]:.3f}")
+    print(f"{'p95_tick_s':<18}{walls[int(len(walls) * 0.95)]:.3f}")
+    print(f"{'mean_tick_s':<18}{statistics.mean(walls):.3f}")
+    print(f"{'queries':<18}{sum(t['queries'] for t in ticks)}")
+    print(f"{'messages':<18}{sum(t['messages'] for t in ticks)}")
+    print(f"{'over_budget':<18}{len(over)} (> {budget:.0f} s)")
+    for t in over:
+        print(f"   ❌ {t['time']}: {t['wall_s']:.1f} s, {t['events']} hodisa, {t['messages']} xabar")
+    print(f"{'lost_events':<18}{len(lost)}")
+    for task_id, event in lost[:20]:
+        print(f"   ❌ task {task_id}: {event}")
+    return not over and not lost
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--branches", type=int, default=100)
+    parser.add_argument("--employees", type=int, default=20, help="filial boshiga xodimlar")
+    parser.add_argument("--tasks", type=int, default=50, help="faol vazifalar")
+    parser.add_argument("--completion", type=float, default=0.5,
+                        help="vazifa boshlangach natija yuboradigan xodimlar ulushi")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--budget", type=float, default=TICK_BUDGET, help="tik uchun limit (s)")
+    parser.add_argument("--event-lag", type=int, default=0,
+                        help="vaqti kelgan hodisalar shuncha daqiqa kechikib bajariladi")
+    parser.add_argument("--real-rate-limits", action="store_true",
+                        help="broadcaster ning Telegram tezlik cheklovlarini saqlash")
+    args = parser.parse_args()
+
+    # Telegram tezlik cheklovlari soxta Bot uchun o'lchovni buzadi
+    if not args.real_rate_limits:
+        broadcaster.bucket = TokenBucket(1_000_000)
+        broadcaster.per_chat_interval = 0
+
+    day = datetime.combine(helpers.now().date(), datetime.min.time())
+    clock = SimulatedClock(day)
+    helpers.set_clock(clock)
+    bot = RecordingBot(clock)
+
+    await db.init_db()
+    scheduler = AsyncIOScheduler(timezone=helpers.get_timezone())
+    try:
+        employees, task_ids = await seed(args.branches, args.employees, args.tasks, day, random.Random(args.seed))
+        print(f"{args.branches} filial, {employees} xodim, {args.tasks} vazifa; "
+              f"kun: {day:%Y-%m-%d}")
+
+        # Joblar ishga tushmaydi - hodisalar simulyatsiya soatiga ko'ra shu yerdan beriladi
+        scheduler.start(paused=True)
+        await task_scheduler.setup_scheduler(scheduler, bot)
+
+        ticks, processed = await simulate_day(args, bot, clock, scheduler)
+        # Barcha vazifalar hodisalari shu kun ichida (23:55 gacha) yuz beradi
+        expected = {(task_id, event) for task_id in task_ids for event in task_scheduler.TASK_EVENTS}
+        ok = report(ticks, args.budget, sorted(expected - processed))
+    finally:
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+        helpers.set_clock(None)
+        await db.close_db()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
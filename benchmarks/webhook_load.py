@@ -0,0 +1,204 @@
+"""
+Webhook rejimi uchun soxta Telegram harness: update kechikishi va o'tkazuvchanlik.
+
+Harness ikki narsani bajaradi:
+    • soxta Bot API server - bot yuborgan sendMessage va boshqa so'rovlarga
+      javob beradi va ularni qabul qilingan vaqti bilan yozib boradi
+    • soxta Telegram - webhook manziliga sintetik /start updatelarini
+      secret token bilan POST qiladi
+
+Kechikish = update POST qilingandan bot o'sha chatga birinchi javob
+yuborguncha o'tgan vaqt (webhook -> middleware -> handler -> Bot API).
+
+Ishga tushirish (ikki terminalda):
+    python -m benchmarks.webhook_load --api-port 8081 ...          # avval harness
+    BOT_MODE=webhook WEBHOOK_SECRET=bench TELEGRAM_API_URL=http://127.0.0.1:8081 \\
+        python main.py                                             # keyin bot
+
+Harness bot webhook manziliga javob bera boshlaguncha kutadi.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+from aiohttp import ClientSession, ClientError, web
+
+# Sintetik foydalanuvchilar shu ID dan boshlanadi (haqiqiy ID lar bilan to'qnashmasligi uchun)
+FIRST_USER_ID = 9_000_000_000
+
+
+class FakeTelegramAPI:
+    """Bot API so'rovlarini qabul qiluvchi soxta server"""
+
+    def __init__(self):
+        self._message_ids = itertools.count(1)
+        self._waiters = {}
+        self.calls = 0
+
+    def expect(self, chat_id: int) -> asyncio.Future:
+        """Shu chatga keyingi javob kelgan vaqtni kutish"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id] = future
+        return future
+
+    def is_waiting(self, chat_id: int) -> bool:
+        return chat_id in self._waiters
+
+    def cancel(self, chat_id: int):
+        self._waiters.pop(chat_id, None)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        payload = dict(await request.post()) if request.can_read_body else {}
+        self.calls += 1
+
+        if method == "getme":
+            result = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method in ("sendmessage", "editmessagetext", "sendphoto"):
+            chat_id = int(payload.get("chat_id", 0))
+            waiter = self._waiters.pop(chat_id, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(time.perf_counter())
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": payload.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, host: str, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": f"Bench{user_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}]
+            if text.startswith("/") else [],
+        },
+    }
+
+
+async def wait_for_webhook(http: ClientSession, url: str, secret: str, timeout: float = 120):
+    """Bot webhook serveri ishga tushguncha kutish"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with http.post(url, json={"update_id": 0}, headers={
+                "X-Telegram-Bot-Api-Secret-Token": secret
+            }) as resp:
+                if resp.status < 500:
+                    return
+        except ClientError:
+            pass
+        await asyncio.sleep(1)
+    raise TimeoutError(f"Webhook {url} javob bermadi")
+
+
+async def run_load(args, api: FakeTelegramAPI) -> dict:
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    rejected = 0
+    timed_out = 0
+
+    async with ClientSession() as http:
+        await wait_for_webhook(http, args.webhook_url, args.secret)
+
+        # Noto'g'ri secret rad etilishini tekshirish
+        async with http.post(args.webhook_url, json=make_update(1, FIRST_USER_ID, "/start"),
+                             headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}) as resp:
+            secret_checked = resp.status == 401
+
+        async def send_one(n: int):
+            nonlocal rejected, timed_out
+            user_id = FIRST_USER_ID + n % args.users
+            async with semaphore:
+                # Bitta chatga parallel javoblar aralashmasligi uchun navbat bilan
+                while api.is_waiting(user_id):
+                    await asyncio.sleep(0.001)
+                reply = api.expect(user_id)
+                started = time.perf_counter()
+                async with http.post(args.webhook_url, json=make_update(n + 2, user_id, args.text),
+                                     headers=headers) as resp:
+                    if resp.status != 200:
+                        rejected += 1
+                        api.cancel(user_id)
+                        return
+                try:
+                    replied = await asyncio.wait_for(reply, args.timeout)
+                    latencies.append((replied - started) * 1000)
+                except asyncio.TimeoutError:
+                    api.cancel(user_id)
+                    timed_out += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send_one(n) for n in range(args.updates)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else "-"
+
+    return {
+        "updates": args.updates,
+        "answered": len(latencies),
+        "rejected": rejected,
+        "timed_out": timed_out,
+        "secret_checked": secret_checked,
+        "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(statistics.mean(latencies), 2) if latencies else "-",
+        "api_calls": api.calls,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--webhook-url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", default="bench")
+    parser.add_argument("--api-host", default="127.0.0.1")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--updates", type=int, default=1000, help="jami updatelar soni")
+    parser.add_argument("--users", type=int, default=200, help="sintetik foydalanuvchilar soni")
+    parser.add_argument("--concurrency", type=int, default=50, help="parallel POST lar soni")
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--timeout", type=float, default=10.0, help="javob kutish (soniya)")
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI()
+    runner = await api.start(args.api_host, args.api_port)
+    print(f"Soxta Bot API: http://{args.api_host}:{args.api_port}")
+    print(f"Webhook kutilmoqda: {args.webhook_url}")
+    try:
+        result = await run_load(args, api)
+    finally:
+        await runner.cleanup()
+
+    print()
+    for key, value in result.items():
+        print(f"{key:<18}{value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
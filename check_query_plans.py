@@ -0,0 +1,105 @@
+"""
+Asosiy so'rovlar kerakli indekslardan foydalanishini tekshirish (EXPLAIN).
+
+Kichik jadvallarda planner baribir Seq Scan tanlaydi, shuning uchun
+enable_seqscan o'chiriladi - tekshiruv "indeks so'rov shakliga mosmi"
+degan savolga javob beradi. Xato bo'lsa 1 kodi bilan chiqadi.
+
+Ishga tushirish:
+    python check_query_plans.py
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sqlalchemy import text  # noqa: E402
+
+from database import db_postgres  # noqa: E402
+
+# (nomi, so'rov, kutilgan indeks - regex; kunlik bo'laklarda indeks nomi
+# "<bo'lak>_<ustunlar>_idx" ko'rinishida avtomatik yaratiladi)
+HOT_QUERIES = [
+    (
+        "get_task_result",
+        "SELECT id FROM task_results WHERE task_id = 1 AND employee_id = 1",
+        r"^uq_task_employee$|_task_id_employee_id_result_day_key$",
+    ),
+    (
+        "employee results (CASCADE)",
+        "SELECT id FROM task_results WHERE employee_id = 1",
+        r"^ix_task_results_employee_task$|_employee_id_task_id_idx$",
+    ),
+    (
+        "has_branch_completion",
+        "SELECT count(*) FROM task_results r JOIN employees e ON e.id = r.employee_id "
+        "WHERE r.task_id = 1 AND e.branch_id = 1 AND e.is_active AND e.shift = 'kunduzgi'",
+        r"^ix_employees_branch_shift_active$",
+    ),
+    (
+        "get_employees_by_branch",
+        "SELECT id FROM employees WHERE branch_id = 1 AND shift = 'kunduzgi' AND is_active",
+        r"^ix_employees_branch_shift_active$",
+    ),
+    (
+        "get_daily_tasks",
+        "SELECT id FROM tasks WHERE task_type = 'har_kunlik' AND is_active",
+        r"^ix_tasks_type_active$",
+    ),
+    (
+        "branch tasks",
+        "SELECT task_id FROM task_branches WHERE branch_id = 1",
+        r"^ix_task_branches_branch$",
+    ),
+    (
+        "get_employees_for_task",
+        "SELECT employee_id FROM task_audience WHERE task_id = 1",
+        r"^task_audience_pkey$",
+    ),
+    (
+        "get_employee_tasks",
+        "SELECT task_id FROM task_audience WHERE employee_id = 1",
+        r"^ix_task_audience_employee_id$",
+    ),
+]
+
+
+def _plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+async def check() -> bool:
+    ok = True
+    async with db_postgres.engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        for name, query, expected in HOT_QUERIES:
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"))
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(_plan_nodes(plan[0]["Plan"]))
+            indexes = {n["Index Name"] for n in nodes if "Index Name" in n}
+            seq_scans = {n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}
+
+            passed = not seq_scans and any(re.search(expected, index) for index in indexes)
+            ok = ok and passed
+            print(f"{'✅' if passed else '❌'} {name:<28} {', '.join(sorted(indexes)) or '-'}"
+                  + (f"  (Seq Scan: {', '.join(sorted(seq_scans))})" if seq_scans else ""))
+    return ok
+
+
+async def main():
+    await db_postgres.init_db()
+    try:
+        ok = await check()
+    finally:
+        await db_postgres.close_db()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
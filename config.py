@@ -116,6 +116,121 @@ RESULT_TYPES = {
     "rasm": "📷 Rasm"
 }
 
+# ============================================================
+# BROADCAST - Telegram tezlik cheklovlari
+# ============================================================
+# Umumiy limit: ~30 xabar/soniya
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+# Bir vaqtda parallel yuborishlar soni
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+# Tarmoq xatolarida qayta urinishlar soni
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+
+# ============================================================
+# NOTIFICATION OUTBOX
+# ============================================================
+# Bir marta olinadigan xabarlar soni
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+# Maksimal urinishlar soni (keyin 'failed')
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+# Navbatni tekshirish oralig'i (soniya)
+OUTBOX_POLL_SECONDS = int(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+
+# ============================================================
+# UNIT OF WORK - har bir update uchun bitta DB sessiyasi
+# ============================================================
+# true - update ichidagi barcha DB chaqiruvlari bitta ulanish va bitta COMMIT bilan
+# (COMMIT birinchi Bot API so'rovidan oldin - ulanish Telegram javobini kutmaydi)
+DB_UNIT_OF_WORK = os.getenv("DB_UNIT_OF_WORK", "true").lower() in ("true", "1", "yes")
+
+# Bir vaqtdagi bir xil o'qishlarni (get_task, get_branch) bitta so'rovga birlashtirish
+DB_LOADER_ENABLED = os.getenv("DB_LOADER_ENABLED", "true").lower() in ("true", "1", "yes")
+
+# ============================================================
+# EMPLOYEE CACHE - telegram_id bo'yicha xodim keshi
+# ============================================================
+# Keshdagi maksimal xodimlar soni (0 - kesh o'chirilgan)
+EMPLOYEE_CACHE_SIZE = int(os.getenv("EMPLOYEE_CACHE_SIZE", "10000"))
+# Yozuv amal qilish muddati (soniya)
+EMPLOYEE_CACHE_TTL = int(os.getenv("EMPLOYEE_CACHE_TTL", "300"))
+
+# ============================================================
+# PHOTO FILTER - check_photo_used oldidagi Bloom filter
+# ============================================================
+PHOTO_FILTER_ENABLED = os.getenv("PHOTO_FILTER_ENABLED", "true").lower() in ("true", "1", "yes")
+# Maqsadli false-positive ehtimoli (faqat bazaga ortiqcha so'rov - xato emas)
+PHOTO_FILTER_FP_RATE = float(os.getenv("PHOTO_FILTER_FP_RATE", "0.001"))
+# Minimal sig'im (ishga tushganda used_photos hajmining 2 barobariga kengaytiriladi)
+PHOTO_FILTER_MIN_CAPACITY = int(os.getenv("PHOTO_FILTER_MIN_CAPACITY", "100000"))
+# Boshqa jarayonlar qo'shgan rasmlarni olish oralig'i (soniya)
+PHOTO_FILTER_REFRESH_SECONDS = float(os.getenv("PHOTO_FILTER_REFRESH_SECONDS", "5"))
+
+# ============================================================
+# QUERY PROFILER - SQL so'rovlar profili va N+1 detektori
+# ============================================================
+# true - har bir update / scheduler job uchun so'rovlar yig'iladi (faqat PostgreSQL)
+QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "false").lower() in ("true", "1", "yes")
+# Bitta update / job ichida bir xil so'rov shundan ko'p bajarilsa - N+1 deb belgilanadi
+QUERY_PROFILER_REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILER_REPEAT_THRESHOLD", "10"))
+# Shundan uzoq davom etgan so'rovlar sekin so'rovlar logiga yoziladi (ms)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Sekin so'rovlar va N+1 ogohlantirishlari uchun alohida log fayl
+SLOW_QUERY_LOG_FILE = os.getenv(
+    "SLOW_QUERY_LOG_FILE", str(Path(LOG_FILE).with_name("slow_queries.log"))
+)
+
+# ============================================================
+# FSM STORAGE - foydalanuvchi holatlari (wizard, natija yuborish)
+# ============================================================
+# postgres - bazada saqlanadi (qayta ishga tushishda yo'qolmaydi), memory - xotirada
+FSM_STORAGE = os.getenv("FSM_STORAGE", "postgres")
+# Shuncha soat o'zgarmagan holatlar eskirgan hisoblanadi va o'chiriladi
+FSM_STATE_TTL_HOURS = int(os.getenv("FSM_STATE_TTL_HOURS", "24"))
+
+# ============================================================
+# SCHEDULER LEADER ELECTION - bir nechta replika uchun
+# ============================================================
+# Scheduler faqat shu advisory lock ni ushlagan jarayonda ishlaydi
+SCHEDULER_LOCK_KEY = int(os.getenv("SCHEDULER_LOCK_KEY", "7310001"))
+# Yetakchi bo'lmagan replikalar qulfni necha soniyada bir tekshiradi
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+# Yetakchi ulanishini tekshirish oralig'i (soniya)
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "5"))
+
+# ============================================================
+# KUNLIK QAYTA TIKLASH - natijalar kunlik bo'laklarga ajratiladi
+# ============================================================
+# Shu vaqtda (Tashkent) kechagi natijalar va bildirishnomalar tarixga o'tadi
+DAILY_RESET_HOUR = 1
+DAILY_RESET_MINUTE = 20
+# Tarix necha kun saqlanadi (0 - cheksiz)
+RESULTS_HISTORY_DAYS = int(os.getenv("RESULTS_HISTORY_DAYS", "365"))
+
+# ============================================================
+# BOT MODE - polling yoki webhook
+# ============================================================
+# polling - long polling (standart), webhook - aiohttp server orqali
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+# Telegram webhook yuboradigan ochiq manzil (masalan, https://bot.example.com).
+# Bo'sh bo'lsa set_webhook chaqirilmaydi (reverse proxy ortidagi qo'shimcha workerlar uchun)
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+# X-Telegram-Bot-Api-Secret-Token sarlavhasi - barcha workerlarda bir xil bo'lishi kerak
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+# Telegram Bot API manzili (local Bot API server yoki test harness uchun)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+if BOT_MODE not in ("polling", "webhook"):
+    print(f"❌ XATOLIK: BOT_MODE noto'g'ri: {BOT_MODE} (polling yoki webhook)")
+    sys.exit(1)
+
+if BOT_MODE == "webhook" and not WEBHOOK_SECRET:
+    print("❌ XATOLIK: webhook rejimida WEBHOOK_SECRET environment variable kerak!")
+    sys.exit(1)
+
 # ============================================================
 # DEBUG MODE
 # ============================================================
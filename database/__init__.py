@@ -65,8 +65,20 @@ get_all_task_results = _db_module.get_all_task_results
 get_task_result_by_id = _db_module.get_task_result_by_id
 check_notification_sent = _db_module.check_notification_sent
 mark_notification_sent = _db_module.mark_notification_sent
+mark_notifications_sent = _db_module.mark_notifications_sent
 clear_task_notifications = _db_module.clear_task_notifications
 clear_all_notifications = _db_module.clear_all_notifications
 clear_all_task_results = _db_module.clear_all_task_results
 clear_all_used_photos = _db_module.clear_all_used_photos
 has_branch_completion = _db_module.has_branch_completion
+enqueue_notifications = _db_module.enqueue_notifications
+claim_outbox_batch = _db_module.claim_outbox_batch
+mark_outbox_sent = _db_module.mark_outbox_sent
+mark_outbox_failed = _db_module.mark_outbox_failed
+get_notification_snapshot = _db_module.get_notification_snapshot
+
+# Faqat PostgreSQL da mavjud funksiyalar
+if DATABASE_TYPE == "postgresql":
+    get_employee_cache_stats = _db_module.get_employee_cache_stats
+    get_photo_filter_stats = _db_module.get_photo_filter_stats
+    get_loader_stats = _db_module.get_loader_stats
@@ -0,0 +1,168 @@
+"""
+In-process kesh (LRU + TTL) va Bloom filter
+
+Tez-tez o'qiladigan, kam o'zgaradigan ma'lumotlar uchun (masalan, har bir
+update da so'raladigan xodim). Yozish funksiyalari tegishli yozuvlarni
+invalidate qiladi.
+
+Bloom filter faqat qo'shiladigan to'plamlar uchun (used_photos):
+"yo'q" javobi bazaga so'rovsiz qaytadi.
+"""
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from config import (
+    EMPLOYEE_CACHE_SIZE, EMPLOYEE_CACHE_TTL, PHOTO_FILTER_MIN_CAPACITY, PHOTO_FILTER_FP_RATE
+)
+
+
+class TTLCache:
+    """Hajmi cheklangan (LRU) va muddatli (TTL) kesh.
+    hits/misses hisoblagichlari keshning DB yukini qancha kamaytirganini ko'rsatadi.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Har invalidatsiyada oshadi - eski o'qish natijasi keshga yozilmasligi uchun
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Qiymatni saqlash. generation berilsa va o'qish paytidan beri
+        invalidatsiya bo'lgan bo'lsa - saqlanmaydi.
+        """
+        if self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]):
+        """Shartga mos barcha yozuvlarni o'chirish"""
+        self.generation += 1
+        for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+            del self._data[key]
+
+    def clear(self):
+        self.generation += 1
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# Faol xodimlar: telegram_id -> xodim (branch_name bilan)
+employee_cache = TTLCache(EMPLOYEE_CACHE_SIZE, EMPLOYEE_CACHE_TTL)
+
+
+class BloomFilter:
+    """Ehtimoliy to'plam (Bloom filter).
+    might_contain() False qaytarsa - element aniq yo'q; True - ehtimol bor
+    (bazada tekshirish kerak). Element o'chirib bo'lmaydi - faqat qayta qurish.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.fp_rate = fp_rate
+        self.ready = False
+        self.reset(capacity)
+
+    def reset(self, capacity: int):
+        """Filtrni bo'shatib, berilgan sig'imga qayta o'lchash"""
+        self.capacity = max(int(capacity), 1)
+        # m = -n*ln(p) / ln(2)^2, k = m/n * ln(2)
+        self.num_bits = max(
+            int(-self.capacity * math.log(self.fp_rate) / (math.log(2) ** 2)), 8
+        )
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.checks = 0
+        self.negatives = 0
+        self.false_positives = 0
+
+    def _hashes(self, item: str):
+        # Ikki xeshdan k ta pozitsiya: h1 + i*h2 (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, item: str):
+        self.update((item,))
+
+    def update(self, items: Iterable[str]):
+        """Ko'p elementni qo'shish (yuklash uchun - tsikl ichida atribut o'qilmaydi)"""
+        bits, m, k, hashes = self._bits, self.num_bits, self.num_hashes, self._hashes
+        added = 0
+        for item in items:
+            h1, h2 = hashes(item)
+            for _ in range(k):
+                pos = h1 % m
+                bits[pos >> 3] |= 1 << (pos & 7)
+                h1 += h2
+            added += 1
+        self.count += added
+
+    def might_contain(self, item: str) -> bool:
+        self.checks += 1
+        bits, m = self._bits, self.num_bits
+        h1, h2 = self._hashes(item)
+        for _ in range(self.num_hashes):
+            pos = h1 % m
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                self.negatives += 1
+                return False
+            h1 += h2
+        return True
+
+    def expected_fp_rate(self) -> float:
+        """Joriy elementlar soni uchun nazariy false-positive ehtimoli"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def stats(self) -> dict:
+        positives = self.checks - self.negatives
+        return {
+            "ready": self.ready,
+            "items": self.count,
+            "capacity": self.capacity,
+            "size_mb": round(len(self._bits) / 1024 / 1024, 2),
+            "hashes": self.num_hashes,
+            "expected_fp_rate": round(self.expected_fp_rate(), 6),
+            "checks": self.checks,
+            "db_skipped": self.negatives,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": round(self.false_positives / positives, 6) if positives else 0.0,
+        }
+
+
+# Ishlatilgan rasmlar (file_unique_id) - used_photos dan ishga tushganda yuklanadi
+photo_filter = BloomFilter(PHOTO_FILTER_MIN_CAPACITY, PHOTO_FILTER_FP_RATE)
@@ -3,7 +3,7 @@ Ma'lumotlar bazasi bilan ishlash uchun barcha funksiyalar
 Connection pool va xatolarni tutish bilan
 """
 import aiosqlite
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List, Tuple
 import os
 import logging
@@ -169,6 +169,25 @@ async def init_db():
             )
         """)
 
+        # Yuborilishi kerak bo'lgan bildirishnomalar navbati (outbox)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL,
+                employee_id INTEGER NOT NULL,
+                notification_type TEXT NOT NULL,
+                chat_id INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TIMESTAMP NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                sent_at TIMESTAMP,
+                UNIQUE(task_id, employee_id, notification_type, chat_id)
+            )
+        """)
+
         # Indekslar
         await db.execute("CREATE INDEX IF NOT EXISTS idx_employees_telegram_id ON employees(telegram_id)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_employees_branch_id ON employees(branch_id)")
@@ -176,6 +195,7 @@ async def init_db():
         await db.execute("CREATE INDEX IF NOT EXISTS idx_task_branches_task_id ON task_branches(task_id)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_task_results_task_id ON task_results(task_id)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_sent_notifications ON sent_notifications(task_id, employee_id, notification_type)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox(status, next_attempt_at)")
 
         await db.commit()
         logger.info("✅ Database initialized successfully")
@@ -972,6 +992,77 @@ async def _ensure_notifications_table():
         await db.commit()
 
 
+async def get_notification_snapshot(task_ids: list = None) -> dict:
+    """Scheduler uchun bildirishnoma holatini to'plam so'rovlari bilan olish
+    (db_postgres.get_notification_snapshot bilan bir xil shakl).
+    task_ids berilmasa - barcha faol vazifalar.
+    """
+    import re
+
+    def extract_number(name: str) -> int:
+        numbers = re.findall(r'\d+', name)
+        return int(numbers[0]) if numbers else 999999
+
+    snapshot = {"tasks": {}, "employees": {}, "results": {}, "sent": set()}
+
+    await _ensure_notifications_table()
+    async with get_db() as db:
+        query = "SELECT * FROM tasks WHERE is_active = 1"
+        params = []
+        if task_ids is not None:
+            if not task_ids:
+                return snapshot
+            query += f" AND id IN ({','.join('?' * len(task_ids))})"
+            params = list(task_ids)
+        cursor = await db.execute(query, params)
+        for row in await cursor.fetchall():
+            snapshot["tasks"][row['id']] = dict(row)
+            snapshot["employees"][row['id']] = []
+            snapshot["results"][row['id']] = {}
+
+        ids = list(snapshot["tasks"])
+        if not ids:
+            return snapshot
+        placeholders = ','.join('?' * len(ids))
+
+        # Vazifaga tegishli faol xodimlar (smena mosligi bilan)
+        cursor = await db.execute(
+            f"""SELECT tb.task_id, e.*, b.name as branch_name
+                FROM task_branches tb
+                JOIN tasks t ON t.id = tb.task_id
+                JOIN employees e ON e.branch_id = tb.branch_id
+                JOIN branches b ON b.id = e.branch_id
+                WHERE tb.task_id IN ({placeholders})
+                  AND e.is_active = 1
+                  AND (t.shift = 'hammasi' OR e.shift = t.shift)""",
+            ids
+        )
+        rows = [dict(row) for row in await cursor.fetchall()]
+        rows.sort(key=lambda r: (extract_number(r['branch_name']), r['branch_name'], r['id']))
+        for row in rows:
+            snapshot["employees"][row.pop('task_id')].append(row)
+
+        cursor = await db.execute(
+            f"""SELECT task_id, employee_id, is_late FROM task_results
+                WHERE task_id IN ({placeholders})""",
+            ids
+        )
+        for row in await cursor.fetchall():
+            snapshot["results"][row['task_id']][row['employee_id']] = int(bool(row['is_late']))
+
+        cursor = await db.execute(
+            f"""SELECT task_id, employee_id, notification_type FROM sent_notifications
+                WHERE task_id IN ({placeholders})
+                UNION
+                SELECT task_id, employee_id, notification_type FROM notification_outbox
+                WHERE task_id IN ({placeholders})""",
+            ids + ids
+        )
+        snapshot["sent"] = {tuple(row) for row in await cursor.fetchall()}
+
+    return snapshot
+
+
 async def check_notification_sent(task_id: int, employee_id: int, notification_type: str) -> bool:
     """Bildirishnoma yuborilganligini tekshirish"""
     try:
@@ -1006,6 +1097,28 @@ async def mark_notification_sent(task_id: int, employee_id: int, notification_ty
         return False
 
 
+async def mark_notifications_sent(rows: list) -> list:
+    """Bildirishnomalarni yuborilgan deb belgilash (bitta tranzaksiya).
+    Faqat yangi belgilangan (task_id, employee_id, notification_type) kalitlar qaytariladi.
+    """
+    if not rows:
+        return []
+    await _ensure_notifications_table()
+    inserted = []
+    async with get_db() as db:
+        for row in rows:
+            key = (row['task_id'], row['employee_id'], row['notification_type'])
+            cursor = await db.execute(
+                """INSERT OR IGNORE INTO sent_notifications (task_id, employee_id, notification_type)
+                   VALUES (?, ?, ?)""",
+                key
+            )
+            if cursor.rowcount:
+                inserted.append(key)
+        await db.commit()
+    return inserted
+
+
 async def clear_task_notifications(task_id: int) -> bool:
     """Vazifa bildirishnomalarini tozalash (kunlik vazifalar uchun)"""
     try:
@@ -1028,6 +1141,8 @@ async def clear_all_notifications() -> bool:
         await _ensure_notifications_table()
         async with get_db() as db:
             await db.execute("DELETE FROM sent_notifications")
+            # Kechagi navbat ham tozalanadi - har kunlik vazifalar qayta yuborilishi uchun
+            await db.execute("DELETE FROM notification_outbox")
             await db.commit()
             logger.info("✅ Barcha bildirishnomalar tozalandi")
             return True
@@ -1036,6 +1151,122 @@ async def clear_all_notifications() -> bool:
         return False
 
 
+# ============== NOTIFICATION OUTBOX ==============
+
+def _outbox_time(value: datetime = None) -> str:
+    """Outbox vaqtlari - Tashkent vaqti, matn sifatida (leksik tartib = vaqt tartibi)"""
+    if value is None:
+        from utils import helpers
+        value = helpers.now()
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def enqueue_notifications(rows: list) -> list:
+    """Bildirishnomalarni outbox ga qo'shish (bitta tranzaksiya).
+    Takroriy (allaqachon navbatda yoki yuborilgan) xabarlar e'tiborsiz qoldiriladi.
+    Faqat yangi qo'shilgan qatorlar qaytariladi.
+    """
+    if not rows:
+        return []
+    now = _outbox_time()
+    inserted = []
+    async with get_db() as db:
+        for row in rows:
+            cursor = await db.execute(
+                """INSERT OR IGNORE INTO notification_outbox
+                   (task_id, employee_id, notification_type, chat_id, text, next_attempt_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (row['task_id'], row['employee_id'], row['notification_type'],
+                 row['chat_id'], row['text'], now)
+            )
+            if cursor.rowcount:
+                inserted.append({
+                    'id': cursor.lastrowid,
+                    'task_id': row['task_id'],
+                    'employee_id': row['employee_id'],
+                    'notification_type': row['notification_type'],
+                })
+        await db.commit()
+    return inserted
+
+
+async def claim_outbox_batch(limit: int = 100, lease_seconds: int = 120) -> list:
+    """Yuborish uchun navbatdagi xabarlarni band qilish.
+    SQLite bitta jarayonda ishlaydi - drainerlar outbox._drain_lock bilan navbatlanadi.
+    'sending' holatida qolib ketgan xabarlar lease tugagach qayta olinadi.
+    """
+    from utils import helpers
+    now = helpers.now()
+    async with get_db() as db:
+        cursor = await db.execute(
+            """SELECT id FROM notification_outbox
+               WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+               ORDER BY id LIMIT ?""",
+            (_outbox_time(now), limit)
+        )
+        ids = [row['id'] for row in await cursor.fetchall()]
+        if not ids:
+            return []
+
+        placeholders = ','.join('?' * len(ids))
+        await db.execute(
+            f"""UPDATE notification_outbox
+                SET status = 'sending', attempts = attempts + 1, next_attempt_at = ?
+                WHERE id IN ({placeholders})""",
+            (_outbox_time(now + timedelta(seconds=lease_seconds)), *ids)
+        )
+        cursor = await db.execute(
+            f"""SELECT id, chat_id, text, attempts FROM notification_outbox
+                WHERE id IN ({placeholders}) ORDER BY id""",
+            ids
+        )
+        batch = [dict(row) for row in await cursor.fetchall()]
+        await db.commit()
+    return batch
+
+
+async def mark_outbox_sent(outbox_ids: list) -> int:
+    """Yuborilgan xabarlarni belgilash"""
+    if not outbox_ids:
+        return 0
+    placeholders = ','.join('?' * len(outbox_ids))
+    async with get_db() as db:
+        cursor = await db.execute(
+            f"""UPDATE notification_outbox
+                SET status = 'sent', sent_at = ?, last_error = NULL
+                WHERE id IN ({placeholders})""",
+            (_outbox_time(), *outbox_ids)
+        )
+        await db.commit()
+        return cursor.rowcount
+
+
+async def mark_outbox_failed(failures: list) -> int:
+    """Yuborilmagan xabarlarni qayta urinishga qo'yish.
+    failures: id, error, retry_at (None bo'lsa - butunlay 'failed').
+    """
+    if not failures:
+        return 0
+    now = _outbox_time()
+    async with get_db() as db:
+        await db.executemany(
+            """UPDATE notification_outbox
+               SET status = ?, next_attempt_at = ?, last_error = ?
+               WHERE id = ?""",
+            [
+                (
+                    'pending' if item.get('retry_at') else 'failed',
+                    _outbox_time(item['retry_at']) if item.get('retry_at') else now,
+                    item.get('error'),
+                    item['id'],
+                )
+                for item in failures
+            ]
+        )
+        await db.commit()
+    return len(failures)
+
+
 async def clear_all_task_results() -> bool:
     """Barcha vazifa natijalarini tozalash (kunlik qayta tiklash uchun)"""
     try:
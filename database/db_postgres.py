@@ -5,34 +5,72 @@ Async support with asyncpg
 MUHIM: Barcha vaqtlar NAIVE datetime sifatida saqlanadi.
 Barcha vaqtlar Tashkent mahalliy vaqtini ifodalaydi.
 """
+import asyncio
+import os
 import re
+import time
 import logging
 import pytz
-from datetime import datetime
-from typing import Optional, List, Tuple
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional, List, Tuple
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy.ext.asyncio import (
     create_async_engine, AsyncSession, async_sessionmaker
 )
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy import (
-    Column, Integer, BigInteger, String, Text, DateTime,
-    Boolean, ForeignKey, UniqueConstraint,
-    select, delete, update, func
+    Column, Integer, BigInteger, String, Text, DateTime, Date, Table,
+    Boolean, ForeignKey, UniqueConstraint, Index,
+    select, delete, update, func, text
 )
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 
-from config import DATABASE_URL, TIMEZONE
+from config import (
+    DATABASE_URL, TIMEZONE, DAILY_RESET_HOUR, DAILY_RESET_MINUTE, RESULTS_HISTORY_DAYS,
+    PHOTO_FILTER_ENABLED, PHOTO_FILTER_MIN_CAPACITY, PHOTO_FILTER_REFRESH_SECONDS,
+    DB_LOADER_ENABLED, QUERY_PROFILER_ENABLED, QUERY_PROFILER_REPEAT_THRESHOLD, SLOW_QUERY_MS
+)
+from database import profiler
+from database.cache import employee_cache, photo_filter
+from database.loader import DataLoader
+from database.records import BranchRecord, EmployeeRecord, TaskRecord, TaskResultRecord
 
 logger = logging.getLogger(__name__)
 
 
 def _tashkent_now():
     """Hozirgi Tashkent vaqtini NAIVE datetime sifatida qaytarish.
-    DB default uchun ishlatiladi.
+    DB default uchun ishlatiladi. helpers.set_clock() soati shu yerga ham
+    ta'sir qiladi (simulyatsiyada ish kuni va vaqt belgilari bir xil bo'ladi).
     """
-    tz = pytz.timezone(TIMEZONE)
-    return datetime.now(tz).replace(tzinfo=None)
+    from utils import helpers
+    return helpers.now()
+
+
+# Shu vaqtgacha (01:20) yuborilgan natijalar oldingi ish kuniga tegishli
+_DAILY_RESET_OFFSET = timedelta(hours=DAILY_RESET_HOUR, minutes=DAILY_RESET_MINUTE)
+
+
+def business_day(now: datetime = None) -> date:
+    """Ish kuni: kunlik qayta tiklash vaqtigacha (01:20) oldingi kun hisoblanadi"""
+    now = now or _tashkent_now()
+    return (now - _DAILY_RESET_OFFSET).date()
+
+
+# business_day() ning SQL varianti (partition kaliti uchun server default).
+# Ilova yozuvlari kalitni business_day() dan aniq beradi - server soati faqat
+# kalit berilmagan qatorlar uchun
+_BUSINESS_DAY_SQL = text(
+    f"((now() AT TIME ZONE '{TIMEZONE}') "
+    f"- interval '{DAILY_RESET_HOUR} hours {DAILY_RESET_MINUTE} minutes')::date"
+)
 
 # SQLAlchemy Base
 Base = declarative_base()
@@ -134,19 +172,45 @@ class TaskBranch(Base):
     branch = relationship("Branch", back_populates="task_branches")
 
 
+class TaskAudience(Base):
+    """Vazifa auditoriyasi: vazifa filiallaridagi, smenasi mos faol xodimlar.
+    tasks / task_branches / employees dagi triggerlar orqali yangilanadi
+    (TASK AUDIENCE bo'limi), shuning uchun auditoriya bitta indeksli so'rov.
+    """
+    __tablename__ = "task_audience"
+
+    task_id = Column(
+        Integer,
+        ForeignKey("tasks.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    employee_id = Column(
+        Integer,
+        ForeignKey("employees.id", ondelete="CASCADE"),
+        primary_key=True, index=True
+    )
+
+
 class TaskResult(Base):
+    """Vazifa natijalari - result_day bo'yicha kunlik bo'laklarga (partition) ajratilgan.
+    Kunlik qayta tiklashda eski bo'laklar task_results_history ga ko'chiriladi.
+    """
     __tablename__ = "task_results"
     __table_args__ = (
         UniqueConstraint(
-            'task_id', 'employee_id', name='uq_task_employee'
+            'task_id', 'employee_id', 'result_day', name='uq_task_employee'
         ),
+        {'postgresql_partition_by': 'RANGE (result_day)'},
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    # Partition kaliti - ish kuni (DAILY_RESET vaqtigacha oldingi kun)
+    result_day = Column(Date, primary_key=True, server_default=_BUSINESS_DAY_SQL)
+    # task_id bo'yicha qidiruv uq_task_employee prefiksidan foydalanadi
     task_id = Column(
         Integer,
         ForeignKey("tasks.id", ondelete="CASCADE"),
-        nullable=False, index=True
+        nullable=False
     )
     employee_id = Column(
         Integer,
@@ -163,6 +227,20 @@ class TaskResult(Base):
     employee = relationship("Employee", back_populates="task_results")
 
 
+class TaskResultCounter(Base):
+    """Vazifa bo'yicha yuborilgan natijalar hisoblagichi.
+    "N-bo'lib bajardingiz" o'rni COUNT(*) o'rniga atomik UPSERT orqali olinadi.
+    """
+    __tablename__ = "task_result_counters"
+
+    task_id = Column(
+        Integer,
+        ForeignKey("tasks.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    submitted = Column(Integer, nullable=False, default=0)
+
+
 class UsedPhoto(Base):
     __tablename__ = "used_photos"
 
@@ -180,12 +258,15 @@ class SentNotification(Base):
     __tablename__ = "sent_notifications"
     __table_args__ = (
         UniqueConstraint(
-            'task_id', 'employee_id', 'notification_type',
+            'task_id', 'employee_id', 'notification_type', 'notify_day',
             name='uq_notification'
         ),
+        {'postgresql_partition_by': 'RANGE (notify_day)'},
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    # Partition kaliti - ish kuni (task_results bilan bir xil)
+    notify_day = Column(Date, primary_key=True, server_default=_BUSINESS_DAY_SQL)
     task_id = Column(Integer, nullable=False, index=True)
     # ForeignKey yo'q - employee_id=0 admin uchun ishlatiladi
     employee_id = Column(Integer, nullable=False)
@@ -193,6 +274,347 @@ class SentNotification(Base):
     sent_at = Column(DateTime, default=_tashkent_now)
 
 
+class NotificationOutbox(Base):
+    """Yuborilishi kerak bo'lgan bildirishnomalar navbati (outbox).
+    Xabar avval shu jadvalga yoziladi, keyin drainer uni yuboradi.
+    employee_id=0 admin uchun ishlatiladi.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        UniqueConstraint(
+            'task_id', 'employee_id', 'notification_type', 'chat_id',
+            name='uq_outbox_message'
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False, index=True)
+    employee_id = Column(Integer, nullable=False)
+    notification_type = Column(String(100), nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    text = Column(Text, nullable=False)
+    # pending -> sending -> sent | failed
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=_tashkent_now)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=_tashkent_now)
+    sent_at = Column(DateTime, nullable=True)
+
+
+Index(
+    'ix_outbox_due', NotificationOutbox.next_attempt_at,
+    postgresql_where=NotificationOutbox.status.in_(('pending', 'sending'))
+)
+
+
+# So'rov shakllariga mos indekslar (migratsiya: 0002_query_indexes)
+Index('ix_task_results_employee_task', TaskResult.employee_id, TaskResult.task_id)
+Index(
+    'ix_employees_branch_shift_active', Employee.branch_id, Employee.shift,
+    postgresql_where=Employee.is_active == True  # noqa: E712
+)
+Index(
+    'ix_tasks_type_active', Task.task_type,
+    postgresql_where=Task.is_active == True  # noqa: E712
+)
+Index('ix_task_branches_branch', TaskBranch.branch_id)
+
+
+class FSMState(Base):
+    """aiogram FSM holati va ma'lumotlari.
+    Bot qayta ishga tushganda boshlangan jarayonlar yo'qolmasligi uchun.
+    """
+    __tablename__ = "fsm_states"
+
+    # StorageKey dan yasalgan kalit (bot:chat:user:thread:...)
+    key = Column(String(255), primary_key=True)
+    state = Column(String(255), nullable=True)
+    data = Column(JSONB, nullable=False, default=dict)
+    updated_at = Column(DateTime, nullable=False, default=_tashkent_now, index=True)
+
+
+# ============== DAILY PARTITIONS ==============
+
+# Kunlik bo'laklarga ajratilgan jadvallar: {jadval: partition kaliti}
+DAILY_PARTITIONED = {
+    TaskResult.__tablename__: "result_day",
+    SentNotification.__tablename__: "notify_day",
+}
+
+# Oldindan yaratiladigan kelgusi kunlar soni (qayta tiklash o'tkazib yuborilsa ham yetadi)
+PARTITION_DAYS_AHEAD = 3
+
+
+def _history_table(table: Table) -> Table:
+    """Tarix jadvali: ustunlar asosiy jadval bilan bir xil, cheklovlarsiz.
+    Ajratilgan kunlik bo'laklar shu jadvalga ulanadi.
+    """
+    return Table(
+        f"{table.name}_history", Base.metadata,
+        *(Column(col.name, col.type, nullable=col.nullable) for col in table.columns),
+        postgresql_partition_by=f"RANGE ({DAILY_PARTITIONED[table.name]})"
+    )
+
+
+task_results_history = _history_table(TaskResult.__table__)
+sent_notifications_history = _history_table(SentNotification.__table__)
+
+
+def _partition_name(table: str, day: date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def _partition_bounds(day: date) -> str:
+    return f"FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')"
+
+
+async def _lock_partitions(conn):
+    """Bo'laklarni boshqarish faqat bitta jarayonda (tranzaksiya oxirigacha)"""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('daily_partitions'))"))
+
+
+async def _list_partitions(conn, table: str) -> List[Tuple[str, date]]:
+    """Jadvalga ulangan kunlik bo'laklar: [(nom, kun), ...]"""
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table}
+    )
+    partitions = []
+    for (name,) in result.all():
+        match = re.fullmatch(rf"{table}_p(\d{{8}})", name)
+        if match:
+            partitions.append((name, datetime.strptime(match.group(1), "%Y%m%d").date()))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+async def create_daily_partitions(conn, today: date = None):
+    """Joriy va kelgusi PARTITION_DAYS_AHEAD kun uchun bo'laklarni yaratish"""
+    today = today or business_day()
+    await _lock_partitions(conn)
+    for table in DAILY_PARTITIONED:
+        for offset in range(PARTITION_DAYS_AHEAD + 1):
+            day = today + timedelta(days=offset)
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {_partition_name(table, day)} "
+                f"PARTITION OF {table} {_partition_bounds(day)}"
+            ))
+
+
+async def rotate_daily_partitions(table: str) -> int:
+    """Kunlik qayta tiklash: o'tgan kunlar bo'laklarini asosiy jadvaldan ajratib
+    (DETACH) tarix jadvaliga ulash (ATTACH). DELETE o'rniga faqat katalog o'zgarishi.
+    RESULTS_HISTORY_DAYS dan eski tarix bo'laklari o'chiriladi (DROP).
+    Ko'chirilgan bo'laklar sonini qaytaradi.
+    """
+    today = business_day()
+    history = f"{table}_history"
+    moved = 0
+
+    async with engine.begin() as conn:
+        await create_daily_partitions(conn, today)
+
+        for name, day in await _list_partitions(conn, table):
+            if day >= today:
+                continue
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            await conn.execute(text(
+                f"ALTER TABLE {history} ATTACH PARTITION {name} {_partition_bounds(day)}"
+            ))
+            moved += 1
+
+        if RESULTS_HISTORY_DAYS > 0:
+            cutoff = today - timedelta(days=RESULTS_HISTORY_DAYS)
+            for name, day in await _list_partitions(conn, history):
+                if day < cutoff:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+
+    return moved
+
+
+# ============== TASK AUDIENCE ==============
+
+# Auditoriya qoidasi: xodim faol, filiali vazifa filiallarida va
+# vazifa smenasi 'hammasi' yoki xodim smenasi bilan bir xil
+_TASK_AUDIENCE_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION task_audience_on_task() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM task_audience WHERE task_id = NEW.id;
+        INSERT INTO task_audience (task_id, employee_id)
+        SELECT tb.task_id, e.id
+        FROM task_branches tb
+        JOIN employees e ON e.branch_id = tb.branch_id
+        WHERE tb.task_id = NEW.id
+          AND e.is_active
+          AND (NEW.shift = 'hammasi' OR e.shift = NEW.shift);
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION task_audience_on_task_branch() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            DELETE FROM task_audience a
+            USING employees e
+            WHERE a.task_id = OLD.task_id
+              AND a.employee_id = e.id
+              AND e.branch_id = OLD.branch_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO task_audience (task_id, employee_id)
+            SELECT t.id, e.id
+            FROM tasks t
+            JOIN employees e ON e.branch_id = NEW.branch_id
+            WHERE t.id = NEW.task_id
+              AND e.is_active
+              AND (t.shift = 'hammasi' OR e.shift = t.shift)
+            ON CONFLICT DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION task_audience_on_employee() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' THEN
+            DELETE FROM task_audience WHERE employee_id = OLD.id;
+        END IF;
+        IF NEW.is_active THEN
+            INSERT INTO task_audience (task_id, employee_id)
+            SELECT tb.task_id, NEW.id
+            FROM task_branches tb
+            JOIN tasks t ON t.id = tb.task_id
+            WHERE tb.branch_id = NEW.branch_id
+              AND (t.shift = 'hammasi' OR t.shift = NEW.shift)
+            ON CONFLICT DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS trg_task_audience_task ON tasks",
+    """
+    CREATE TRIGGER trg_task_audience_task
+    AFTER UPDATE OF shift ON tasks
+    FOR EACH ROW WHEN (OLD.shift IS DISTINCT FROM NEW.shift)
+    EXECUTE FUNCTION task_audience_on_task()
+    """,
+    "DROP TRIGGER IF EXISTS trg_task_audience_task_branch ON task_branches",
+    """
+    CREATE TRIGGER trg_task_audience_task_branch
+    AFTER INSERT OR UPDATE OR DELETE ON task_branches
+    FOR EACH ROW EXECUTE FUNCTION task_audience_on_task_branch()
+    """,
+    "DROP TRIGGER IF EXISTS trg_task_audience_employee_insert ON employees",
+    """
+    CREATE TRIGGER trg_task_audience_employee_insert
+    AFTER INSERT ON employees
+    FOR EACH ROW EXECUTE FUNCTION task_audience_on_employee()
+    """,
+    "DROP TRIGGER IF EXISTS trg_task_audience_employee_update ON employees",
+    """
+    CREATE TRIGGER trg_task_audience_employee_update
+    AFTER UPDATE OF branch_id, shift, is_active ON employees
+    FOR EACH ROW
+    WHEN ((OLD.branch_id, OLD.shift, OLD.is_active)
+          IS DISTINCT FROM (NEW.branch_id, NEW.shift, NEW.is_active))
+    EXECUTE FUNCTION task_audience_on_employee()
+    """,
+]
+
+
+_TASK_AUDIENCE_REBUILD_SQL = """
+    INSERT INTO task_audience (task_id, employee_id)
+    SELECT tb.task_id, e.id
+    FROM task_branches tb
+    JOIN tasks t ON t.id = tb.task_id
+    JOIN employees e ON e.branch_id = tb.branch_id
+    WHERE e.is_active
+      AND (t.shift = 'hammasi' OR e.shift = t.shift)
+"""
+
+
+async def install_task_audience(conn, rebuild: bool = False):
+    """task_audience triggerlarini o'rnatish (create_all bilan yaratilgan bazalar
+    uchun; bot bazasida migratsiya 0001 bajaradi). rebuild=True - jadvalni
+    mavjud vazifa/xodimlardan qayta to'ldirish.
+    """
+    for statement in _TASK_AUDIENCE_DDL:
+        await conn.execute(text(statement))
+
+    if rebuild:
+        await conn.execute(text("DELETE FROM task_audience"))
+        result = await conn.execute(text(_TASK_AUDIENCE_REBUILD_SQL))
+        logger.info(f"✅ task_audience: {result.rowcount} ta qator to'ldirildi")
+
+
+async def _take_legacy_tables(conn) -> List[str]:
+    """Eski (partitionsiz) jadvallar qatorlarini vaqtinchalik jadvalga olib,
+    jadvalni o'chirish - migratsiya 0001 uni partition bilan qayta yaratadi.
+    """
+    legacy = []
+    for table in DAILY_PARTITIONED:
+        result = await conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table}
+        )
+        if result.scalar() == 'r':
+            await conn.execute(text(
+                f"CREATE TEMP TABLE _legacy_{table} ON COMMIT DROP AS SELECT * FROM {table}"
+            ))
+            await conn.execute(text(f"DROP TABLE {table}"))
+            legacy.append(table)
+    return legacy
+
+
+async def _restore_legacy_rows(conn, legacy: List[str]):
+    """Eski qatorlarni joriy kun bo'lagiga qaytarish (ular hali qayta tiklanmagan)"""
+    for table in legacy:
+        columns = ", ".join(
+            col.name for col in Base.metadata.tables[table].columns
+            if col.name != DAILY_PARTITIONED[table]
+        )
+        result = await conn.execute(text(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM _legacy_{table}"
+        ))
+        await conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+        logger.info(f"✅ {table}: {result.rowcount} ta qator kunlik bo'laklarga ko'chirildi")
+
+
+# ============== SCHEMA MIGRATIONS ==============
+
+_MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def _alembic_config(connection=None) -> Config:
+    config = Config()
+    config.set_main_option("script_location", _MIGRATIONS_DIR)
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def _schema_revisions(connection) -> Tuple[Optional[str], str]:
+    """(bazadagi versiya, oxirgi migratsiya)"""
+    current = MigrationContext.configure(connection).get_current_revision()
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+    return current, head
+
+
+def _upgrade_schema(connection):
+    command.upgrade(_alembic_config(connection), "head")
+
+
 # ============== ENGINE SETUP ==============
 
 async def init_db():
@@ -208,6 +630,12 @@ async def init_db():
             pool_pre_ping=True,
             pool_recycle=3600
         )
+        if QUERY_PROFILER_ENABLED:
+            profiler.install(engine)
+            logger.info(
+                f"✅ Query profiler: N+1 > {QUERY_PROFILER_REPEAT_THRESHOLD} marta, "
+                f"sekin so'rov >= {SLOW_QUERY_MS:.0f} ms"
+            )
 
         async_session_maker = async_sessionmaker(
             engine,
@@ -215,27 +643,161 @@ async def init_db():
             expire_on_commit=False
         )
 
-        # Create all tables
+        # Sxema versiyasi oxirgi bo'lsa faqat kunlik bo'laklar tekshiriladi,
+        # aks holda Alembic migratsiyalari (shu tranzaksiyada) bajariladi.
+        # Advisory lock - bir vaqtda ishga tushgan replikalar navbat bilan
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+            await _lock_partitions(conn)
+            current, head = await conn.run_sync(_schema_revisions)
+            legacy = []
+            if current != head:
+                logger.info(f"Sxema migratsiyasi: {current or '-'} -> {head}")
+                legacy = await _take_legacy_tables(conn)
+                await conn.run_sync(_upgrade_schema)
+            await create_daily_partitions(conn)
+            await _restore_legacy_rows(conn, legacy)
 
         logger.info("✅ PostgreSQL database initialized successfully")
     except Exception as e:
         logger.error(f"❌ Database initialization error: {e}")
         raise
 
+    # Katta used_photos da yuklash vaqt oladi - fonda, tayyor bo'lguncha bazadan tekshiriladi
+    if PHOTO_FILTER_ENABLED:
+        _start_photo_filter_load()
+
 
 async def close_db():
     """Close database connections"""
     global engine
+    if _photo_filter_task and not _photo_filter_task.done():
+        _photo_filter_task.cancel()
     if engine:
         await engine.dispose()
         logger.info("✅ Database connections closed")
+    logger.info(f"Employee cache: {employee_cache.stats()}")
+    logger.info(f"Photo filter: {photo_filter.stats()}")
+    logger.info(f"Data loaders: {get_loader_stats()}")
+
+
+# ============== UNIT OF WORK (update sessiyasi) ==============
+
+class _UnitOfWorkSession(AsyncSession):
+    """Update davomidagi umumiy sessiya: funksiyalardagi commit() faqat flush
+    qiladi, haqiqiy COMMIT update oxirida (unit_of_work) bitta bo'lib bajariladi.
+    """
+
+    has_writes = False
+
+    async def commit(self):
+        self.has_writes = True
+        await self.flush()
+
+    async def commit_unit(self):
+        await super().commit()
+
+
+class _UnitOfWork:
+    __slots__ = ("session", "task", "after_commit", "closed")
+
+    def __init__(self, session: _UnitOfWorkSession):
+        self.session = session
+        # Faqat shu task dan foydalaniladi: handler ichidagi create_task / gather
+        # va scheduler joblari context nusxasini oladi, lekin o'z sessiyasini ochadi
+        self.task = asyncio.current_task()
+        self.after_commit: List[Tuple[Callable, tuple]] = []
+        # Yopilgandan keyingi DB chaqiruvlari o'z sessiyasini ochadi
+        self.closed = False
+
+
+_unit_of_work: ContextVar[Optional[_UnitOfWork]] = ContextVar("db_unit_of_work", default=None)
+
+
+def _current_unit() -> Optional[_UnitOfWork]:
+    unit = _unit_of_work.get()
+    if unit is not None and not unit.closed and unit.task is asyncio.current_task():
+        return unit
+    return None
+
+
+async def _close_unit(unit: _UnitOfWork, commit: bool):
+    """Sessiyani COMMIT / ROLLBACK qilib yopish - ulanish pool ga qaytadi"""
+    unit.closed = True
+    try:
+        if commit:
+            await unit.session.commit_unit()
+        else:
+            await unit.session.rollback()
+    finally:
+        await unit.session.close()
+
+    if commit:
+        for callback, args in unit.after_commit:
+            callback(*args)
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """Bitta update uchun umumiy sessiya (DatabaseSessionMiddleware).
+    Ichidagi barcha get_session() / xom o'qishlar bitta ulanishdan foydalanadi,
+    yozishlar bitta COMMIT bilan saqlanadi, xatoda - ROLLBACK.
+    COMMIT birinchi Telegram API chaqiruvidan oldin (commit_unit_of_work) yoki
+    update oxirida bajariladi.
+    """
+    if async_session_maker is None or _current_unit() is not None:
+        yield
+        return
+
+    unit = _UnitOfWork(_UnitOfWorkSession(bind=engine, expire_on_commit=False))
+    token = _unit_of_work.set(unit)
+    try:
+        yield
+    except BaseException:
+        if not unit.closed:
+            await _close_unit(unit, commit=False)
+        raise
+    else:
+        if not unit.closed:
+            await _close_unit(unit, commit=True)
+    finally:
+        _unit_of_work.reset(token)
+
+
+async def commit_unit_of_work():
+    """Update sessiyasini hozir COMMIT qilib yopish (Telegram API chaqiruvidan oldin).
+    Foydalanuvchi "✅" javobini faqat saqlangan yozishlardan keyin oladi va sekin
+    Telegram so'rovlari pool ulanishini band qilmaydi. Keyingi DB chaqiruvlari
+    o'z sessiyalarida bajariladi.
+    """
+    unit = _current_unit()
+    if unit is not None:
+        await _close_unit(unit, commit=True)
+
+
+def _after_commit(callback: Callable, *args: Any):
+    """Keshni yangilash: darhol va update sessiyasida haqiqiy COMMIT dan keyin yana -
+    parallel update commit gacha eski qiymatni keshga yozib qo'ymasligi uchun.
+    """
+    callback(*args)
+    unit = _current_unit()
+    if unit is not None:
+        unit.after_commit.append((callback, args))
 
 
 @asynccontextmanager
 async def get_session():
     """Get database session"""
+    unit = _current_unit()
+    if unit is not None:
+        try:
+            yield unit.session
+        except Exception as e:
+            # Savepoint yo'q - butun update tranzaksiyasi bekor qilinadi
+            await unit.session.rollback()
+            logger.error(f"Session error (update rolled back): {e}")
+            raise
+        return
+
     async with async_session_maker() as session:
         try:
             yield session
@@ -247,6 +809,35 @@ async def get_session():
             await session.close()
 
 
+def _can_coalesce() -> bool:
+    """DataLoader orqali o'qish mumkinmi: batch alohida sessiyada bajariladi,
+    shuning uchun update o'zi yozgan (hali COMMIT qilinmagan) qatorlarni ko'rmaydi.
+    """
+    if not DB_LOADER_ENABLED:
+        return False
+    unit = _current_unit()
+    return unit is None or not unit.session.has_writes
+
+
+@asynccontextmanager
+async def _raw_connection():
+    """Pool dagi ulanishning asyncpg obyekti - eng ko'p chaqiriladigan o'qishlar uchun.
+    ORM hydration bo'lmaydi; asyncpg so'rovni birinchi chaqiruvda prepare qilib,
+    ulanishning statement keshida saqlaydi.
+    Engine hodisalaridan o'tmaydi - profiler yoqilgan bo'lsa ulanish o'raladi.
+    """
+    unit = _current_unit()
+    if unit is not None:
+        conn = await unit.session.connection()
+        raw = await conn.get_raw_connection()
+        yield profiler.wrap_connection(raw.driver_connection)
+        return
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        yield profiler.wrap_connection(raw.driver_connection)
+
+
 # ============== HELPER FUNCTIONS ==============
 
 def _extract_number(name: str) -> int:
@@ -259,6 +850,7 @@ def dict_from_row(row) -> Optional[dict]:
     """Convert SQLAlchemy row to dict.
     start_time va deadline ni string formatga o'tkazadi
     (eski kod bilan moslik uchun).
+    Yangi kod database.records dagi yozuv turlaridan foydalanadi.
     """
     if row is None:
         return None
@@ -287,12 +879,12 @@ async def create_branch(name: str, address: str = None) -> int:
         return branch.id
 
 
-async def get_all_branches() -> List[dict]:
+async def get_all_branches() -> List[BranchRecord]:
     """Barcha filiallarni olish (nomdagi raqam bo'yicha tartiblangan)"""
     async with get_session() as session:
         result = await session.execute(select(Branch))
         branches = result.scalars().all()
-        branches_list = [dict_from_row(b) for b in branches]
+        branches_list = [BranchRecord.from_row(b) for b in branches]
 
     branches_list.sort(
         key=lambda x: (_extract_number(x['name']), x['name'])
@@ -300,14 +892,30 @@ async def get_all_branches() -> List[dict]:
     return branches_list
 
 
-async def get_branch(branch_id: int) -> Optional[dict]:
+async def _load_branches(branch_ids: List[int]) -> dict:
+    async with _raw_connection() as conn:
+        rows = await conn.fetch(
+            "SELECT id, name, address, created_at FROM branches WHERE id = ANY($1::int[])",
+            branch_ids
+        )
+    return {row['id']: BranchRecord.from_mapping(row) for row in rows}
+
+
+_branch_loader = DataLoader(_load_branches)
+
+
+async def get_branch(branch_id: int) -> Optional[BranchRecord]:
     """Filial ma'lumotlarini olish"""
+    if _can_coalesce():
+        branch = await _branch_loader.load(branch_id)
+        return branch.copy() if branch else None
+
     async with get_session() as session:
         result = await session.execute(
             select(Branch).where(Branch.id == branch_id)
         )
         branch = result.scalar_one_or_none()
-        return dict_from_row(branch) if branch else None
+        return BranchRecord.from_row(branch)
 
 
 async def update_branch(
@@ -321,7 +929,10 @@ async def update_branch(
             .values(name=name, address=address)
         )
         await session.commit()
-        return True
+    # Keshdagi xodimlarda branch_name eskirgan
+    _after_commit(employee_cache.invalidate_where, lambda cached: cached['branch_id'] == branch_id)
+    _after_commit(_branch_loader.forget, branch_id)
+    return True
 
 
 async def delete_branch(branch_id: int) -> bool:
@@ -331,7 +942,9 @@ async def delete_branch(branch_id: int) -> bool:
             delete(Branch).where(Branch.id == branch_id)
         )
         await session.commit()
-        return True
+    _after_commit(employee_cache.invalidate_where, lambda cached: cached['branch_id'] == branch_id)
+    _after_commit(_branch_loader.forget, branch_id)
+    return True
 
 
 async def get_branch_employees_count(branch_id: int) -> int:
@@ -365,36 +978,55 @@ async def create_employee(
         session.add(employee)
         await session.commit()
         await session.refresh(employee)
-        return employee.id
+    _after_commit(employee_cache.invalidate, telegram_id)
+    return employee.id
+
+
+# Har bir update da chaqiriladigan o'qishlar - xom asyncpg so'rovlari ($1 - parametrlar)
+_EMPLOYEE_BY_TELEGRAM_ID_SQL = """
+    SELECT e.id, e.telegram_id, e.first_name, e.last_name, e.branch_id, e.shift,
+           e.is_active, e.created_at, COALESCE(b.name, 'Noma''lum') AS branch_name
+    FROM employees e
+    LEFT JOIN branches b ON b.id = e.branch_id
+    WHERE e.telegram_id = $1 AND e.is_active
+"""
 
 
 async def get_employee_by_telegram_id(
     telegram_id: int,
-) -> Optional[dict]:
-    """Telegram ID orqali xodimni olish"""
-    async with get_session() as session:
-        result = await session.execute(
-            select(
-                Employee,
-                Branch.name.label("branch_name"),
-            )
-            .outerjoin(
-                Branch, Employee.branch_id == Branch.id
-            )
-            .where(
-                Employee.telegram_id == telegram_id,
-                Employee.is_active == True,  # noqa: E712
-            )
-        )
-        row = result.first()
-        if row:
-            emp = dict_from_row(row[0])
-            emp["branch_name"] = row[1] or "Noma'lum"
-            return emp
-        return None
+) -> Optional[EmployeeRecord]:
+    """Telegram ID orqali xodimni olish (keshlangan).
+    Kesh yozish funksiyalarida invalidate qilinadi.
+    """
+    cached = employee_cache.get(telegram_id)
+    if cached is not None:
+        return cached.copy()
+
+    generation = employee_cache.generation
+    async with _raw_connection() as conn:
+        row = await conn.fetchrow(_EMPLOYEE_BY_TELEGRAM_ID_SQL, telegram_id)
+    if row:
+        emp = EmployeeRecord.from_mapping(row)
+        employee_cache.set(telegram_id, emp, generation)
+        return emp.copy()
+    return None
+
+
+def get_loader_stats() -> dict:
+    """DataLoader statistikasi (birlashtirilgan so'rovlar soni)"""
+    return {
+        "task": _task_loader.stats(),
+        "branch": _branch_loader.stats(),
+        "task_branches": _task_branches_loader.stats(),
+    }
+
+
+def get_employee_cache_stats() -> dict:
+    """Xodim keshi statistikasi (size, hits, misses, hit_rate)"""
+    return employee_cache.stats()
 
 
-async def get_employee(employee_id: int) -> Optional[dict]:
+async def get_employee(employee_id: int) -> Optional[EmployeeRecord]:
     """ID orqali xodimni olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -409,8 +1041,7 @@ async def get_employee(employee_id: int) -> Optional[dict]:
         )
         row = result.first()
         if row:
-            emp = dict_from_row(row[0])
-            emp["branch_name"] = row[1] or "Noma'lum"
+            emp = EmployeeRecord.from_row(row[0], branch_name=row[1] or "Noma'lum")
             return emp
         return None
 
@@ -439,7 +1070,8 @@ async def update_employee(
             emp.shift = shift
 
         await session.commit()
-        return True
+    _after_commit(employee_cache.invalidate_where, lambda cached: cached['id'] == employee_id)
+    return True
 
 
 async def update_employee_by_telegram_id(
@@ -469,7 +1101,8 @@ async def update_employee_by_telegram_id(
             emp.shift = shift
 
         await session.commit()
-        return True
+    _after_commit(employee_cache.invalidate, telegram_id)
+    return True
 
 
 async def delete_employee(employee_id: int) -> bool:
@@ -481,7 +1114,8 @@ async def delete_employee(employee_id: int) -> bool:
             .values(is_active=False)
         )
         await session.commit()
-        return True
+    _after_commit(employee_cache.invalidate_where, lambda cached: cached['id'] == employee_id)
+    return True
 
 
 async def delete_employee_by_telegram_id(telegram_id: int) -> bool:
@@ -493,10 +1127,11 @@ async def delete_employee_by_telegram_id(telegram_id: int) -> bool:
             .values(is_active=False)
         )
         await session.commit()
-        return True
+    _after_commit(employee_cache.invalidate, telegram_id)
+    return True
 
 
-async def get_all_employees() -> List[dict]:
+async def get_all_employees() -> List[EmployeeRecord]:
     """Barcha faol xodimlarni olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -512,8 +1147,7 @@ async def get_all_employees() -> List[dict]:
         rows = result.all()
         employees = []
         for row in rows:
-            emp = dict_from_row(row[0])
-            emp["branch_name"] = row[1] or "Noma'lum"
+            emp = EmployeeRecord.from_row(row[0], branch_name=row[1] or "Noma'lum")
             employees.append(emp)
 
     employees.sort(
@@ -527,7 +1161,7 @@ async def get_all_employees() -> List[dict]:
 
 async def get_employees_by_branch(
     branch_id: int,
-) -> List[dict]:
+) -> List[EmployeeRecord]:
     """Filial bo'yicha xodimlarni olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -547,8 +1181,7 @@ async def get_employees_by_branch(
         rows = result.all()
         employees = []
         for row in rows:
-            emp = dict_from_row(row[0])
-            emp["branch_name"] = row[1] or "Noma'lum"
+            emp = EmployeeRecord.from_row(row[0], branch_name=row[1] or "Noma'lum")
             employees.append(emp)
         return employees
 
@@ -610,14 +1243,34 @@ async def create_task(
         return task.id
 
 
-async def get_task(task_id: int) -> Optional[dict]:
+_TASK_SQL = """
+    SELECT id, title, description, task_type, result_type, shift,
+           start_time, deadline, created_at, is_active
+    FROM tasks
+    WHERE id = $1
+"""
+
+_TASKS_BY_IDS_SQL = _TASK_SQL.replace("WHERE id = $1", "WHERE id = ANY($1::int[])")
+
+
+async def _load_tasks(task_ids: List[int]) -> dict:
+    async with _raw_connection() as conn:
+        rows = await conn.fetch(_TASKS_BY_IDS_SQL, task_ids)
+    return {row['id']: TaskRecord.from_mapping(row) for row in rows}
+
+
+_task_loader = DataLoader(_load_tasks)
+
+
+async def get_task(task_id: int) -> Optional[TaskRecord]:
     """Vazifa ma'lumotlarini olish"""
-    async with get_session() as session:
-        result = await session.execute(
-            select(Task).where(Task.id == task_id)
-        )
-        task = result.scalar_one_or_none()
-        return dict_from_row(task) if task else None
+    if _can_coalesce():
+        task = await _task_loader.load(task_id)
+        return task.copy() if task else None
+
+    async with _raw_connection() as conn:
+        row = await conn.fetchrow(_TASK_SQL, task_id)
+    return TaskRecord.from_mapping(row)
 
 
 async def update_task(
@@ -663,7 +1316,8 @@ async def update_task(
             task.deadline = deadline
 
         await session.commit()
-        return True
+    _after_commit(_task_loader.forget, task_id)
+    return True
 
 
 async def delete_task(task_id: int) -> bool:
@@ -673,7 +1327,9 @@ async def delete_task(task_id: int) -> bool:
             delete(Task).where(Task.id == task_id)
         )
         await session.commit()
-        return True
+    _after_commit(_task_loader.forget, task_id)
+    _after_commit(_task_branches_loader.forget, task_id)
+    return True
 
 
 async def deactivate_task(task_id: int) -> bool:
@@ -685,19 +1341,44 @@ async def deactivate_task(task_id: int) -> bool:
             .values(is_active=False)
         )
         await session.commit()
-        return True
+    _after_commit(_task_loader.forget, task_id)
+    _after_commit(_task_branches_loader.forget, task_id)
+    return True
+
+
+async def _load_task_branches(task_ids: List[int]) -> dict:
+    async with _raw_connection() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT tb.task_id, b.id, b.name, b.address, b.created_at
+            FROM task_branches tb
+            JOIN branches b ON b.id = tb.branch_id
+            WHERE tb.task_id = ANY($1::int[])
+            """,
+            task_ids
+        )
+    grouped = {task_id: [] for task_id in task_ids}
+    for row in rows:
+        grouped[row['task_id']].append(BranchRecord.from_mapping(row))
+    return grouped
+
 
+_task_branches_loader = DataLoader(_load_task_branches)
 
-async def get_task_branches(task_id: int) -> List[dict]:
+
+async def get_task_branches(task_id: int) -> List[BranchRecord]:
     """Vazifaga tegishli filiallarni olish"""
-    async with get_session() as session:
-        result = await session.execute(
-            select(Branch)
-            .join(TaskBranch, Branch.id == TaskBranch.branch_id)
-            .where(TaskBranch.task_id == task_id)
-        )
-        branches = result.scalars().all()
-        branches_list = [dict_from_row(b) for b in branches]
+    if _can_coalesce():
+        branches_list = [b.copy() for b in await _task_branches_loader.load(task_id)]
+    else:
+        async with get_session() as session:
+            result = await session.execute(
+                select(Branch)
+                .join(TaskBranch, Branch.id == TaskBranch.branch_id)
+                .where(TaskBranch.task_id == task_id)
+            )
+            branches = result.scalars().all()
+            branches_list = [BranchRecord.from_row(b) for b in branches]
 
     branches_list.sort(
         key=lambda x: (_extract_number(x['name']), x['name'])
@@ -705,7 +1386,7 @@ async def get_task_branches(task_id: int) -> List[dict]:
     return branches_list
 
 
-async def get_active_tasks() -> List[dict]:
+async def get_active_tasks() -> List[TaskRecord]:
     """Faol vazifalarni olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -714,56 +1395,36 @@ async def get_active_tasks() -> List[dict]:
             .order_by(Task.created_at.desc())
         )
         tasks = result.scalars().all()
-        return [dict_from_row(t) for t in tasks]
+        return [TaskRecord.from_row(t) for t in tasks]
+
+
+# Xodim auditoriyasidagi faol vazifalar va uning natijasi (bitta so'rov).
+# Qayta tiklash o'tkazib yuborilsa bir nechta kun natijasi bo'lishi mumkin - eng oxirgisi olinadi
+_EMPLOYEE_TASKS_SQL = """
+    SELECT DISTINCT ON (t.deadline, t.id)
+           t.id, t.title, t.description, t.task_type, t.result_type, t.shift,
+           t.start_time, t.deadline, t.created_at, t.is_active,
+           r.id IS NOT NULL AS is_completed,
+           COALESCE(r.is_late, false) AS is_late
+    FROM task_audience a
+    JOIN tasks t ON t.id = a.task_id
+    LEFT JOIN task_results r ON r.task_id = t.id AND r.employee_id = a.employee_id
+    WHERE a.employee_id = $1
+      AND t.is_active
+    ORDER BY t.deadline, t.id, r.result_day DESC
+"""
 
 
-async def get_employee_tasks(employee_id: int) -> List[dict]:
+async def get_employee_tasks(employee_id: int) -> List[TaskRecord]:
     """Xodimga tegishli vazifalarni olish"""
-    async with get_session() as session:
-        result = await session.execute(
-            select(Employee).where(Employee.id == employee_id)
-        )
-        emp = result.scalar_one_or_none()
-        if not emp:
-            return []
-
-        result = await session.execute(
-            select(Task, TaskResult)
-            .join(TaskBranch, Task.id == TaskBranch.task_id)
-            .outerjoin(
-                TaskResult,
-                (Task.id == TaskResult.task_id)
-                & (TaskResult.employee_id == employee_id),
-            )
-            .where(
-                TaskBranch.branch_id == emp.branch_id,
-                Task.is_active == True,  # noqa: E712
-                (Task.shift == "hammasi")
-                | (Task.shift == emp.shift),
-            )
-            .order_by(Task.deadline.asc())
-        )
-
-        rows = result.all()
-        seen_ids = set()
-        tasks = []
-        for task, task_result in rows:
-            if task.id in seen_ids:
-                continue
-            seen_ids.add(task.id)
-            task_dict = dict_from_row(task)
-            task_dict['is_completed'] = 1 if task_result else 0
-            task_dict['is_late'] = (
-                int(task_result.is_late) if task_result else 0
-            )
-            tasks.append(task_dict)
-
-        return tasks
+    async with _raw_connection() as conn:
+        rows = await conn.fetch(_EMPLOYEE_TASKS_SQL, employee_id)
+    return [TaskRecord.from_mapping(row) for row in rows]
 
 
 async def get_employee_tasks_by_telegram_id(
     telegram_id: int
-) -> List[dict]:
+) -> List[TaskRecord]:
     """Telegram ID orqali xodimga tegishli vazifalarni olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -779,57 +1440,24 @@ async def get_employee_tasks_by_telegram_id(
     return await get_employee_tasks(emp.id)
 
 
-async def get_employees_for_task(task_id: int) -> List[dict]:
-    """Vazifaga tegishli barcha xodimlarni olish"""
-    async with get_session() as session:
-        result = await session.execute(
-            select(Task).where(Task.id == task_id)
-        )
-        task = result.scalar_one_or_none()
-        if not task:
-            return []
-
-        result = await session.execute(
-            select(TaskBranch.branch_id)
-            .where(TaskBranch.task_id == task_id)
-        )
-        branch_ids = [row[0] for row in result.all()]
-
-        if not branch_ids:
-            return []
-
-        query = (
-            select(
-                Employee,
-                Branch.name.label("branch_name"),
-            )
-            .outerjoin(
-                Branch, Employee.branch_id == Branch.id
-            )
-            .where(
-                Employee.branch_id.in_(branch_ids),
-                Employee.is_active == True,  # noqa: E712
-            )
-        )
-
-        if task.shift != 'hammasi':
-            query = query.where(Employee.shift == task.shift)
-
-        result = await session.execute(query)
-        rows = result.all()
+_TASK_AUDIENCE_SQL = """
+    SELECT e.id, e.telegram_id, e.first_name, e.last_name, e.branch_id, e.shift,
+           e.is_active, e.created_at, COALESCE(b.name, 'Noma''lum') AS branch_name
+    FROM task_audience a
+    JOIN employees e ON e.id = a.employee_id
+    LEFT JOIN branches b ON b.id = e.branch_id
+    WHERE a.task_id = $1
+"""
 
-        employees = []
-        for emp, branch_name in rows:
-            emp_dict = dict_from_row(emp)
-            emp_dict["branch_name"] = (
-                branch_name or "Noma'lum"
-            )
-            employees.append(emp_dict)
 
-        return employees
+async def get_employees_for_task(task_id: int) -> List[EmployeeRecord]:
+    """Vazifaga tegishli barcha xodimlarni olish (task_audience dan)"""
+    async with _raw_connection() as conn:
+        rows = await conn.fetch(_TASK_AUDIENCE_SQL, task_id)
+    return [EmployeeRecord.from_mapping(row) for row in rows]
 
 
-async def get_daily_tasks() -> List[dict]:
+async def get_daily_tasks() -> List[TaskRecord]:
     """Har kunlik vazifalarni olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -839,87 +1467,104 @@ async def get_daily_tasks() -> List[dict]:
             )
         )
         tasks = result.scalars().all()
-        return [dict_from_row(t) for t in tasks]
+        return [TaskRecord.from_row(t) for t in tasks]
 
 
 # ============== TASK RESULTS ==============
 
+# Natijani bitta so'rovda saqlash:
+#   • is_late SQL da hisoblanadi (har kunlik vazifa deadline i bugungi kunga moslanadi)
+#   • takroriy yuborish (uq_task_employee) xato emas - mavjud natija qaytariladi
+#   • o'rin task_result_counters dagi atomik hisoblagichdan olinadi.
+#     Hisoblagich hali yo'q bo'lsa (eski natijalar), mavjud natijalar sonidan boshlanadi.
+# :now bir xil parametr - turi birinchi CAST(:now AS timestamp) orqali aniqlanadi.
+_SUBMIT_RESULT_SQL = text("""
+    WITH task AS (
+        SELECT CASE
+                   WHEN task_type = 'har_kunlik' AND deadline::date < CAST(:now AS timestamp)::date
+                   THEN CAST(:now AS timestamp)::date + deadline::time
+                   ELSE deadline
+               END AS deadline
+        FROM tasks
+        WHERE id = :task_id
+    ),
+    inserted AS (
+        INSERT INTO task_results (
+            result_day, task_id, employee_id, result_text, file_unique_id, is_late, submitted_at
+        )
+        SELECT :result_day, :task_id, :employee_id, :result_text, :file_unique_id,
+               COALESCE(:now > task.deadline, false), :now
+        FROM task
+        ON CONFLICT ON CONSTRAINT uq_task_employee DO NOTHING
+        RETURNING id, is_late
+    ),
+    photo AS (
+        INSERT INTO used_photos (file_unique_id, task_id, employee_id, used_at)
+        SELECT :file_unique_id, :task_id, :employee_id, :now
+        FROM inserted
+        WHERE CAST(:file_unique_id AS varchar) IS NOT NULL
+        ON CONFLICT (file_unique_id) DO NOTHING
+    ),
+    counter AS (
+        INSERT INTO task_result_counters (task_id, submitted)
+        SELECT :task_id,
+               (SELECT COUNT(*) FROM task_results WHERE task_id = :task_id) + 1
+        FROM inserted
+        ON CONFLICT (task_id) DO UPDATE
+            SET submitted = task_result_counters.submitted + 1
+        RETURNING submitted
+    )
+    SELECT inserted.id, counter.submitted AS position, inserted.is_late
+    FROM inserted, counter
+    UNION ALL
+    SELECT id, 0, is_late
+    FROM task_results
+    WHERE task_id = :task_id AND employee_id = :employee_id
+      AND NOT EXISTS (SELECT 1 FROM inserted)
+""")
+
+
 async def submit_task_result(
     task_id: int, employee_id: int,
     result_text: str = None,
     file_unique_id: str = None
 ) -> Tuple[int, int, bool]:
-    """Vazifa natijasini yuborish"""
+    """Vazifa natijasini yuborish (bitta so'rov).
+    Qaytaradi: (result_id, position, is_late).
+    Natija avval yuborilgan bo'lsa position=0 (result_id - mavjud natija).
+    """
+    now = _tashkent_now()
     async with get_session() as session:
-        # Deadline o'tganligini tekshirish
         result = await session.execute(
-            select(Task.deadline, Task.task_type).where(Task.id == task_id)
+            _SUBMIT_RESULT_SQL,
+            {
+                "task_id": task_id,
+                "employee_id": employee_id,
+                "result_text": result_text,
+                "file_unique_id": file_unique_id,
+                "now": now,
+                "result_day": business_day(now),
+            }
         )
         row = result.first()
-        
-        is_late = False
-        if row and row[0]:
-            deadline = row[0]
-            task_type = row[1]
-            # deadline datetime yoki string bo'lishi mumkin
-            if isinstance(deadline, str):
-                try:
-                    deadline = datetime.fromisoformat(deadline)
-                except Exception:
-                    for fmt in [
-                        "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"
-                    ]:
-                        try:
-                            deadline = datetime.strptime(deadline, fmt)
-                            break
-                        except ValueError:
-                            continue
-            if isinstance(deadline, datetime):
-                now_tashkent = _tashkent_now()
-                # Har kunlik vazifa uchun sanani bugungi kunga moslash (agar eskirgan bo'lsa)
-                if task_type == 'har_kunlik':
-                    if deadline.date() < now_tashkent.date():
-                        # Kunni yangilash
-                        deadline = deadline.replace(
-                            year=now_tashkent.year, 
-                            month=now_tashkent.month, 
-                            day=now_tashkent.day
-                        )
-                
-                if now_tashkent > deadline:
-                    is_late = True
-
-        # Natijani saqlash
-        task_result = TaskResult(
-            task_id=task_id,
-            employee_id=employee_id,
-            result_text=result_text,
-            file_unique_id=file_unique_id,
-            is_late=is_late
-        )
-        session.add(task_result)
+        await session.commit()
 
-        # Agar rasm bo'lsa, used_photos ga qo'shish
         if file_unique_id:
-            used_photo = UsedPhoto(
-                file_unique_id=file_unique_id,
-                task_id=task_id,
-                employee_id=employee_id
-            )
-            session.add(used_photo)
-
-        await session.flush()
-        result_id = task_result.id
-
-        # Nechanchi bo'lib bajarganini hisoblash
-        result = await session.execute(
-            select(func.count(TaskResult.id))
-            .where(TaskResult.task_id == task_id)
-        )
-        position = result.scalar() or 1
+            photo_filter.add(file_unique_id)
 
-        await session.commit()
-        return result_id, position, is_late
+        if row is None:
+            # Parallel yuborilgan natija so'rov boshida hali ko'rinmagan bo'lishi mumkin
+            result = await session.execute(
+                select(TaskResult.id, TaskResult.is_late).where(
+                    TaskResult.task_id == task_id,
+                    TaskResult.employee_id == employee_id
+                )
+            )
+            existing = result.first()
+            if existing is None:
+                return 0, 0, False  # Vazifa topilmadi
+            return existing.id, 0, bool(existing.is_late)
+        return row.id, row.position, bool(row.is_late)
 
 
 async def submit_task_result_by_telegram_id(
@@ -944,34 +1589,140 @@ async def submit_task_result_by_telegram_id(
     )
 
 
+# ============== USED PHOTOS FILTER ==============
+
+# Filtrga yuklangan eng katta used_photos.id va oxirgi yangilanish vaqti
+_photo_filter_last_id = 0
+_photo_filter_refreshed_at = 0.0
+_photo_filter_task: Optional[asyncio.Task] = None
+
+# Yuklashda bir partiyada olinadigan qatorlar soni (event loop ni uzoq band qilmasligi uchun)
+PHOTO_FILTER_BATCH = 10000
+
+
+async def _add_photos_to_filter(query) -> int:
+    """So'rov natijasidagi (id, file_unique_id) larni filtrga qo'shish"""
+    global _photo_filter_last_id
+    loaded = 0
+    async with get_session() as session:
+        result = await session.stream(query.execution_options(yield_per=PHOTO_FILTER_BATCH))
+        async for rows in result.partitions():
+            photo_filter.update(file_unique_id for _, file_unique_id in rows)
+            _photo_filter_last_id = max(_photo_filter_last_id, max(photo_id for photo_id, _ in rows))
+            loaded += len(rows)
+    return loaded
+
+
+async def load_photo_filter():
+    """used_photos dan filtrni to'liq qurish (ishga tushganda).
+    Sig'im mavjud rasmlar sonining 2 barobari - o'sish uchun joy qoladi.
+    """
+    global _photo_filter_last_id, _photo_filter_refreshed_at
+    try:
+        started = time.monotonic()
+        async with get_session() as session:
+            result = await session.execute(select(func.max(UsedPhoto.id)))
+            max_id = result.scalar() or 0
+
+        photo_filter.ready = False
+        photo_filter.reset(max(PHOTO_FILTER_MIN_CAPACITY, max_id * 2))
+        _photo_filter_last_id = 0
+        _photo_filter_refreshed_at = time.monotonic()
+        loaded = await _add_photos_to_filter(
+            select(UsedPhoto.id, UsedPhoto.file_unique_id)
+        )
+        photo_filter.ready = True
+        logger.info(
+            f"✅ Photo filter: {loaded} ta rasm "
+            f"{time.monotonic() - started:.1f} soniyada yuklandi ({photo_filter.stats()})"
+        )
+    except (SQLAlchemyError, OSError):
+        # Filtr o'chiq qoladi (ready=False) - check_photo_used bazadan tekshiradi
+        logger.exception("load_photo_filter error")
+
+
+async def _refresh_photo_filter():
+    """Boshqa jarayonlar qo'shgan rasmlarni olish (id bo'yicha, faqat yangilari)"""
+    global _photo_filter_refreshed_at
+    if time.monotonic() - _photo_filter_refreshed_at < PHOTO_FILTER_REFRESH_SECONDS:
+        return
+    _photo_filter_refreshed_at = time.monotonic()
+    await _add_photos_to_filter(
+        select(UsedPhoto.id, UsedPhoto.file_unique_id)
+        .where(UsedPhoto.id > _photo_filter_last_id)
+    )
+    # To'lib ketgan filtr false-positive larni oshiradi - qayta quriladi
+    if photo_filter.count > photo_filter.capacity and (
+        _photo_filter_task is None or _photo_filter_task.done()
+    ):
+        _start_photo_filter_load()
+
+
+def _start_photo_filter_load():
+    global _photo_filter_task
+    _photo_filter_task = asyncio.create_task(load_photo_filter())
+
+
+def get_photo_filter_stats() -> dict:
+    """Photo filter statistikasi (hajm, false-positive)"""
+    return photo_filter.stats()
+
+
 async def check_photo_used(file_unique_id: str) -> bool:
-    """Rasm avval ishlatilganligini tekshirish"""
+    """Rasm avval ishlatilganligini tekshirish.
+    Filtr "yo'q" desa bazaga so'rov yuborilmaydi, "ehtimol bor" bo'lsa - tasdiqlanadi.
+    """
+    if photo_filter.ready:
+        try:
+            await _refresh_photo_filter()
+        except Exception as e:
+            logger.error(f"Photo filter refresh error: {e}")
+        if not photo_filter.might_contain(file_unique_id):
+            return False
+
     async with get_session() as session:
         result = await session.execute(
             select(UsedPhoto.id)
             .where(UsedPhoto.file_unique_id == file_unique_id)
         )
-        return result.scalar_one_or_none() is not None
+        used = result.scalar_one_or_none() is not None
+
+    if photo_filter.ready and not used:
+        photo_filter.false_positives += 1
+    return used
+
+
+_TASK_RESULT_SQL = """
+    SELECT id, result_day, task_id, employee_id, result_text, result_photo_id,
+           file_unique_id, is_late, submitted_at
+    FROM task_results
+    WHERE task_id = $1 AND employee_id = $2
+    ORDER BY result_day DESC
+    LIMIT 1
+"""
+
+_HAS_SUBMITTED_SQL = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM task_results r
+        JOIN employees e ON e.id = r.employee_id
+        WHERE r.task_id = $1 AND e.telegram_id = $2 AND e.is_active
+    )
+"""
 
 
 async def get_task_result(
     task_id: int, employee_id: int
-) -> Optional[dict]:
+) -> Optional[TaskResultRecord]:
     """Xodimning vazifa natijasini olish"""
-    async with get_session() as session:
-        result = await session.execute(
-            select(TaskResult).where(
-                TaskResult.task_id == task_id,
-                TaskResult.employee_id == employee_id
-            )
-        )
-        task_result = result.scalar_one_or_none()
-        return dict_from_row(task_result) if task_result else None
+    async with _raw_connection() as conn:
+        row = await conn.fetchrow(_TASK_RESULT_SQL, task_id, employee_id)
+    return TaskResultRecord.from_mapping(row)
 
 
 async def get_task_result_by_telegram_id(
     task_id: int, telegram_id: int,
-) -> Optional[dict]:
+) -> Optional[TaskResultRecord]:
     """Telegram ID orqali natijani olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -987,25 +1738,22 @@ async def get_task_result_by_telegram_id(
             )
         )
         task_result = result.scalar_one_or_none()
-        return (
-            dict_from_row(task_result)
-            if task_result
-            else None
-        )
+        return TaskResultRecord.from_row(task_result)
 
 
 async def has_submitted_result(
     task_id: int, telegram_id: int
 ) -> bool:
     """Natija yuborilganligini tekshirish"""
-    result = await get_task_result_by_telegram_id(
-        task_id, telegram_id
-    )
-    return result is not None
+    async with _raw_connection() as conn:
+        return await conn.fetchval(_HAS_SUBMITTED_SQL, task_id, telegram_id)
 
 
 async def get_task_statistics(task_id: int) -> dict:
-    """Vazifa statistikasini olish"""
+    """Vazifa statistikasini olish.
+    Filiallar, xodimlar va natijalar bitta JOIN so'rovida olinadi
+    (har bir xodim uchun alohida so'rov yo'q).
+    """
     async with get_session() as session:
         result = await session.execute(
             select(Task).where(Task.id == task_id)
@@ -1014,73 +1762,69 @@ async def get_task_statistics(task_id: int) -> dict:
         if not task:
             return {}
 
+        employee_join = (
+            (Employee.branch_id == Branch.id)
+            & (Employee.is_active == True)  # noqa: E712
+        )
+        if task.shift != 'hammasi':
+            employee_join = employee_join & (Employee.shift == task.shift)
+
         result = await session.execute(
-            select(Branch)
+            select(Branch.id, Branch.name, Employee, TaskResult)
             .join(TaskBranch, Branch.id == TaskBranch.branch_id)
+            .outerjoin(Employee, employee_join)
+            .outerjoin(
+                TaskResult,
+                (TaskResult.task_id == task_id)
+                & (TaskResult.employee_id == Employee.id),
+            )
             .where(TaskBranch.task_id == task_id)
+            .order_by(Branch.id, Employee.id)
         )
-        branches = result.scalars().all()
-
-        stats = {"branches": [], "task": dict_from_row(task)}
-
-        for branch in branches:
-            query = select(Employee).where(
-                Employee.branch_id == branch.id,
-                Employee.is_active == True  # noqa: E712
-            )
-
-            if task.shift != 'hammasi':
-                query = query.where(Employee.shift == task.shift)
-
-            result = await session.execute(query)
-            employees = result.scalars().all()
-
-            completed = []
-            not_completed = []
-            late = []
-
-            for emp in employees:
-                result = await session.execute(
-                    select(TaskResult).where(
-                        TaskResult.task_id == task_id,
-                        TaskResult.employee_id == emp.id
-                    )
-                )
-                task_result = result.scalar_one_or_none()
-
-                emp_info = {
-                    "id": emp.id,
-                    "name": f"{emp.first_name} {emp.last_name}",
-                    "telegram_id": emp.telegram_id,
-                    "result": (
-                        dict_from_row(task_result)
-                        if task_result else None
-                    )
-                }
+        rows = result.all()
 
-                if task_result:
-                    if task_result.is_late:
-                        late.append(emp_info)
-                    else:
-                        completed.append(emp_info)
-                else:
-                    not_completed.append(emp_info)
-
-            stats["branches"].append({
-                "id": branch.id,
-                "name": branch.name,
-                "completed": completed,
-                "not_completed": not_completed,
-                "late": late
-            })
-
-        stats["branches"].sort(
-            key=lambda x: (_extract_number(x['name']), x['name'])
-        )
-        return stats
+    stats = {"branches": [], "task": TaskRecord.from_row(task)}
+    branches = {}
+
+    for branch_id, branch_name, emp, task_result in rows:
+        branch_stat = branches.get(branch_id)
+        if branch_stat is None:
+            branch_stat = {
+                "id": branch_id,
+                "name": branch_name,
+                "completed": [],
+                "not_completed": [],
+                "late": []
+            }
+            branches[branch_id] = branch_stat
+            stats["branches"].append(branch_stat)
+
+        # Filialda mos xodim yo'q (LEFT JOIN bo'sh qator)
+        if emp is None:
+            continue
+
+        emp_info = {
+            "id": emp.id,
+            "name": f"{emp.first_name} {emp.last_name}",
+            "telegram_id": emp.telegram_id,
+            "result": TaskResultRecord.from_row(task_result)
+        }
+
+        if task_result:
+            if task_result.is_late:
+                branch_stat["late"].append(emp_info)
+            else:
+                branch_stat["completed"].append(emp_info)
+        else:
+            branch_stat["not_completed"].append(emp_info)
+
+    stats["branches"].sort(
+        key=lambda x: (_extract_number(x['name']), x['name'])
+    )
+    return stats
 
 
-async def get_all_task_results(task_id: int) -> List[dict]:
+async def get_all_task_results(task_id: int) -> List[TaskResultRecord]:
     """Vazifaning barcha natijalarini olish"""
     async with get_session() as session:
         result = await session.execute(
@@ -1108,16 +1852,13 @@ async def get_all_task_results(task_id: int) -> List[dict]:
             task_result, first_name, last_name,
             telegram_id, branch_name,
         ) in rows:
-            result_dict = dict_from_row(task_result)
-            result_dict["first_name"] = (
-                first_name or "Noma'lum"
-            )
-            result_dict["last_name"] = last_name or ""
-            result_dict["telegram_id"] = telegram_id
-            result_dict["branch_name"] = (
-                branch_name or "Noma'lum"
-            )
-            results.append(result_dict)
+            results.append(TaskResultRecord.from_row(
+                task_result,
+                first_name=first_name or "Noma'lum",
+                last_name=last_name or "",
+                telegram_id=telegram_id,
+                branch_name=branch_name or "Noma'lum",
+            ))
 
         return results
 
@@ -1144,6 +1885,73 @@ async def has_branch_completion(task_id: int, branch_id: int, shift: str = 'hamm
 
 # ============== NOTIFICATIONS ==============
 
+async def get_notification_snapshot(task_ids: List[int] = None) -> dict:
+    """Scheduler uchun bildirishnoma holatini to'plam so'rovlari bilan olish.
+    task_ids berilmasa - barcha faol vazifalar.
+
+    Qaytaradi:
+        tasks     - {task_id: task}
+        employees - {task_id: [xodim (branch_name bilan)]}, filial bo'yicha tartiblangan
+        results   - {task_id: {employee_id: is_late}}
+        sent      - {(task_id, employee_id, notification_type)} - yuborilgan
+                    yoki outbox da navbatda turgan xabarlar
+    """
+    snapshot = {"tasks": {}, "employees": {}, "results": {}, "sent": set()}
+
+    async with get_session() as session:
+        query = select(Task).where(Task.is_active == True)  # noqa: E712
+        if task_ids is not None:
+            query = query.where(Task.id.in_(task_ids))
+        result = await session.execute(query)
+        for task in result.scalars().all():
+            snapshot["tasks"][task.id] = TaskRecord.from_row(task)
+            snapshot["employees"][task.id] = []
+            snapshot["results"][task.id] = {}
+
+        ids = list(snapshot["tasks"])
+        if not ids:
+            return snapshot
+
+        # Vazifaga tegishli faol xodimlar (smena mosligi bilan)
+        result = await session.execute(
+            select(TaskAudience.task_id, Employee, Branch.name)
+            .join(Employee, Employee.id == TaskAudience.employee_id)
+            .join(Branch, Branch.id == Employee.branch_id)
+            .where(TaskAudience.task_id.in_(ids))
+        )
+        rows = result.all()
+        rows.sort(key=lambda r: (_extract_number(r[2]), r[2], r[1].id))
+        for task_id, emp, branch_name in rows:
+            snapshot["employees"][task_id].append(
+                EmployeeRecord.from_row(emp, branch_name=branch_name)
+            )
+
+        result = await session.execute(
+            select(TaskResult.task_id, TaskResult.employee_id, TaskResult.is_late)
+            .where(TaskResult.task_id.in_(ids))
+        )
+        for task_id, employee_id, is_late in result.all():
+            snapshot["results"][task_id][employee_id] = int(bool(is_late))
+
+        result = await session.execute(
+            select(
+                SentNotification.task_id, SentNotification.employee_id,
+                SentNotification.notification_type
+            )
+            .where(SentNotification.task_id.in_(ids))
+            .union(
+                select(
+                    NotificationOutbox.task_id, NotificationOutbox.employee_id,
+                    NotificationOutbox.notification_type
+                )
+                .where(NotificationOutbox.task_id.in_(ids))
+            )
+        )
+        snapshot["sent"] = {tuple(row) for row in result.all()}
+
+    return snapshot
+
+
 async def check_notification_sent(
     task_id: int, employee_id: int, notification_type: str
 ) -> bool:
@@ -1164,38 +1972,186 @@ async def check_notification_sent(
         return False
 
 
+async def mark_notifications_sent(rows: List[dict]) -> List[Tuple[int, int, str]]:
+    """Bildirishnomalarni yuborilgan deb belgilash (bitta so'rov).
+    rows: task_id, employee_id, notification_type.
+    Faqat yangi belgilangan kalitlar qaytariladi - chaqiruvchi shu kalitlar
+    bo'yicha xabar yuboradi (claim-then-send).
+    Xatolik chaqiruvchiga uzatiladi (ziddiyat bilan adashtirmaslik uchun).
+    """
+    if not rows:
+        return []
+
+    now = _tashkent_now()
+    async with get_session() as session:
+        stmt = (
+            pg_insert(SentNotification)
+            .values([
+                {
+                    "notify_day": business_day(now),
+                    "task_id": row["task_id"],
+                    "employee_id": row["employee_id"],
+                    "notification_type": row["notification_type"],
+                    "sent_at": now,
+                }
+                for row in rows
+            ])
+            .on_conflict_do_nothing(constraint='uq_notification')
+            .returning(
+                SentNotification.task_id,
+                SentNotification.employee_id,
+                SentNotification.notification_type,
+            )
+        )
+        result = await session.execute(stmt)
+        inserted = [tuple(row) for row in result.all()]
+        await session.commit()
+        return inserted
+
+
 async def mark_notification_sent(
     task_id: int, employee_id: int, notification_type: str
 ) -> bool:
     """Bildirishnoma yuborilganligini belgilash"""
     try:
-        async with get_session() as session:
-            # Avval mavjudligini tekshirish (UNIQUE constraint)
-            result = await session.execute(
-                select(SentNotification.id).where(
-                    SentNotification.task_id == task_id,
-                    SentNotification.employee_id == employee_id,
-                    SentNotification.notification_type
-                    == notification_type
-                )
-            )
-            if result.scalar_one_or_none() is not None:
-                return True  # Allaqachon belgilangan
-
-            notification = SentNotification(
-                task_id=task_id,
-                employee_id=employee_id,
-                notification_type=notification_type
-            )
-            session.add(notification)
-            await session.commit()
-            return True
+        await mark_notifications_sent([{
+            "task_id": task_id,
+            "employee_id": employee_id,
+            "notification_type": notification_type,
+        }])
+        return True
     except Exception as e:
         logger.error(f"mark_notification_sent error: {e}")
         return False
 
 
-async def get_task_result_by_id(result_id: int) -> Optional[dict]:
+# ============== NOTIFICATION OUTBOX ==============
+
+async def enqueue_notifications(rows: List[dict]) -> List[dict]:
+    """Bildirishnomalarni outbox ga qo'shish (bitta so'rov).
+    rows: task_id, employee_id, notification_type, chat_id, text.
+    Takroriy (allaqachon navbatda yoki yuborilgan) xabarlar e'tiborsiz qoldiriladi.
+    Faqat yangi qo'shilgan qatorlar qaytariladi.
+    """
+    if not rows:
+        return []
+
+    async with get_session() as session:
+        stmt = (
+            pg_insert(NotificationOutbox)
+            .values([
+                {
+                    "task_id": row["task_id"],
+                    "employee_id": row["employee_id"],
+                    "notification_type": row["notification_type"],
+                    "chat_id": row["chat_id"],
+                    "text": row["text"],
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": _tashkent_now(),
+                    "created_at": _tashkent_now(),
+                }
+                for row in rows
+            ])
+            .on_conflict_do_nothing(constraint='uq_outbox_message')
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.task_id,
+                NotificationOutbox.employee_id,
+                NotificationOutbox.notification_type,
+            )
+        )
+        result = await session.execute(stmt)
+        inserted = [dict(row._mapping) for row in result.all()]
+        await session.commit()
+        return inserted
+
+
+async def claim_outbox_batch(
+    limit: int = 100, lease_seconds: int = 120
+) -> List[dict]:
+    """Yuborish uchun navbatdagi xabarlarni band qilish.
+    FOR UPDATE SKIP LOCKED - bir nechta drainer bir xil xabarni olmaydi.
+    'sending' holatida qolib ketgan (jarayon o'lgan) xabarlar
+    lease tugagach qayta olinadi.
+    """
+    now = _tashkent_now()
+    async with get_session() as session:
+        due_ids = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.status.in_(('pending', 'sending')),
+                NotificationOutbox.next_attempt_at <= now,
+            )
+            .order_by(NotificationOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due_ids))
+            .values(
+                status='sending',
+                attempts=NotificationOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.chat_id,
+                NotificationOutbox.text,
+                NotificationOutbox.attempts,
+            )
+        )
+        batch = [dict(row._mapping) for row in result.all()]
+        await session.commit()
+        return sorted(batch, key=lambda x: x['id'])
+
+
+async def mark_outbox_sent(outbox_ids: List[int]) -> int:
+    """Yuborilgan xabarlarni belgilash"""
+    if not outbox_ids:
+        return 0
+    async with get_session() as session:
+        result = await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(outbox_ids))
+            .values(status='sent', sent_at=_tashkent_now(), last_error=None)
+        )
+        await session.commit()
+        return result.rowcount
+
+
+async def mark_outbox_failed(failures: List[dict]) -> int:
+    """Yuborilmagan xabarlarni qayta urinishga qo'yish.
+    failures: id, error, retry_at (None bo'lsa - butunlay 'failed').
+    """
+    if not failures:
+        return 0
+    # Bitta UPDATE ... FROM unnest(...) - qator boshiga alohida so'rov emas
+    async with get_session() as session:
+        result = await session.execute(
+            text(
+                "UPDATE notification_outbox AS o "
+                "SET status = CASE WHEN f.retry_at IS NULL THEN 'failed' ELSE 'pending' END, "
+                "    next_attempt_at = COALESCE(f.retry_at, :now), "
+                "    last_error = f.error "
+                "FROM unnest(CAST(:ids AS integer[]), CAST(:errors AS text[]), "
+                "            CAST(:retry_at AS timestamp[])) AS f(id, error, retry_at) "
+                "WHERE o.id = f.id"
+            ),
+            {
+                "ids": [item['id'] for item in failures],
+                "errors": [item.get('error') for item in failures],
+                "retry_at": [item.get('retry_at') for item in failures],
+                "now": _tashkent_now(),
+            }
+        )
+        await session.commit()
+        return result.rowcount
+
+
+async def get_task_result_by_id(result_id: int) -> Optional[TaskResultRecord]:
     """Natija ID orqali natijani olish (barcha ma'lumotlar bilan)"""
     async with get_session() as session:
         result = await session.execute(
@@ -1223,13 +2179,13 @@ async def get_task_result_by_id(result_id: int) -> Optional[dict]:
         if not row:
             return None
 
-        result_dict = dict_from_row(row[0])
-        result_dict["first_name"] = row[1] or "Noma'lum"
-        result_dict["last_name"] = row[2] or ""
-        result_dict["branch_name"] = row[3] or "Noma'lum"
-        result_dict["title"] = row[4] or "Noma'lum"
-        result_dict["task_id"] = row[5]
-        return result_dict
+        return TaskResultRecord.from_row(
+            row[0],
+            first_name=row[1] or "Noma'lum",
+            last_name=row[2] or "",
+            branch_name=row[3] or "Noma'lum",
+            title=row[4] or "Noma'lum",
+        )
 
 
 async def clear_task_notifications(task_id: int) -> bool:
@@ -1240,6 +2196,10 @@ async def clear_task_notifications(task_id: int) -> bool:
                 delete(SentNotification)
                 .where(SentNotification.task_id == task_id)
             )
+            await session.execute(
+                delete(NotificationOutbox)
+                .where(NotificationOutbox.task_id == task_id)
+            )
             await session.commit()
             return True
     except Exception as e:
@@ -1250,16 +2210,15 @@ async def clear_task_notifications(task_id: int) -> bool:
 async def clear_all_notifications() -> bool:
     """Barcha bildirishnomalarni tozalash (kunlik qayta tiklash uchun)"""
     try:
+        # Kechagi bildirishnomalar tarixga ko'chiriladi (DELETE emas)
+        moved = await rotate_daily_partitions(SentNotification.__tablename__)
+
         async with get_session() as session:
-            result = await session.execute(
-                select(func.count(SentNotification.id))
-            )
-            count = result.scalar() or 0
-            
-            await session.execute(delete(SentNotification))
+            # Kechagi navbat ham tozalanadi - har kunlik vazifalar qayta yuborilishi uchun
+            await session.execute(delete(NotificationOutbox))
             await session.commit()
-            logger.info(f"✅ {count} ta bildirishnoma tozalandi")
-            return True
+        logger.info(f"✅ {moved} ta kunlik bildirishnoma bo'lagi tarixga ko'chirildi")
+        return True
     except Exception as e:
         logger.error(f"clear_all_notifications error: {e}")
         return False
@@ -1268,16 +2227,14 @@ async def clear_all_notifications() -> bool:
 async def clear_all_task_results() -> bool:
     """Barcha vazifa natijalarini tozalash (kunlik qayta tiklash uchun)"""
     try:
+        # Kechagi natijalar task_results_history ga ko'chiriladi (DELETE emas)
+        moved = await rotate_daily_partitions(TaskResult.__tablename__)
+
         async with get_session() as session:
-            result = await session.execute(
-                select(func.count(TaskResult.id))
-            )
-            count = result.scalar() or 0
-            
-            await session.execute(delete(TaskResult))
+            await session.execute(delete(TaskResultCounter))
             await session.commit()
-            logger.info(f"✅ {count} ta vazifa natijasi tozalandi")
-            return True
+        logger.info(f"✅ {moved} ta kunlik natija bo'lagi tarixga ko'chirildi")
+        return True
     except Exception as e:
         logger.error(f"clear_all_task_results error: {e}")
         return False
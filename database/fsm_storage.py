@@ -0,0 +1,186 @@
+"""
+PostgreSQL FSM storage (aiogram)
+
+MemoryStorage o'rniga: holatlar fsm_states jadvalida saqlanadi, shuning
+uchun bot qayta ishga tushganda yoki bir nechta jarayonda ishlaganda ham
+boshlangan jarayonlar (vazifa yaratish, natija yuborish) yo'qolmaydi.
+
+Yozishlarni birlashtirish: update davomida (FSMWriteBufferMiddleware)
+set_state / set_data / update_data faqat xotiradagi buferga yoziladi va
+update oxirida har bir kalit uchun bitta UPSERT bajariladi.
+Bufer yo'q bo'lsa (masalan, scheduler dan) - darhol yoziladi.
+
+Eskirgan holatlar (FSM_STATE_TTL_HOURS) o'qishda e'tiborsiz qoldiriladi
+va delete_expired_states() orqali o'chiriladi.
+"""
+import copy
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import case, delete, literal, select
+
+from config import FSM_STATE_TTL_HOURS
+from database import db_postgres
+from database.db_postgres import FSMState, get_session, pg_insert, _tashkent_now
+
+# Joriy update buferi: {kalit: {'state': .., 'data': .., 'dirty': set(), 'loaded': bool}}
+_write_buffer: ContextVar[Optional[Dict[str, dict]]] = ContextVar(
+    "fsm_write_buffer", default=None
+)
+
+
+def _build_key(key: StorageKey) -> str:
+    return ":".join(
+        str(part) for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id,
+            getattr(key, "business_connection_id", None), key.destiny
+        )
+    )
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+
+class PostgresStorage(BaseStorage):
+    """fsm_states jadvalidagi FSM storage"""
+
+    def __init__(self, ttl: timedelta = timedelta(hours=FSM_STATE_TTL_HOURS)):
+        self.ttl = ttl
+
+    # ---------- bufer ----------
+
+    @asynccontextmanager
+    async def buffer(self):
+        """Update davomidagi yozishlarni yig'ib, oxirida bitta UPSERT qilish"""
+        token = _write_buffer.set({})
+        try:
+            yield
+        finally:
+            entries = _write_buffer.get()
+            _write_buffer.reset(token)
+            await self._flush(entries)
+
+    async def _entry(self, key: StorageKey) -> dict:
+        """Kalit yozuvi: buferda bo'lsa - buferdan, aks holda bazadan.
+        Buferda faqat yozilgan maydonlar bo'lsa, qolganlari bazadan to'ldiriladi.
+        """
+        buffer = _write_buffer.get()
+        db_key = _build_key(key)
+        entry = buffer.get(db_key) if buffer is not None else None
+        if entry is not None and entry.get("loaded"):
+            return entry
+
+        async with get_session() as session:
+            result = await session.execute(
+                select(FSMState.state, FSMState.data).where(
+                    FSMState.key == db_key,
+                    FSMState.updated_at >= _tashkent_now() - self.ttl
+                )
+            )
+            row = result.first()
+
+        stored = {
+            "state": row.state if row else None,
+            "data": dict(row.data) if row else {},
+        }
+        if entry is None:
+            entry = {"dirty": set()}
+            if buffer is not None:
+                buffer[db_key] = entry
+        for field, value in stored.items():
+            if field not in entry["dirty"]:
+                entry[field] = value
+        entry["loaded"] = True
+        return entry
+
+    async def _write(self, key: StorageKey, field: str, value: Any):
+        buffer = _write_buffer.get()
+        db_key = _build_key(key)
+        if buffer is None:
+            await self._flush({db_key: {field: value, "dirty": {field}}})
+            return
+
+        entry = buffer.setdefault(db_key, {"dirty": set()})
+        entry[field] = value
+        entry["dirty"].add(field)
+
+    async def _flush(self, entries: Dict[str, dict]):
+        dirty = {k: e for k, e in entries.items() if e["dirty"]}
+        if not dirty:
+            return
+
+        now = _tashkent_now()
+        cutoff = now - self.ttl
+        table = FSMState.__table__
+        async with get_session() as session:
+            for db_key, entry in dirty.items():
+                values = {
+                    "key": db_key,
+                    "state": entry.get("state"),
+                    "data": entry.get("data") or {},
+                    "updated_at": now,
+                }
+                stmt = pg_insert(FSMState).values(**values)
+                # Yozilmagan ustun saqlanadi, lekin eskirgan yozuvdan meros olinmaydi
+                set_ = {"updated_at": stmt.excluded.updated_at}
+                for field, empty in (("state", None), ("data", {})):
+                    if field in entry["dirty"]:
+                        set_[field] = getattr(stmt.excluded, field)
+                    else:
+                        set_[field] = case(
+                            (table.c.updated_at < cutoff, literal(empty, table.c[field].type)),
+                            else_=table.c[field]
+                        )
+                await session.execute(
+                    stmt.on_conflict_do_update(index_elements=[FSMState.key], set_=set_)
+                )
+
+            # Bo'sh holatlarni saqlab o'tirmaslik (state.clear())
+            maybe_empty = [
+                db_key for db_key, entry in dirty.items()
+                if not entry.get("state") and not entry.get("data")
+            ]
+            if maybe_empty:
+                await session.execute(
+                    delete(FSMState).where(
+                        FSMState.key.in_(maybe_empty),
+                        FSMState.state.is_(None),
+                        FSMState.data == {}
+                    )
+                )
+            await session.commit()
+
+    # ---------- BaseStorage ----------
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, "state", _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._entry(key)).get("state")
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, "data", copy.deepcopy(dict(data)))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return copy.deepcopy((await self._entry(key)).get("data") or {})
+
+    async def close(self) -> None:
+        # Engine db_postgres.close_db() da yopiladi
+        pass
+
+
+async def delete_expired_states(ttl: timedelta = timedelta(hours=FSM_STATE_TTL_HOURS)) -> int:
+    """Eskirgan FSM holatlarini o'chirish (scheduler orqali)"""
+    if db_postgres.async_session_maker is None:
+        return 0
+    async with get_session() as session:
+        result = await session.execute(
+            delete(FSMState).where(FSMState.updated_at < _tashkent_now() - ttl)
+        )
+        await session.commit()
+        return result.rowcount or 0
@@ -0,0 +1,101 @@
+"""
+So'rovlarni birlashtiruvchi yuklagich (DataLoader)
+
+Broadcastdan keyin yuzlab xodim bir vaqtda "📋 Vazifalarim" ni bosganda
+bir xil get_task / get_branch so'rovlari parallel yuzlab marta bajariladi.
+DataLoader ularni ikki bosqichda birlashtiradi:
+    • single-flight - bajarilayotgan kalit uchun yangi so'rov yuborilmaydi,
+      chaqiruvchi o'sha natijani kutadi
+    • batch - bitta event-loop tikida kelgan turli kalitlar bitta
+      WHERE id = ANY(...) so'rovi bilan olinadi
+
+Natija keshlanmaydi: so'rov tugashi bilan kalit unutiladi, keyingi
+chaqiruv bazadan yangi qiymat oladi.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchFunction = Callable[[List[Hashable]], Awaitable[Dict[Hashable, object]]]
+
+
+class DataLoader:
+    """Kalit bo'yicha o'qishlarni birlashtirish.
+    batch_fn kalitlar ro'yxatini olib {kalit: qiymat} qaytaradi
+    (topilmagan kalitlar uchun - None).
+    """
+
+    def __init__(self, batch_fn: BatchFunction, max_batch_size: int = 500):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Tuple[Hashable, asyncio.Future]] = []
+        self._scheduled = False
+        self._tasks = set()
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+
+    async def load(self, key: Hashable) -> Optional[object]:
+        self.requests += 1
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._queue.append((key, future))
+            if not self._scheduled:
+                # Shu tikda kelgan boshqa kalitlar ham shu batch ga qo'shiladi
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        else:
+            self.coalesced += 1
+        # Bitta chaqiruvchi bekor qilinsa, umumiy so'rov boshqalar uchun davom etadi
+        return await asyncio.shield(future)
+
+    def forget(self, key: Hashable):
+        """Yozishdan keyin: bajarilayotgan (eski) o'qishga yangi chaqiruvlar qo'shilmasin"""
+        self._inflight.pop(key, None)
+
+    def _dispatch(self):
+        queue, self._queue = self._queue, []
+        self._scheduled = False
+        for start in range(0, len(queue), self.max_batch_size):
+            task = asyncio.create_task(self._run(queue[start:start + self.max_batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, futures: List[Tuple[Hashable, asyncio.Future]]):
+        keys = [key for key, _ in futures]
+        self.batches += 1
+        try:
+            results = await self.batch_fn(keys)
+        except Exception as e:
+            logger.error(f"DataLoader batch error ({len(keys)} keys): {e}")
+            for key, future in futures:
+                self._finish(key, future)
+                if not future.done():
+                    future.set_exception(e)
+                    # Barcha chaqiruvchilar bekor qilingan bo'lsa ham ogohlantirish chiqmasin
+                    future.exception()
+            return
+
+        for key, future in futures:
+            self._finish(key, future)
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        # forget() dan keyin shu kalit uchun yangi so'rov boshlangan bo'lishi mumkin
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "queries_saved": self.requests - self.batches,
+        }
@@ -0,0 +1,65 @@
+"""
+Alembic muhiti
+
+Ikki xil ishga tushadi:
+    • init_db dan - tayyor ulanish config.attributes["connection"] orqali
+      beriladi, migratsiyalar init_db tranzaksiyasi ichida bajariladi
+    • CLI dan (alembic upgrade head) - DATABASE_URL bo'yicha o'z ulanishi bilan
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import DATABASE_URL
+from database.db_postgres import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Kunlik bo'laklar (task_results_20261016 ...) modelda yo'q - autogenerate ularga tegmasin
+    if type_ == "table" and reflected and compare_to is None:
+        return False
+    return True
+
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations():
+    engine = create_async_engine(DATABASE_URL)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+def run_migrations_offline():
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif "connection" in config.attributes:
+    do_run_migrations(config.attributes["connection"])
+else:
+    asyncio.run(run_async_migrations())
@@ -0,0 +1,257 @@
+"""Boshlang'ich sxema: jadvallar va task_audience triggerlari
+
+Migratsiyalar kiritilgan paytdagi sxema (0002 indekslarisiz) aniq DDL
+sifatida muzlatilgan - modellar keyin o'zgarsa ham bu revision o'zgarmaydi.
+
+Alembic dan oldingi bazalarda jadvallar allaqachon mavjud - faqat
+yetishmayotgan jadvallar va indekslar yaratiladi. Kunlik bo'laklar sxema
+emas, ular har ishga tushishda init_db da yaratiladi.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from config import TIMEZONE, DAILY_RESET_HOUR, DAILY_RESET_MINUTE
+from database.db_postgres import _TASK_AUDIENCE_DDL, _TASK_AUDIENCE_REBUILD_SQL
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Partition kaliti uchun ish kuni (kunlik qayta tiklash vaqtigacha oldingi kun)
+BUSINESS_DAY_SQL = sa.text(
+    f"((now() AT TIME ZONE '{TIMEZONE}') "
+    f"- interval '{DAILY_RESET_HOUR} hours {DAILY_RESET_MINUTE} minutes')::date"
+)
+
+# Yaratilish tartibida (tashqi kalitlar oldin) - downgrade teskari tartibda o'chiradi
+TABLES = (
+    "branches", "employees", "tasks", "task_branches", "task_audience",
+    "task_results", "task_result_counters", "used_photos", "sent_notifications",
+    "notification_outbox", "fsm_states", "task_results_history", "sent_notifications_history",
+)
+
+
+def _task_results_columns(history: bool = False) -> list:
+    if history:
+        # Tarix jadvali - ustunlar bir xil, cheklovlar va defaultlarsiz
+        return [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("result_day", sa.Date(), nullable=False),
+            sa.Column("task_id", sa.Integer(), nullable=False),
+            sa.Column("employee_id", sa.Integer(), nullable=False),
+            sa.Column("result_text", sa.Text(), nullable=True),
+            sa.Column("result_photo_id", sa.String(500), nullable=True),
+            sa.Column("file_unique_id", sa.String(500), nullable=True),
+            sa.Column("is_late", sa.Boolean(), nullable=True),
+            sa.Column("submitted_at", sa.DateTime(), nullable=True),
+        ]
+    return [
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("result_day", sa.Date(), primary_key=True, server_default=BUSINESS_DAY_SQL),
+        sa.Column(
+            "task_id", sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "employee_id", sa.Integer(),
+            sa.ForeignKey("employees.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("result_text", sa.Text(), nullable=True),
+        sa.Column("result_photo_id", sa.String(500), nullable=True),
+        sa.Column("file_unique_id", sa.String(500), nullable=True),
+        sa.Column("is_late", sa.Boolean(), nullable=True),
+        sa.Column("submitted_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("task_id", "employee_id", "result_day", name="uq_task_employee"),
+    ]
+
+
+def _sent_notifications_columns(history: bool = False) -> list:
+    if history:
+        return [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("notify_day", sa.Date(), nullable=False),
+            sa.Column("task_id", sa.Integer(), nullable=False),
+            sa.Column("employee_id", sa.Integer(), nullable=False),
+            sa.Column("notification_type", sa.String(100), nullable=False),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+        ]
+    return [
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("notify_day", sa.Date(), primary_key=True, server_default=BUSINESS_DAY_SQL),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("notification_type", sa.String(100), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "task_id", "employee_id", "notification_type", "notify_day",
+            name="uq_notification"
+        ),
+    ]
+
+
+def _create_tables(existing: set):
+    def create(name, *columns, **kwargs):
+        if name not in existing:
+            op.create_table(name, *columns, **kwargs)
+
+    create(
+        "branches",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    create(
+        "employees",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("first_name", sa.String(255), nullable=False),
+        sa.Column("last_name", sa.String(255), nullable=False),
+        sa.Column(
+            "branch_id", sa.Integer(),
+            sa.ForeignKey("branches.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("shift", sa.String(50), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    create(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("title", sa.String(500), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("task_type", sa.String(50), nullable=False),
+        sa.Column("result_type", sa.String(50), nullable=False),
+        sa.Column("shift", sa.String(50), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("deadline", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    create(
+        "task_branches",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "task_id", sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "branch_id", sa.Integer(),
+            sa.ForeignKey("branches.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.UniqueConstraint("task_id", "branch_id", name="uq_task_branch"),
+    )
+    create(
+        "task_audience",
+        sa.Column(
+            "task_id", sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column(
+            "employee_id", sa.Integer(),
+            sa.ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True
+        ),
+    )
+    create(
+        "task_results", *_task_results_columns(),
+        postgresql_partition_by="RANGE (result_day)"
+    )
+    create(
+        "task_result_counters",
+        sa.Column(
+            "task_id", sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("submitted", sa.Integer(), nullable=False),
+    )
+    create(
+        "used_photos",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_unique_id", sa.String(500), nullable=False, unique=True),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("used_at", sa.DateTime(), nullable=True),
+    )
+    create(
+        "sent_notifications", *_sent_notifications_columns(),
+        postgresql_partition_by="RANGE (notify_day)"
+    )
+    create(
+        "notification_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("notification_type", sa.String(100), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "task_id", "employee_id", "notification_type", "chat_id",
+            name="uq_outbox_message"
+        ),
+    )
+    create(
+        "fsm_states",
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("state", sa.String(255), nullable=True),
+        sa.Column("data", postgresql.JSONB(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    create(
+        "task_results_history", *_task_results_columns(history=True),
+        postgresql_partition_by="RANGE (result_day)"
+    )
+    create(
+        "sent_notifications_history", *_sent_notifications_columns(history=True),
+        postgresql_partition_by="RANGE (notify_day)"
+    )
+
+
+def _create_indexes():
+    indexes = (
+        ("ix_employees_telegram_id", "employees", ["telegram_id"], {"unique": True}),
+        ("ix_employees_branch_id", "employees", ["branch_id"], {}),
+        ("ix_tasks_is_active", "tasks", ["is_active"], {}),
+        ("ix_task_branches_task_id", "task_branches", ["task_id"], {}),
+        ("ix_task_audience_employee_id", "task_audience", ["employee_id"], {}),
+        ("ix_task_results_task_id", "task_results", ["task_id"], {}),
+        ("ix_sent_notifications_task_id", "sent_notifications", ["task_id"], {}),
+        ("ix_notification_outbox_task_id", "notification_outbox", ["task_id"], {}),
+        (
+            "ix_outbox_due", "notification_outbox", ["next_attempt_at"],
+            {"postgresql_where": sa.text("status IN ('pending', 'sending')")}
+        ),
+        ("ix_fsm_states_updated_at", "fsm_states", ["updated_at"], {}),
+    )
+    for name, table, columns, kwargs in indexes:
+        op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _create_tables(existing)
+    _create_indexes()
+
+    for statement in _TASK_AUDIENCE_DDL:
+        op.execute(statement)
+    op.execute("DELETE FROM task_audience")
+    op.execute(_TASK_AUDIENCE_REBUILD_SQL)
+
+
+def downgrade():
+    for function in ("task_audience_on_task", "task_audience_on_task_branch", "task_audience_on_employee"):
+        op.execute(f"DROP FUNCTION IF EXISTS {function}() CASCADE")
+    # Kunlik bo'laklar asosiy jadval bilan birga o'chiriladi
+    for table in reversed(TABLES):
+        op.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
@@ -0,0 +1,57 @@
+"""So'rov shakllariga mos indekslar
+
+    task_results (employee_id, task_id)   - xodim bo'yicha natijalar, employees
+                                            dan CASCADE o'chirish
+    employees (branch_id, shift) WHERE is_active
+                                          - filial/smena bo'yicha faol xodimlar
+                                            (statistika, task_audience triggerlari)
+    tasks (task_type) WHERE is_active     - get_daily_tasks
+    task_branches (branch_id)             - filial bo'yicha vazifalar
+
+task_results (task_id) indeksi o'chiriladi - uq_task_employee
+(task_id, employee_id, result_day) prefiksi bilan takrorlanadi.
+
+Indekslar modellarda ham e'lon qilingan - create_all bilan yaratilgan
+(benchmark) bazalarda ular allaqachon bor (if_not_exists).
+
+Revision ID: 0002_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_query_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_task_results_employee_task", "task_results", ["employee_id", "task_id"],
+        if_not_exists=True
+    )
+    op.create_index(
+        "ix_employees_branch_shift_active", "employees", ["branch_id", "shift"],
+        postgresql_where=sa.text("is_active"), if_not_exists=True
+    )
+    op.create_index(
+        "ix_tasks_type_active", "tasks", ["task_type"],
+        postgresql_where=sa.text("is_active"), if_not_exists=True
+    )
+    op.create_index(
+        "ix_task_branches_branch", "task_branches", ["branch_id"],
+        if_not_exists=True
+    )
+    op.drop_index("ix_task_results_task_id", table_name="task_results", if_exists=True)
+
+
+def downgrade():
+    op.create_index(
+        "ix_task_results_task_id", "task_results", ["task_id"], if_not_exists=True
+    )
+    op.drop_index("ix_task_branches_branch", table_name="task_branches", if_exists=True)
+    op.drop_index("ix_tasks_type_active", table_name="tasks", if_exists=True)
+    op.drop_index("ix_employees_branch_shift_active", table_name="employees", if_exists=True)
+    op.drop_index("ix_task_results_employee_task", table_name="task_results", if_exists=True)
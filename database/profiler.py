@@ -0,0 +1,239 @@
+"""
+SQL so'rovlar profileri va N+1 detektori
+
+SQLAlchemy engine hodisalari (before/after_cursor_execute) va xom asyncpg
+o'qishlari (_raw_connection) har bir so'rovni joriy profilga yozadi:
+so'rov shakli (fingerprint - literal va parametrlarsiz), davomiyligi va
+qatorlar soni.
+
+Profil - bitta Telegram update (QueryProfilerMiddleware; nomi - update ni
+qabul qilgan handler) yoki scheduler job ning bitta ishga tushishi (@profiled).
+Profil yopilganda alohida logga (SLOW_QUERY_LOG_FILE) yoziladi:
+    • SLOW_QUERY_MS dan uzoq davom etgan so'rovlar - profil nomi bilan
+    • bir xil fingerprint QUERY_PROFILER_REPEAT_THRESHOLD dan ko'p
+      bajarilgan bo'lsa - N+1 ogohlantirishi (masalan, sikl ichida get_*)
+
+QUERY_PROFILER_ENABLED o'chiq bo'lsa install() chaqirilmaydi va
+query_profile() / @profiled hech narsa qilmaydi.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Dict, List, Optional, Tuple
+
+from config import QUERY_PROFILER_REPEAT_THRESHOLD, SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+# Log da so'rov matni shu uzunlikkacha qisqartiriladi
+STATEMENT_PREVIEW = 500
+
+_NORMALIZE = [
+    # Satr literallari, asyncpg ($1) va pyformat parametrlari, sonlar
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s"), "?"),
+    (re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b"), "?"),
+    # IN (?, ?, ?) -> IN (?)
+    (re.compile(r"\?(?:\s*,\s*\?)+"), "?"),
+    # Ko'p qatorli VALUES (...), (...) -> bitta qator
+    (re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+"), r"\1"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """So'rov shakli: qiymatlari har xil, lekin bir xil so'rovlar bitta kalitga tushadi"""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def _preview(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > STATEMENT_PREVIEW:
+        return statement[:STATEMENT_PREVIEW] + "..."
+    return statement
+
+
+class QueryStat:
+    """Bitta fingerprint bo'yicha yig'indi"""
+    __slots__ = ("count", "seconds", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+
+class QueryProfile:
+    """Bitta update yoki scheduler job davomidagi so'rovlar"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats: Dict[str, QueryStat] = {}
+        self.slow: List[Tuple[float, int, str]] = []
+        self.started = time.perf_counter()
+
+    @property
+    def queries(self) -> int:
+        return sum(stat.count for stat in self.stats.values())
+
+    def record(self, statement: str, seconds: float, rows: int):
+        key = fingerprint(statement)
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = QueryStat()
+        stat.count += 1
+        stat.seconds += seconds
+        stat.rows += rows
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self.slow.append((seconds, rows, statement))
+
+    def repeated(self, threshold: int = QUERY_PROFILER_REPEAT_THRESHOLD) -> List[Tuple[str, QueryStat]]:
+        """threshold dan ko'p bajarilgan fingerprintlar, eng ko'pi birinchi"""
+        return sorted(
+            ((key, stat) for key, stat in self.stats.items() if stat.count > threshold),
+            key=lambda item: item[1].count,
+            reverse=True
+        )
+
+    def report(self):
+        """Sekin so'rovlar va N+1 ogohlantirishlari - profil nomi (handler) bilan"""
+        for seconds, rows, statement in self.slow:
+            logger.warning(
+                f"🐢 {self.name}: {seconds * 1000:.0f} ms, {rows} qator - {_preview(statement)}"
+            )
+        for key, stat in self.repeated():
+            logger.warning(
+                f"🔁 N+1 {self.name}: {stat.count} marta, {stat.seconds * 1000:.0f} ms, "
+                f"{stat.rows} qator - {_preview(key)}"
+            )
+        logger.debug(
+            f"{self.name}: {self.queries} so'rov ({len(self.stats)} xil), "
+            f"{(time.perf_counter() - self.started) * 1000:.0f} ms"
+        )
+
+
+_enabled = False
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+@contextmanager
+def query_profile(name: str):
+    """Profil ochish. Ichma-ich chaqiruvlar tashqi profilga yoziladi
+    (masalan, job ichidan chaqirilgan boshqa profiled funksiya).
+    """
+    current = _current_profile.get()
+    if not _enabled or current is not None:
+        yield current
+        return
+
+    profile = QueryProfile(name)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+        profile.report()
+
+
+def set_profile_name(name: str):
+    """Joriy profil nomini almashtirish (update ni qabul qilgan handler aniqlanganda)"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.name = name
+
+
+def profiled(name: str):
+    """Scheduler job uchun: har bir ishga tushish - alohida profil"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with query_profile(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(statement: str, seconds: float, rows: int):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds, rows)
+    elif seconds * 1000 >= SLOW_QUERY_MS:
+        # Update / job dan tashqarida (ishga tushish, migratsiyalar) - darhol
+        logger.warning(f"🐢 -: {seconds * 1000:.0f} ms, {rows} qator - {_preview(statement)}")
+
+
+# ============== SQLALCHEMY ENGINE ==============
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Ichki _cursor_execute chaqiruvlarida context bo'lmasligi mumkin
+    if context is not None:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profiler_started", None)
+    if started is None:
+        return
+    rowcount = cursor.rowcount
+    record(statement, time.perf_counter() - started, rowcount if rowcount and rowcount > 0 else 0)
+
+
+def install(engine):
+    """Engine hodisalarini ulash (init_db, QUERY_PROFILER_ENABLED bo'lsa)"""
+    global _enabled
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    _enabled = True
+
+
+# ============== XOM ASYNCPG O'QISHLARI ==============
+
+class ProfiledConnection:
+    """asyncpg ulanishi o'rami - engine hodisalaridan o'tmaydigan so'rovlar uchun"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def fetch(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        rows = await self._conn.fetch(query, *args, **kwargs)
+        record(query, time.perf_counter() - started, len(rows))
+        return rows
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        row = await self._conn.fetchrow(query, *args, **kwargs)
+        record(query, time.perf_counter() - started, 0 if row is None else 1)
+        return row
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        value = await self._conn.fetchval(query, *args, **kwargs)
+        record(query, time.perf_counter() - started, 0 if value is None else 1)
+        return value
+
+    async def execute(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        status = await self._conn.execute(query, *args, **kwargs)
+        # "UPDATE 3" / "INSERT 0 5" - oxirgi son ta'sirlangan qatorlar
+        rows = status.rsplit(" ", 1)[-1]
+        record(query, time.perf_counter() - started, int(rows) if rows.isdigit() else 0)
+        return status
+
+
+def wrap_connection(conn):
+    """_raw_connection uchun: profiler yoqilgan bo'lsa o'ralgan ulanish"""
+    return ProfiledConnection(conn) if _enabled else conn
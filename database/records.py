@@ -0,0 +1,140 @@
+"""
+Ixcham yozuv turlari (__slots__)
+
+dict_from_row o'rniga: har bir qator uchun dict yaratilmaydi, datetime
+string ga aylantirilmaydi (va keyin strptime bilan qayta o'qilmaydi),
+bool int ga aylantirilmaydi - qiymatlar bazadagi turida saqlanadi.
+
+Handlerlar bilan moslik uchun eski dict uslubi ham ishlaydi:
+    task.title == task['title'] == task.get('title')
+    employee['branch_name'] = ...      (faqat e'lon qilingan maydonlar)
+    dict(task), task.copy()
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class Record:
+    """Yozuvlar uchun asosiy klass.
+    COLUMNS - ORM modeldan olinadigan ustunlar, qolgan __slots__ - so'rov
+    qo'shadigan maydonlar (masalan, branch_name).
+    """
+    __slots__ = ()
+    COLUMNS: Tuple[str, ...] = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_row(cls, row, **extra) -> Optional["Record"]:
+        """ORM obyektidan yozuv yaratish"""
+        if row is None:
+            return None
+        record = cls.__new__(cls)
+        for name in cls.COLUMNS:
+            setattr(record, name, getattr(row, name))
+        for name in cls.__slots__[len(cls.COLUMNS):]:
+            setattr(record, name, extra.get(name))
+        return record
+
+    @classmethod
+    def from_mapping(cls, row) -> Optional["Record"]:
+        """Ustun nomlari bo'yicha o'qiladigan qatordan (asyncpg Record, Row._mapping)"""
+        if row is None:
+            return None
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, row.get(name))
+        return record
+
+    # ---------- dict uslubidagi kirish (eski kod uchun) ----------
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.__slots__:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def copy(self) -> "Record":
+        record = self.__class__.__new__(self.__class__)
+        for name in self.__slots__:
+            setattr(record, name, getattr(self, name))
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON uchun dict (datetime - ISO string)"""
+        return {
+            name: value.isoformat() if isinstance(value, (date, datetime)) else value
+            for name, value in self.items()
+        }
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.items() == other.items()
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class BranchRecord(Record):
+    COLUMNS = ("id", "name", "address", "created_at")
+    __slots__ = COLUMNS
+
+
+class EmployeeRecord(Record):
+    COLUMNS = (
+        "id", "telegram_id", "first_name", "last_name",
+        "branch_id", "shift", "is_active", "created_at",
+    )
+    __slots__ = COLUMNS + ("branch_name",)
+
+
+class TaskRecord(Record):
+    COLUMNS = (
+        "id", "title", "description", "task_type", "result_type", "shift",
+        "start_time", "deadline", "created_at", "is_active",
+    )
+    # is_completed / is_late - xodim vazifalari ro'yxati uchun
+    __slots__ = COLUMNS + ("is_completed", "is_late")
+
+
+class TaskResultRecord(Record):
+    COLUMNS = (
+        "id", "result_day", "task_id", "employee_id", "result_text",
+        "result_photo_id", "file_unique_id", "is_late", "submitted_at",
+    )
+    # Natijalar ro'yxati / bitta natija uchun qo'shimcha ma'lumotlar
+    __slots__ = COLUMNS + ("first_name", "last_name", "telegram_id", "branch_name", "title")
@@ -14,6 +14,8 @@ from config import ADMIN_IDS
 from database import db
 from keyboards import admin_kb
 from utils import helpers
+from utils import scheduler as task_scheduler
+from utils.broadcast import broadcaster, BroadcastMessage
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -699,35 +701,50 @@ async def task_confirm_create(callback: CallbackQuery, state: FSMContext):
             deadline=deadline,
             branch_ids=data['selected_branches']
         )
+        await task_scheduler.reschedule_task(task_id)
 
         await state.clear()
 
         employees = await db.get_employees_for_task(task_id)
-        bot = callback.bot
-        notified_count = 0
-
-        for emp in employees:
-            try:
-                await bot.send_message(
-                    chat_id=emp['telegram_id'],
-                    text=f"📋 <b>Yangi vazifa!</b>\n\n"
-                         f"📝 {data['title']}\n"
-                         f"📄 {data['description']}\n\n"
-                         f"🕐 Boshlanish: {helpers.format_datetime(start_time)}\n"
-                         f"⏰ Deadline: {helpers.format_datetime(deadline)}\n\n"
-                         f"Vazifalarni ko'rish uchun '📋 Vazifalarim' tugmasini bosing.",
-                    parse_mode="HTML"
-                )
-                notified_count += 1
-            except Exception as e:
-                logger.error(f"Notification error for {emp['telegram_id']}: {e}")
+        text = (
+            f"📋 <b>Yangi vazifa!</b>\n\n"
+            f"📝 {data['title']}\n"
+            f"📄 {data['description']}\n\n"
+            f"🕐 Boshlanish: {helpers.format_datetime(start_time)}\n"
+            f"⏰ Deadline: {helpers.format_datetime(deadline)}\n\n"
+            f"Vazifalarni ko'rish uchun '📋 Vazifalarim' tugmasini bosing."
+        )
+        messages = [
+            BroadcastMessage(chat_id=emp['telegram_id'], text=text, key=emp['id'])
+            for emp in employees
+        ]
+
+        def progress_text(sent: int, total: int, failed: int = 0, done: bool = False) -> str:
+            status = "✅ yakunlandi" if done else "⏳ yuborilmoqda..."
+            result = (
+                f"✅ <b>Vazifa muvaffaqiyatli yaratildi!</b>\n\n"
+                f"🆔 Vazifa ID: {task_id}\n"
+                f"📬 Xabarnoma ({status}): {sent}/{total} ta xodimga"
+            )
+            if failed:
+                result += f"\n⚠️ Yuborilmadi: {failed} ta"
+            return result
+
+        async def show_progress(job):
+            await callback.message.edit_text(
+                progress_text(job.sent, job.total, job.failed, job.is_done),
+                parse_mode="HTML"
+            )
 
         await callback.message.edit_text(
-            f"✅ <b>Vazifa muvaffaqiyatli yaratildi!</b>\n\n"
-            f"🆔 Vazifa ID: {task_id}\n"
-            f"📬 Xabarnoma yuborildi: {notified_count} ta xodimga",
-            parse_mode="HTML"
+            progress_text(0, len(messages), done=not messages), parse_mode="HTML"
         )
+
+        # Xabarlar fonda yuboriladi - admin darhol javob oladi
+        if messages:
+            broadcaster.start(
+                callback.bot, messages, name=f"task_{task_id}", on_progress=show_progress
+            )
     except Exception as e:
         logger.error(f"Task creation error: {e}")
         await callback.message.edit_text(
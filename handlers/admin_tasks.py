@@ -11,6 +11,7 @@ from config import ADMIN_IDS
 from database import db
 from keyboards import admin_kb
 from utils import helpers
+from utils import scheduler as task_scheduler
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -295,6 +296,7 @@ async def confirm_task_delete(callback: CallbackQuery):
     task_id = int(callback.data.split("_")[3])
 
     await db.delete_task(task_id)
+    await task_scheduler.reschedule_task(task_id)
 
     await callback.message.edit_text(
         "✅ <b>Vazifa muvaffaqiyatli o'chirildi!</b>",
@@ -442,6 +444,7 @@ async def process_edit_start(message: Message, state: FSMContext):
 
     data = await state.get_data()
     await db.update_task(data['editing_task_id'], start_time=start_time)
+    await task_scheduler.reschedule_task(data['editing_task_id'])
     await state.clear()
 
     await message.answer(
@@ -498,6 +501,7 @@ async def process_edit_deadline(message: Message, state: FSMContext):
 
     data = await state.get_data()
     await db.update_task(data['editing_task_id'], deadline=deadline)
+    await task_scheduler.reschedule_task(data['editing_task_id'])
     await state.clear()
 
     await message.answer(
@@ -1,11 +1,13 @@
+from typing import Optional, Union
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from config import ADMIN_IDS
 from database import db
+from database.records import EmployeeRecord
 from keyboards import employee_kb, admin_kb
 from utils import helpers
 
@@ -31,14 +33,32 @@ class SubmitStates(StatesGroup):
     waiting_photo = State()
 
 
+NOT_REGISTERED_TEXT = (
+    "⚠️ Siz ro'yxatdan o'tmagansiz.\n"
+    "Ro'yxatdan o'tish uchun /start buyrug'ini kiriting."
+)
+
+
+async def not_registered(event: Union[Message, CallbackQuery], state: Optional[FSMContext] = None):
+    """Xodim topilmadi (ro'yxatdan o'tmagan yoki o'chirilgan) - eski FSM holati
+    yoki eski inline tugma orqali kelgan update uchun javob
+    """
+    if state is not None:
+        await state.clear()
+    if isinstance(event, CallbackQuery):
+        await event.answer(NOT_REGISTERED_TEXT, show_alert=True)
+    else:
+        await event.answer(NOT_REGISTERED_TEXT)
+
+
 # ============== START ==============
 
 @router.message(CommandStart())
-async def start_command(message: Message):
-    user_id = message.from_user.id
-
+async def start_command(
+    message: Message, is_admin: bool = False, employee: Optional[EmployeeRecord] = None
+):
     # Admin bo'lsa
-    if user_id in ADMIN_IDS:
+    if is_admin:
         await message.answer(
             f"👋 Xush kelibsiz, <b>{message.from_user.first_name}</b>!\n\n"
             f"Siz admin sifatida tizimga kirdingiz.\n"
@@ -49,8 +69,6 @@ async def start_command(message: Message):
         return
 
     # Xodim bo'lsa
-    employee = await db.get_employee_by_telegram_id(user_id)
-
     if employee:
         await message.answer(
             f"👋 Xush kelibsiz, <b>{employee['first_name']}</b>!\n\n"
@@ -184,14 +202,9 @@ async def register_cancel(callback: CallbackQuery, state: FSMContext):
 # ============== PROFIL ==============
 
 @router.message(F.text == "👤 Profilim")
-async def profile_view(message: Message):
-    employee = await db.get_employee_by_telegram_id(message.from_user.id)
-
+async def profile_view(message: Message, employee: Optional[EmployeeRecord] = None):
     if not employee:
-        await message.answer(
-            "⚠️ Siz ro'yxatdan o'tmagansiz.\n"
-            "Ro'yxatdan o'tish uchun /start buyrug'ini kiriting."
-        )
+        await not_registered(message)
         return
 
     await message.answer(
@@ -227,14 +240,19 @@ async def edit_name_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(EditStates.waiting_name)
-async def edit_name_received(message: Message, state: FSMContext):
+async def edit_name_received(
+    message: Message, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(message, state)
+        return
+
     parts = message.text.strip().split(maxsplit=1)
     if len(parts) < 2:
         await message.answer("❌ Iltimos, ism va familiyani kiriting (masalan: Alisher Navoiy)")
         return
 
     first_name, last_name = parts[0], parts[1]
-    employee = await db.get_employee_by_telegram_id(message.from_user.id)
 
     await db.update_employee(
         employee['id'],
@@ -263,10 +281,15 @@ async def edit_branch_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("reg_branch_"), EditStates.selecting_branch)
-async def edit_branch_selected(callback: CallbackQuery, state: FSMContext):
+async def edit_branch_selected(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(callback, state)
+        return
+
     branch_id = int(callback.data.split("_")[2])
     branch = await db.get_branch(branch_id)
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
 
     await db.update_employee(
         employee['id'],
@@ -297,9 +320,14 @@ async def edit_shift_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("reg_shift_"), EditStates.selecting_shift)
-async def edit_shift_selected(callback: CallbackQuery, state: FSMContext):
+async def edit_shift_selected(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(callback, state)
+        return
+
     shift = callback.data.split("_")[2]
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
 
     await db.update_employee(
         employee['id'],
@@ -321,9 +349,14 @@ async def edit_shift_selected(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "profile_back")
-async def profile_back(callback: CallbackQuery, state: FSMContext):
+async def profile_back(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(callback, state)
+        return
+
     await state.clear()
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
 
     await callback.message.edit_text(
         f"👤 <b>Sizning profilingiz</b>\n\n"
@@ -350,8 +383,13 @@ async def profile_delete(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "confirm_delete_profile")
-async def confirm_delete_profile(callback: CallbackQuery):
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
+async def confirm_delete_profile(
+    callback: CallbackQuery, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(callback)
+        return
+
     await db.delete_employee(employee['id'])
 
     await callback.message.edit_text(
@@ -363,14 +401,9 @@ async def confirm_delete_profile(callback: CallbackQuery):
 # ============== VAZIFALAR ==============
 
 @router.message(F.text == "📋 Vazifalarim")
-async def my_tasks(message: Message):
-    employee = await db.get_employee_by_telegram_id(message.from_user.id)
-
+async def my_tasks(message: Message, employee: Optional[EmployeeRecord] = None):
     if not employee:
-        await message.answer(
-            "⚠️ Siz ro'yxatdan o'tmagansiz.\n"
-            "Ro'yxatdan o'tish uchun /start buyrug'ini kiriting."
-        )
+        await not_registered(message)
         return
 
     tasks = await db.get_employee_tasks(employee['id'])
@@ -395,9 +428,14 @@ async def my_tasks(message: Message):
 
 
 @router.callback_query(F.data == "back_to_tasks")
-async def back_to_tasks(callback: CallbackQuery, state: FSMContext):
+async def back_to_tasks(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(callback, state)
+        return
+
     await state.clear()
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
     tasks = await db.get_employee_tasks(employee['id'])
 
     text = "📋 <b>Sizning vazifalaringiz</b>\n\n"
@@ -419,7 +457,11 @@ async def back_to_tasks(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_task_"))
-async def view_task(callback: CallbackQuery):
+async def view_task(callback: CallbackQuery, employee: Optional[EmployeeRecord] = None):
+    if not employee:
+        await not_registered(callback)
+        return
+
     task_id = int(callback.data.split("_")[2])
     task = await db.get_task(task_id)
 
@@ -427,12 +469,10 @@ async def view_task(callback: CallbackQuery):
         await callback.answer("❌ Vazifa topilmadi!", show_alert=True)
         return
 
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
     result = await db.get_task_result(task_id, employee['id'])
     is_completed = result is not None
 
-    from datetime import datetime
-    deadline = datetime.fromisoformat(task['deadline'])
+    deadline = helpers.to_naive(task['deadline'])
     time_left = helpers.time_until(deadline)
 
     status_text = ""
@@ -475,12 +515,16 @@ async def submit_text_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(SubmitStates.waiting_text)
-async def submit_text_received(message: Message, state: FSMContext):
+async def submit_text_received(
+    message: Message, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(message, state)
+        return
+
     data = await state.get_data()
     task_id = data['task_id']
 
-    employee = await db.get_employee_by_telegram_id(message.from_user.id)
-
     result_id, position, is_late = await db.submit_task_result(
         task_id=task_id,
         employee_id=employee['id'],
@@ -489,6 +533,13 @@ async def submit_text_received(message: Message, state: FSMContext):
 
     await state.clear()
 
+    if position == 0:
+        await message.answer(
+            "❌ Siz bu vazifani allaqachon bajargansiz!",
+            reply_markup=employee_kb.get_employee_main_menu()
+        )
+        return
+
     position_emoji = helpers.get_position_emoji(position)
 
     await message.answer(
@@ -516,7 +567,13 @@ async def submit_photo_start(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(SubmitStates.waiting_photo, F.photo)
-async def submit_photo_received(message: Message, state: FSMContext):
+async def submit_photo_received(
+    message: Message, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(message, state)
+        return
+
     data = await state.get_data()
     task_id = data['task_id']
 
@@ -534,8 +591,6 @@ async def submit_photo_received(message: Message, state: FSMContext):
         )
         return
 
-    employee = await db.get_employee_by_telegram_id(message.from_user.id)
-
     result_id, position, is_late = await db.submit_task_result(
         task_id=task_id,
         employee_id=employee['id'],
@@ -544,6 +599,13 @@ async def submit_photo_received(message: Message, state: FSMContext):
 
     await state.clear()
 
+    if position == 0:
+        await message.answer(
+            "❌ Siz bu vazifani allaqachon bajargansiz!",
+            reply_markup=employee_kb.get_employee_main_menu()
+        )
+        return
+
     position_emoji = helpers.get_position_emoji(position)
 
     await message.answer(
@@ -564,11 +626,16 @@ async def submit_photo_invalid(message: Message):
 
 
 @router.callback_query(F.data == "cancel_submit")
-async def cancel_submit(callback: CallbackQuery, state: FSMContext):
+async def cancel_submit(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
+    if not employee:
+        await not_registered(callback, state)
+        return
+
     await state.clear()
     await callback.message.edit_text("❌ Natija yuborish bekor qilindi.")
 
-    employee = await db.get_employee_by_telegram_id(callback.from_user.id)
     tasks = await db.get_employee_tasks(employee['id'])
 
     await callback.message.answer(
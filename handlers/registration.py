@@ -2,6 +2,7 @@
 Ro'yxatdan o'tish handlerlari
 """
 import html as html_lib
+from typing import Optional
 
 from aiogram import Router, F
 from aiogram.filters import CommandStart, Command
@@ -10,9 +11,10 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from database import db
+from database.records import EmployeeRecord
 from keyboards.admin_kb import get_admin_main_menu
 from keyboards.user_kb import get_user_menu, get_branches_keyboard, get_shift_keyboard, get_cancel_keyboard
-from config import ADMIN_IDS, SHIFTS
+from config import SHIFTS
 
 router = Router()
 
@@ -25,13 +27,15 @@ class Registration(StatesGroup):
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(
+    message: Message, state: FSMContext,
+    is_admin: bool = False, employee: Optional[EmployeeRecord] = None
+):
     """Start buyrug'i"""
     await state.clear()
-    user_id = message.from_user.id
 
     # Admin tekshiruvi
-    if user_id in ADMIN_IDS:
+    if is_admin:
         await message.answer(
             "👨‍💼 <b>Admin paneliga xush kelibsiz!</b>\n\n"
             "Sizda tizimni to'liq boshqarish huquqi mavjud.",
@@ -41,8 +45,6 @@ async def cmd_start(message: Message, state: FSMContext):
         return
 
     # Ro'yxatdan o'tganligini tekshirish
-    employee = await db.get_employee_by_telegram_id(user_id)
-
     if employee:
         await message.answer(
             f"👋 <b>Xush kelibsiz, {employee['first_name']}!</b>\n\n"
@@ -61,12 +63,11 @@ async def cmd_start(message: Message, state: FSMContext):
 
 
 @router.message(Command("register"))
-async def cmd_register(message: Message, state: FSMContext):
+async def cmd_register(
+    message: Message, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
     """Ro'yxatdan o'tish buyrug'i"""
-    user_id = message.from_user.id
-
     # Ro'yxatdan o'tganligini tekshirish
-    employee = await db.get_employee_by_telegram_id(user_id)
 
     if employee:
         await message.answer(
@@ -3,6 +3,7 @@ Xodimlar uchun handlerlar - Vazifalar, Profil, Natijalar
 """
 import pytz
 import html as html_lib
+from typing import Optional
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -10,6 +11,7 @@ from aiogram.fsm.state import State, StatesGroup
 from datetime import datetime
 
 from database import db
+from database.records import EmployeeRecord
 from keyboards.user_kb import (
     get_user_menu, get_tasks_keyboard, get_task_detail_keyboard,
     get_profile_keyboard, get_profile_edit_keyboard,
@@ -43,17 +45,16 @@ class ProfileEdit(StatesGroup):
 # ============= VAZIFALARIM =============
 
 @router.message(F.text == "📋 Vazifalarim")
-async def show_my_tasks(message: Message):
+async def show_my_tasks(
+    message: Message, is_admin: bool = False, employee: Optional[EmployeeRecord] = None
+):
     """Vazifalar ro'yxatini ko'rsatish"""
-    user_id = message.from_user.id
-
     # Admin bo'lsa, admin panelni ko'rsatish
-    if user_id in ADMIN_IDS:
+    if is_admin:
         await message.answer("Siz adminsiz. /admin buyrug'ini ishlating.")
         return
 
-    # Xodim tekshiruvi
-    employee = await db.get_employee_by_telegram_id(user_id)
+    # Xodim tekshiruvi (AuthMiddleware aniqlagan)
     if not employee:
         await message.answer(
             "❌ Siz hali ro'yxatdan o'tmagansiz!\n"
@@ -63,7 +64,7 @@ async def show_my_tasks(message: Message):
         return
 
     # Vazifalarni olish
-    tasks = await db.get_employee_tasks_by_telegram_id(user_id)
+    tasks = await db.get_employee_tasks(employee['id'])
 
     if not tasks:
         await message.answer(
@@ -81,10 +82,9 @@ async def show_my_tasks(message: Message):
 
 
 @router.callback_query(F.data == "my_tasks")
-async def callback_my_tasks(callback: CallbackQuery):
+async def callback_my_tasks(callback: CallbackQuery, employee: Optional[EmployeeRecord] = None):
     """Vazifalar ro'yxatiga qaytish"""
-    user_id = callback.from_user.id
-    tasks = await db.get_employee_tasks_by_telegram_id(user_id)
+    tasks = await db.get_employee_tasks(employee['id']) if employee else []
 
     if not tasks:
         await callback.message.edit_text(
@@ -104,10 +104,11 @@ async def callback_my_tasks(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "tasks_refresh")
-async def callback_tasks_refresh(callback: CallbackQuery):
+async def callback_tasks_refresh(
+    callback: CallbackQuery, employee: Optional[EmployeeRecord] = None
+):
     """Vazifalaringizni yangilash (Xatolarsiz variant)"""
-    user_id = callback.from_user.id
-    tasks = await db.get_employee_tasks_by_telegram_id(user_id)
+    tasks = await db.get_employee_tasks(employee['id']) if employee else []
 
     # 1. Vazifalar yo'q bo'lsa
     if not tasks:
@@ -147,7 +148,7 @@ async def callback_tasks_refresh(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("task_view_"))
-async def callback_task_view(callback: CallbackQuery):
+async def callback_task_view(callback: CallbackQuery, employee: Optional[EmployeeRecord] = None):
     """Vazifa tafsilotlarini ko'rsatish"""
     task_id = int(callback.data.split("_")[2])
     task = await db.get_task(task_id)
@@ -156,36 +157,17 @@ async def callback_task_view(callback: CallbackQuery):
         await callback.answer("❌ Vazifa topilmadi!", show_alert=True)
         return
 
-    user_id = callback.from_user.id
-
     # Allaqachon natija yuborgan yoki yo'qligini tekshirish
-    already_submitted = await db.has_submitted_result(task_id, user_id)
+    already_submitted = bool(employee) and (
+        await db.get_task_result(task_id, employee['id']) is not None
+    )
 
     # Deadline o'tgan yoki yo'qligini tekshirish
     tz = pytz.timezone(TIMEZONE)
     now = datetime.now(tz)
-    deadline_str = task['deadline']
-
-    try:
-        deadline = None
-        for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]:
-            try:
-                # Vaqtni o'qiymiz
-                deadline = datetime.strptime(deadline_str, fmt)
-                # UNGA VAQT MINTOQASINI BIRIKTIRAMIZ (localize)
-                deadline = tz.localize(deadline)
-                break
-            except ValueError:
-                continue
-
-        if deadline is None:
-            deadline = datetime.fromisoformat(deadline_str)
-            # Agar ISO formatdan kelsa va mintaqasi bo'lmasa, biriktiramiz
-            if deadline.tzinfo is None:
-                deadline = tz.localize(deadline)
-
-    except Exception:
-        deadline = now
+    # Deadline NAIVE Tashkent vaqti - vaqt mintaqasini biriktiramiz (localize)
+    deadline = helpers.to_naive(task['deadline'])
+    deadline = tz.localize(deadline) if deadline else now
 
     # Endi solishtirish 100% ishlaydi
     is_expired = now > deadline
@@ -220,13 +202,14 @@ async def callback_task_view(callback: CallbackQuery):
 # ============= NATIJA YUBORISH =============
 
 @router.callback_query(F.data.startswith("submit_text_"))
-async def callback_submit_text(callback: CallbackQuery, state: FSMContext):
+async def callback_submit_text(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
     """Matn natijasini yuborish jarayonini boshlash"""
     task_id = int(callback.data.split("_")[2])
 
     # Tekshirish
-    already_submitted = await db.has_submitted_result(task_id, callback.from_user.id)
-    if already_submitted:
+    if employee and await db.get_task_result(task_id, employee['id']) is not None:
         await callback.answer("❌ Siz bu vazifani allaqachon bajargansiz!", show_alert=True)
         return
 
@@ -242,7 +225,9 @@ async def callback_submit_text(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(TaskSubmission.waiting_text)
-async def process_text_result(message: Message, state: FSMContext, bot: Bot):
+async def process_text_result(
+    message: Message, state: FSMContext, bot: Bot, employee: Optional[EmployeeRecord] = None
+):
     """Matn natijasini qabul qilish"""
     if message.text == "❌ Bekor qilish":
         await state.clear()
@@ -258,16 +243,32 @@ async def process_text_result(message: Message, state: FSMContext, bot: Bot):
         return
 
     try:
+        if not employee:
+            await message.answer(
+                "❌ Xatolik! Siz ro'yxatdan o'tmagansiz.",
+                reply_markup=get_user_menu()
+            )
+            await state.clear()
+            return
+
         # Natijani yuborish
-        result_id, position, is_late = await db.submit_task_result_by_telegram_id(
+        result_id, position, is_late = await db.submit_task_result(
             task_id=task_id,
-            telegram_id=message.from_user.id,
+            employee_id=employee['id'],
             result_text=message.text
         )
 
         if result_id == 0:
             await message.answer(
-                "❌ Xatolik! Siz ro'yxatdan o'tmagansiz.",
+                "❌ Vazifa topilmadi!",
+                reply_markup=get_user_menu()
+            )
+            await state.clear()
+            return
+
+        if position == 0:
+            await message.answer(
+                "❌ Siz bu vazifani allaqachon bajargansiz!",
                 reply_markup=get_user_menu()
             )
             await state.clear()
@@ -295,8 +296,7 @@ async def process_text_result(message: Message, state: FSMContext, bot: Bot):
             )
 
         # Adminga xabar yuborish
-        employee = await db.get_employee_by_telegram_id(message.from_user.id)
-        if employee and task:
+        if task:
             for admin_id in ADMIN_IDS:
                 try:
                     late_text = " (⚠️ Kechiktirilgan)" if is_late else ""
@@ -323,13 +323,14 @@ async def process_text_result(message: Message, state: FSMContext, bot: Bot):
 
 
 @router.callback_query(F.data.startswith("submit_photo_"))
-async def callback_submit_photo(callback: CallbackQuery, state: FSMContext):
+async def callback_submit_photo(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
     """Rasm natijasini yuborish jarayonini boshlash"""
     task_id = int(callback.data.split("_")[2])
 
     # Tekshirish
-    already_submitted = await db.has_submitted_result(task_id, callback.from_user.id)
-    if already_submitted:
+    if employee and await db.get_task_result(task_id, employee['id']) is not None:
         await callback.answer("❌ Siz bu vazifani allaqachon bajargansiz!", show_alert=True)
         return
 
@@ -345,7 +346,9 @@ async def callback_submit_photo(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(TaskSubmission.waiting_photo, F.photo)
-async def process_photo_result(message: Message, state: FSMContext, bot: Bot):
+async def process_photo_result(
+    message: Message, state: FSMContext, bot: Bot, employee: Optional[EmployeeRecord] = None
+):
     """Rasm natijasini qabul qilish"""
     data = await state.get_data()
     task_id = data.get('task_id')
@@ -370,16 +373,32 @@ async def process_photo_result(message: Message, state: FSMContext, bot: Bot):
         return
 
     try:
+        if not employee:
+            await message.answer(
+                "❌ Xatolik! Siz ro'yxatdan o'tmagansiz.",
+                reply_markup=get_user_menu()
+            )
+            await state.clear()
+            return
+
         # Natijani yuborish
-        result_id, position, is_late = await db.submit_task_result_by_telegram_id(
+        result_id, position, is_late = await db.submit_task_result(
             task_id=task_id,
-            telegram_id=message.from_user.id,
+            employee_id=employee['id'],
             file_unique_id=photo_unique_id
         )
 
         if result_id == 0:
             await message.answer(
-                "❌ Xatolik! Siz ro'yxatdan o'tmagansiz.",
+                "❌ Vazifa topilmadi!",
+                reply_markup=get_user_menu()
+            )
+            await state.clear()
+            return
+
+        if position == 0:
+            await message.answer(
+                "❌ Siz bu vazifani allaqachon bajargansiz!",
                 reply_markup=get_user_menu()
             )
             await state.clear()
@@ -406,8 +425,7 @@ async def process_photo_result(message: Message, state: FSMContext, bot: Bot):
             )
 
         # Adminga rasm bilan xabar yuborish
-        employee = await db.get_employee_by_telegram_id(message.from_user.id)
-        if employee and task:
+        if task:
             for admin_id in ADMIN_IDS:
                 try:
                     late_text = " (⚠️ Kechiktirilgan)" if is_late else ""
@@ -465,17 +483,15 @@ async def already_done(callback: CallbackQuery):
 # ============= PROFIL =============
 
 @router.message(F.text == "👤 Profilim")
-async def show_profile(message: Message):
+async def show_profile(
+    message: Message, is_admin: bool = False, employee: Optional[EmployeeRecord] = None
+):
     """Profil ma'lumotlarini ko'rsatish"""
-    user_id = message.from_user.id
-
     # Admin tekshiruvi
-    if user_id in ADMIN_IDS:
+    if is_admin:
         await message.answer("Siz adminsiz. /admin buyrug'ini ishlating.")
         return
 
-    employee = await db.get_employee_by_telegram_id(user_id)
-
     if not employee:
         await message.answer(
             "❌ Siz hali ro'yxatdan o'tmagansiz!\n"
@@ -509,13 +525,12 @@ async def callback_profile_edit(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "profile_back")
-async def callback_profile_back(callback: CallbackQuery, state: FSMContext):
+async def callback_profile_back(
+    callback: CallbackQuery, state: FSMContext, employee: Optional[EmployeeRecord] = None
+):
     """Profilga qaytish"""
     await state.clear()
 
-    user_id = callback.from_user.id
-    employee = await db.get_employee_by_telegram_id(user_id)
-
     if not employee:
         await callback.message.edit_text("❌ Xatolik yuz berdi.")
         await callback.answer()
@@ -14,13 +14,20 @@ from pathlib import Path
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import pytz
 
-from config import BOT_TOKEN, ADMIN_IDS, TIMEZONE, LOG_FILE
+from config import (
+    BOT_TOKEN, ADMIN_IDS, TIMEZONE, LOG_FILE, DATABASE_TYPE, FSM_STORAGE, DB_UNIT_OF_WORK,
+    BOT_MODE, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_MAX_CONNECTIONS,
+    WEBAPP_HOST, WEBAPP_PORT, TELEGRAM_API_URL, QUERY_PROFILER_ENABLED, SLOW_QUERY_LOG_FILE
+)
 from database import init_db, close_db
 from handlers import registration, admin_router, admin_tasks, user, employee_router
-from utils.scheduler import setup_scheduler
+from middlewares.auth import AuthMiddleware
+from utils.scheduler import setup_scheduler, start_scheduler, stop_leader_election
 
 
 # ============================================================
@@ -56,6 +63,19 @@ def setup_logging() -> logging.Logger:
     except Exception as e:
         print(f"⚠️ Log faylni yaratib bo'lmadi: {e}")
 
+    # Sekin so'rovlar va N+1 ogohlantirishlari - alohida faylga (bot.log ga tushmaydi)
+    if QUERY_PROFILER_ENABLED:
+        profiler_logger = logging.getLogger('database.profiler')
+        profiler_logger.propagate = False
+        try:
+            Path(SLOW_QUERY_LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+            slow_handler = logging.FileHandler(SLOW_QUERY_LOG_FILE, encoding='utf-8')
+            slow_handler.setFormatter(logging.Formatter(log_format, date_format))
+            profiler_logger.addHandler(slow_handler)
+        except Exception as e:
+            profiler_logger.propagate = True
+            print(f"⚠️ Sekin so'rovlar log faylini yaratib bo'lmadi: {e}")
+
     # External kutubxonalar uchun log darajasini kamaytirish
     logging.getLogger('aiogram').setLevel(logging.WARNING)
     logging.getLogger('apscheduler').setLevel(logging.WARNING)
@@ -101,6 +121,7 @@ async def on_shutdown():
 
     # Scheduler ni to'xtatish
     global scheduler
+    await stop_leader_election()
     if scheduler and scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("✅ Scheduler to'xtatildi")
@@ -129,6 +150,116 @@ def handle_signal(sig, frame):
     shutdown_event.set()
 
 
+# ============================================================
+# DISPATCHER
+# ============================================================
+def create_dispatcher() -> Dispatcher:
+    """Dispatcher: FSM storage, update middlewarelari va routerlar.
+    benchmarks.replay_updates ham aynan shu zanjirdan foydalanadi.
+    """
+    if DATABASE_TYPE == "postgresql" and FSM_STORAGE == "postgres":
+        from database.fsm_storage import PostgresStorage
+        from middlewares.fsm import FSMWriteBufferMiddleware
+
+        storage = PostgresStorage()
+        logger.info("✅ FSM storage: PostgreSQL")
+    else:
+        storage = MemoryStorage()
+    dp = Dispatcher(storage=storage)
+
+    # FSMContextMiddleware dan oldin ishlashi kerak bo'lgan middlewarelar
+    # (u holatni o'qiydi), tartib bo'yicha
+    before_fsm = []
+    if DATABASE_TYPE == "postgresql" and QUERY_PROFILER_ENABLED:
+        from middlewares.profiler import QueryProfilerMiddleware
+
+        # Birinchi - FSM, auth va COMMIT so'rovlari ham update profiliga tushadi
+        before_fsm.append(QueryProfilerMiddleware())
+    if DATABASE_TYPE == "postgresql" and DB_UNIT_OF_WORK:
+        from middlewares.db import DatabaseSessionMiddleware
+
+        # Bitta update dagi barcha DB chaqiruvlari - bitta sessiya va bitta COMMIT
+        before_fsm.append(DatabaseSessionMiddleware())
+        logger.info("✅ DB unit of work: har bir update uchun bitta sessiya")
+    if not isinstance(storage, MemoryStorage):
+        # Bitta update dagi holat o'zgarishlari bitta UPSERT bo'lib yoziladi
+        before_fsm.append(FSMWriteBufferMiddleware(storage))
+    if before_fsm:
+        dp.update.outer_middleware.unregister(dp.fsm)
+        for middleware in before_fsm:
+            dp.update.outer_middleware(middleware)
+        dp.update.outer_middleware(dp.fsm)
+
+    # Rol va xodim yozuvini har bir update uchun bir marta aniqlash
+    dp.update.outer_middleware(AuthMiddleware())
+
+    # Handlerlarni ro'yxatdan o'tkazish (tartib muhim!)
+    dp.include_router(registration.router)      # Ro'yxatdan o'tish
+    dp.include_router(admin_router)             # Admin handlers
+    dp.include_router(admin_tasks.router)       # Admin tasks
+    dp.include_router(user.router)              # User handlers
+    dp.include_router(employee_router)          # Employee handlers
+
+    if DATABASE_TYPE == "postgresql" and QUERY_PROFILER_ENABLED:
+        from middlewares.profiler import HandlerNameMiddleware
+
+        # Ichki middlewarelar ichki routerlarga ham tegishli - profil nomi = handler nomi
+        handler_name = HandlerNameMiddleware()
+        for event_name, observer in dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(handler_name)
+
+    logger.info("✅ Barcha handlerlar ro'yxatdan o'tdi")
+    return dp
+
+
+# ============================================================
+# WEBHOOK
+# ============================================================
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Webhook rejimi - aiohttp server.
+    Har bir update fon vazifasida qayta ishlanadi (Telegram ga darhol 200 qaytadi),
+    shuning uchun sekin handler boshqa updatelarni kutdirmaydi.
+    Bir nechta worker reverse proxy ortida bitta WEBHOOK_SECRET bilan ishlay oladi.
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=WEBHOOK_SECRET
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT)
+    await site.start()
+    logger.info(f"🌐 Webhook server: http://{WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH}")
+
+    if WEBHOOK_BASE_URL:
+        await bot.set_webhook(
+            url=f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=WEBHOOK_MAX_CONNECTIONS
+        )
+        logger.info(f"✅ Webhook o'rnatildi: {WEBHOOK_BASE_URL}{WEBHOOK_PATH}")
+
+    # Polling dan farqli ravishda signallarni o'zimiz kutamiz
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown_event.set)
+
+    try:
+        await shutdown_event.wait()
+    finally:
+        await runner.cleanup()
+
+
 # ============================================================
 # MAIN
 # ============================================================
@@ -141,30 +272,25 @@ async def main():
         await on_startup()
 
         # Bot yaratish
+        session = None
+        if TELEGRAM_API_URL:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
         bot = Bot(
             token=BOT_TOKEN,
+            session=session,
             default=DefaultBotProperties(parse_mode='HTML')
         )
 
         # Dispatcher yaratish
-        storage = MemoryStorage()
-        dp = Dispatcher(storage=storage)
+        dp = create_dispatcher()
 
         # Scheduler yaratish va sozlash
         scheduler = AsyncIOScheduler(timezone=pytz.timezone(TIMEZONE))
         await setup_scheduler(scheduler, bot)
-        scheduler.start()
+        # PostgreSQL da joblar faqat yetakchi replikada bajariladi
+        start_scheduler(scheduler)
         logger.info("✅ Scheduler ishga tushdi")
 
-        # Handlerlarni ro'yxatdan o'tkazish (tartib muhim!)
-        dp.include_router(registration.router)      # Ro'yxatdan o'tish
-        dp.include_router(admin_router)             # Admin handlers
-        dp.include_router(admin_tasks.router)       # Admin tasks
-        dp.include_router(user.router)              # User handlers
-        dp.include_router(employee_router)          # Employee handlers
-
-        logger.info("✅ Barcha handlerlar ro'yxatdan o'tdi")
-
         # Adminlarga xabar yuborish
         for admin_id in ADMIN_IDS:
             try:
@@ -180,14 +306,18 @@ async def main():
             except Exception as e:
                 logger.warning(f"Admin {admin_id} ga xabar yuborib bo'lmadi: {e}")
 
-        # Polling boshlash
-        logger.info("🤖 Bot polling boshlanmoqda...")
-
-        await dp.start_polling(
-            bot,
-            allowed_updates=dp.resolve_used_update_types(),
-            close_bot_session=False
-        )
+        if BOT_MODE == "webhook":
+            logger.info("🤖 Bot webhook rejimida ishga tushmoqda...")
+            await run_webhook(bot, dp)
+        else:
+            # Polling boshlash
+            logger.info("🤖 Bot polling boshlanmoqda...")
+
+            await dp.start_polling(
+                bot,
+                allowed_updates=dp.resolve_used_update_types(),
+                close_bot_session=False
+            )
 
     except asyncio.CancelledError:
         logger.info("Bot polling bekor qilindi")
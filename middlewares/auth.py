@@ -1,18 +1,59 @@
 """
 Authentication middleware
+
+Har bir update uchun foydalanuvchi rolini va xodim yozuvini bir marta
+aniqlaydi va handler data siga qo'shadi:
+    role      - 'admin' | 'employee' | 'guest'
+    is_admin  - ADMIN_IDS da bormi
+    employee  - faol xodim yozuvi (branch_name bilan) yoki None
+
+Handlerlar bularni argument sifatida qabul qiladi, masalan:
+    async def handler(message: Message, employee: Optional[EmployeeRecord] = None): ...
 """
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
-from typing import Callable, Dict, Any, Awaitable
+from aiogram.types import TelegramObject, User
+
+from config import ADMIN_IDS
+from database import db
+
+logger = logging.getLogger(__name__)
+
+ROLE_ADMIN = 'admin'
+ROLE_EMPLOYEE = 'employee'
+ROLE_GUEST = 'guest'
 
 
 class AuthMiddleware(BaseMiddleware):
-    """Authentication middleware"""
+    """Update darajasidagi (outer) identifikatsiya middleware"""
 
     async def __call__(
         self,
-        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
-        event: Message,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        return await handler(event, data)
\ No newline at end of file
+        user: User = data.get('event_from_user')
+        employee = None
+        is_admin = False
+
+        if user is not None:
+            is_admin = user.id in ADMIN_IDS
+            try:
+                employee = await db.get_employee_by_telegram_id(user.id)
+            except Exception as e:
+                logger.error(f"Auth middleware error for {user.id}: {e}")
+
+        if is_admin:
+            role = ROLE_ADMIN
+        elif employee:
+            role = ROLE_EMPLOYEE
+        else:
+            role = ROLE_GUEST
+
+        data['role'] = role
+        data['is_admin'] = is_admin
+        data['employee'] = employee
+        return await handler(event, data)
@@ -0,0 +1,64 @@
+"""
+Unit of work middleware
+
+Har bir update uchun bitta DB sessiyasi ochadi: update ichidagi barcha
+database funksiyalari (get_session / xom o'qishlar) shu sessiyadan
+foydalanadi va yozishlar bitta COMMIT bilan saqlanadi.
+Handler xato bilan tugasa - ROLLBACK.
+
+COMMIT birinchi Bot API so'rovidan oldin bajariladi (CommitBeforeRequestMiddleware):
+foydalanuvchi tasdiq xabarini faqat saqlangan yozishlardan keyin oladi, Telegram
+javobini kutish vaqtida pool ulanishi band bo'lmaydi.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware, NextRequestMiddlewareType
+)
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+
+from database.db_postgres import commit_unit_of_work, unit_of_work
+
+
+class CommitBeforeRequestMiddleware(BaseRequestMiddleware):
+    """Bot sessiyasi middleware: update sessiyasini so'rovdan oldin COMMIT qiladi.
+    Update dan tashqaridagi so'rovlarda (scheduler, broadcast) hech narsa qilmaydi.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> TelegramType:
+        await commit_unit_of_work()
+        return await make_request(bot, method)
+
+
+class DatabaseSessionMiddleware(BaseMiddleware):
+    """Update darajasidagi (outer) middleware"""
+
+    def __init__(self):
+        self.request_middleware = CommitBeforeRequestMiddleware()
+        self._sessions = set()
+
+    def _watch_bot(self, bot: Bot):
+        # Bot sessiyasiga bir marta ulanadi (polling, webhook va replay benchmarki uchun bir xil)
+        if id(bot.session) not in self._sessions:
+            bot.session.middleware(self.request_middleware)
+            self._sessions.add(id(bot.session))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        bot = data.get("bot")
+        if bot is not None:
+            self._watch_bot(bot)
+        async with unit_of_work():
+            return await handler(event, data)
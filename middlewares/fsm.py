@@ -0,0 +1,28 @@
+"""
+FSM yozishlarini birlashtirish middleware
+
+Bitta update davomidagi set_state / set_data / update_data chaqiruvlari
+PostgresStorage buferida yig'iladi va update oxirida bitta UPSERT bo'lib yoziladi.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from database.fsm_storage import PostgresStorage
+
+
+class FSMWriteBufferMiddleware(BaseMiddleware):
+    """Update darajasidagi (outer) middleware"""
+
+    def __init__(self, storage: PostgresStorage):
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.storage.buffer():
+            return await handler(event, data)
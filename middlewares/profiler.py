@@ -0,0 +1,45 @@
+"""
+SQL so'rovlar profili middlewarelari (QUERY_PROFILER_ENABLED)
+
+QueryProfilerMiddleware update dagi barcha so'rovlarni (FSM, auth, handler,
+COMMIT) bitta profilga yig'adi; HandlerNameMiddleware profilga update ni
+qabul qilgan handler nomini beradi - sekin so'rovlar va N+1 ogohlantirishlari
+logida shu nom ko'rinadi.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from database.profiler import query_profile, set_profile_name
+
+
+class QueryProfilerMiddleware(BaseMiddleware):
+    """Update darajasidagi (outer) middleware - eng birinchi bo'lib ro'yxatdan o'tadi"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        # Handler topilmasa (hech bir filtr mos kelmasa) nom update turi bo'lib qoladi
+        name = f"update:{event.event_type}" if isinstance(event, Update) else "update"
+        with query_profile(name):
+            return await handler(event, data)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Ichki middleware: filtrlardan o'tgan handler chaqirilishidan oldin ishlaydi"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        if callback is not None:
+            set_profile_name(f"{callback.__module__}.{callback.__qualname__}")
+        return await handler(event, data)
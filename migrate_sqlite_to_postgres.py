@@ -14,7 +14,7 @@ from datetime import datetime
 
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
-from database.db_postgres import Base
+from database.db_postgres import Base, create_daily_partitions, install_task_audience
 from config import DATABASE_URL
 
 logging.basicConfig(
@@ -80,6 +80,7 @@ async def migrate_data() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+        await create_daily_partitions(conn)
     logger.info("Tables created")
 
     logger.info(f"Opening SQLite database: {SQLITE_PATH}")
@@ -353,6 +354,9 @@ async def migrate_data() -> None:
                     )
                 logger.info("FK constraints re-enabled")
 
+                # Triggerlar o'chiq bo'lgani uchun auditoriya qayta to'ldiriladi
+                await install_task_audience(conn, rebuild=True)
+
                 # ── 8. Reset sequences ──
                 logger.info("8. Resetting sequences...")
                 for tbl in ALL_TABLES:
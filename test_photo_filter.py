@@ -0,0 +1,57 @@
+"""
+load_photo_filter testi: bazasiz, soxta sessiya bilan.
+
+Ishga tushirish:
+    python -m pytest -q test_photo_filter.py
+"""
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("BOT_TOKEN", "0:test")
+os.environ.setdefault("PHOTO_FILTER_MIN_CAPACITY", "1000")
+
+from database import db_postgres  # noqa: E402
+from database.cache import photo_filter  # noqa: E402
+
+PHOTOS = [(i, f"photo_{i}") for i in range(1, 2501)]
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return max(photo_id for photo_id, _ in self.rows) if self.rows else None
+
+    async def partitions(self):
+        for start in range(0, len(self.rows), 1000):
+            yield self.rows[start:start + 1000]
+
+
+class _FakeSession:
+    async def execute(self, query):
+        return _FakeResult(PHOTOS)
+
+    async def stream(self, query):
+        return _FakeResult(PHOTOS)
+
+
+@asynccontextmanager
+async def _fake_session():
+    yield _FakeSession()
+
+
+def test_load_photo_filter(monkeypatch):
+    monkeypatch.setattr(db_postgres, "get_session", _fake_session)
+    photo_filter.ready = False
+
+    asyncio.run(db_postgres.load_photo_filter())
+
+    assert photo_filter.ready
+    assert photo_filter.count == len(PHOTOS)
+    assert photo_filter.capacity == max(db_postgres.PHOTO_FILTER_MIN_CAPACITY, len(PHOTOS) * 2)
+    assert all(photo_filter.might_contain(file_unique_id) for _, file_unique_id in PHOTOS)
+    assert db_postgres._photo_filter_last_id == PHOTOS[-1][0]
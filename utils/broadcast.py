@@ -0,0 +1,272 @@
+"""
+Broadcast - ko'p xodimlarga xabarlarni tezlik cheklovi bilan yuborish
+
+Telegram cheklovlari:
+    • umumiy ~30 xabar/soniya (global token bucket)
+    • bitta chatga ~1 xabar/soniya (chat bo'yicha oraliq)
+    • limitdan oshsa RetryAfter xatosi - ko'rsatilgan vaqt kutiladi
+"""
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+    TelegramRetryAfter, TelegramServerError
+)
+
+from config import BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Bitta chatga ketma-ket xabarlar orasidagi minimal vaqt (soniya)
+PER_CHAT_INTERVAL = 1.0
+
+# Progress callback necha soniyada bir chaqiriladi
+PROGRESS_INTERVAL = 2.0
+
+
+class TokenBucket:
+    """Global tezlik cheklovi (token bucket)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """RetryAfter kelganda barcha yuborishlarni to'xtatib turish"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class BroadcastMessage:
+    """Yuboriladigan bitta xabar.
+    key - chaqiruvchi uchun ixtiyoriy ma'lumot (masalan, xodim ID si).
+    """
+    chat_id: int
+    text: str
+    key: Any = None
+    parse_mode: str = "HTML"
+    # Yuborilmasa - oxirgi xatolik matni
+    error: Optional[str] = None
+
+
+@dataclass
+class BroadcastJob:
+    """Broadcast holati (handle) - progress va natijalarni kuzatish uchun"""
+    id: int
+    name: str
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    delivered: List[BroadcastMessage] = field(default_factory=list)
+    failures: List[BroadcastMessage] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def is_done(self) -> bool:
+        return self.done.is_set()
+
+    async def wait(self) -> "BroadcastJob":
+        await self.done.wait()
+        return self
+
+
+ProgressCallback = Callable[[BroadcastJob], Awaitable[None]]
+Messages = Union[Iterable[BroadcastMessage], AsyncIterable[BroadcastMessage]]
+
+
+class Broadcaster:
+    """Cheklangan parallellik bilan xabar yuboruvchi"""
+
+    def __init__(
+        self, rate: float = BROADCAST_RATE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        max_retries: int = BROADCAST_MAX_RETRIES,
+        per_chat_interval: float = PER_CHAT_INTERVAL
+    ):
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.per_chat_interval = per_chat_interval
+        self.jobs: Dict[int, BroadcastJob] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._chat_last_sent: Dict[int, float] = {}
+        self._ids = itertools.count(1)
+
+    async def _wait_chat_slot(self, chat_id: int):
+        """Bitta chatga juda tez-tez yubormaslik"""
+        now = time.monotonic()
+        last = self._chat_last_sent.get(chat_id)
+        if last is not None and now - last < self.per_chat_interval:
+            self._chat_last_sent[chat_id] = last + self.per_chat_interval
+            await asyncio.sleep(last + self.per_chat_interval - now)
+        else:
+            self._chat_last_sent[chat_id] = now
+
+        # Eski yozuvlarni vaqti-vaqti bilan tozalash
+        if len(self._chat_last_sent) > 10000:
+            cutoff = time.monotonic() - self.per_chat_interval
+            self._chat_last_sent = {
+                cid: ts for cid, ts in self._chat_last_sent.items() if ts > cutoff
+            }
+
+    async def _send_one(self, bot, message: BroadcastMessage) -> bool:
+        """Bitta xabarni qayta urinishlar bilan yuborish"""
+        for attempt in range(self.max_retries + 1):
+            await self._wait_chat_slot(message.chat_id)
+            await self.bucket.acquire()
+            try:
+                await bot.send_message(
+                    chat_id=message.chat_id,
+                    text=message.text,
+                    parse_mode=message.parse_mode
+                )
+                return True
+            except TelegramRetryAfter as e:
+                message.error = str(e)
+                logger.warning(f"Flood limit: {e.retry_after} soniya kutilmoqda")
+                self.bucket.pause(e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                # Bot bloklangan yoki chat topilmadi - qayta urinishdan foyda yo'q
+                message.error = str(e)
+                logger.error(f"Broadcast error for {message.chat_id}: {e}")
+                return False
+            except (TelegramNetworkError, TelegramServerError) as e:
+                message.error = str(e)
+                logger.warning(f"Broadcast retry {attempt + 1} for {message.chat_id}: {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+            except Exception as e:
+                message.error = str(e)
+                logger.error(f"Broadcast error for {message.chat_id}: {e}")
+                return False
+        return False
+
+    async def _run(
+        self, bot, job: BroadcastJob, messages: Messages,
+        on_progress: Optional[ProgressCallback], count_total: bool = True
+    ):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        last_progress = 0.0
+
+        async def report(force: bool = False):
+            nonlocal last_progress
+            if on_progress is None:
+                return
+            now = time.monotonic()
+            if not force and now - last_progress < PROGRESS_INTERVAL:
+                return
+            last_progress = now
+            try:
+                await on_progress(job)
+            except Exception as e:
+                logger.warning(f"Broadcast progress callback error: {e}")
+
+        async def worker():
+            while True:
+                message = await queue.get()
+                try:
+                    if message is None:
+                        return
+                    if await self._send_one(bot, message):
+                        job.sent += 1
+                        job.delivered.append(message)
+                    else:
+                        job.failed += 1
+                        job.failures.append(message)
+                    await report()
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            if hasattr(messages, "__aiter__"):
+                async for message in messages:
+                    job.total += count_total
+                    await queue.put(message)
+            else:
+                for message in messages:
+                    job.total += count_total
+                    await queue.put(message)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except Exception as e:
+            logger.error(f"Broadcast '{job.name}' error: {e}")
+            for w in workers:
+                w.cancel()
+        finally:
+            job.finished_at = time.monotonic()
+            job.done.set()
+            await report(force=True)
+            logger.info(
+                f"📬 Broadcast '{job.name}': {job.sent}/{job.total} yuborildi, "
+                f"{job.failed} ta xato ({job.finished_at - job.started_at:.1f} s)"
+            )
+
+    def start(
+        self, bot, messages: Messages, name: str = "",
+        on_progress: Optional[ProgressCallback] = None
+    ) -> BroadcastJob:
+        """Broadcastni fonda boshlash va darhol job handle qaytarish"""
+        job = BroadcastJob(id=next(self._ids), name=name)
+        # Ro'yxat bo'lsa, jami son progress uchun darhol ma'lum
+        count_total = not isinstance(messages, (list, tuple))
+        if not count_total:
+            job.total = len(messages)
+
+        self.jobs[job.id] = job
+        task = asyncio.create_task(
+            self._run(bot, job, messages, on_progress, count_total)
+        )
+        self._tasks[job.id] = task
+
+        def _cleanup(_):
+            self._tasks.pop(job.id, None)
+            self.jobs.pop(job.id, None)
+
+        task.add_done_callback(_cleanup)
+        return job
+
+    async def send(
+        self, bot, messages: Messages, name: str = "",
+        on_progress: Optional[ProgressCallback] = None
+    ) -> BroadcastJob:
+        """Broadcastni boshlash va tugashini kutish"""
+        job = self.start(bot, messages, name=name, on_progress=on_progress)
+        return await job.wait()
+
+
+# Bot bo'ylab yagona broadcaster (global tezlik cheklovi umumiy bo'lishi kerak)
+broadcaster = Broadcaster()
@@ -6,7 +6,7 @@ Barcha vaqtlar Tashkent mahalliy vaqtini ifodalaydi.
 Bu asyncpg/PostgreSQL ning tz-aware datetime ni UTC ga o'girish muammosini hal qiladi.
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
 import pytz
 from config import TIMEZONE, SHIFTS, TASK_TYPES, RESULT_TYPES
 
@@ -16,10 +16,24 @@ def get_timezone():
     return pytz.timezone(TIMEZONE)
 
 
+# Soat manbai: None - haqiqiy vaqt. Simulyatsiya/benchmark uchun set_clock()
+# bilan almashtiriladi (NAIVE Tashkent vaqtini qaytaruvchi funksiya).
+# database.db_postgres._tashkent_now ham shu soatni o'qiydi
+_clock: Optional[Callable[[], datetime]] = None
+
+
+def set_clock(clock: Optional[Callable[[], datetime]]):
+    """now() / now_aware() uchun soat manbaini o'rnatish (None - haqiqiy vaqt)"""
+    global _clock
+    _clock = clock
+
+
 def now() -> datetime:
     """Hozirgi Tashkent vaqtini olish (NAIVE - timezone info'siz).
     Bu DB saqlash va taqqoslash uchun xavfsiz.
     """
+    if _clock is not None:
+        return _clock()
     tz = get_timezone()
     tashkent_now = datetime.now(tz)
     # Naive datetime qaytarish (timezone info'siz)
@@ -30,6 +44,8 @@ def now_aware() -> datetime:
     """Hozirgi Tashkent vaqtini olish (TZ-AWARE).
     Faqat scheduler va tz-aware taqqoslash uchun.
     """
+    if _clock is not None:
+        return get_timezone().localize(_clock())
     return datetime.now(get_timezone())
 
 
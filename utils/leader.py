@@ -0,0 +1,151 @@
+"""
+Leader election - scheduler faqat bitta jarayonda ishlashi uchun
+
+Bir nechta bot replikasi ishlaganda har biri pg_try_advisory_lock orqali
+yetakchilikni olishga urinadi. Qulf alohida (AUTOCOMMIT) ulanishda
+sessiya darajasida ushlab turiladi:
+    • yetakchi jarayon o'lsa - ulanish yopiladi va PostgreSQL qulfni
+      darhol bo'shatadi, keyingi replika LEADER_RETRY_SECONDS ichida oladi
+    • yetakchi ulanishni yo'qotsa (heartbeat xatosi) - o'zi darhol
+      yetakchilikdan tushadi
+
+Yetakchi boshqa replikalardan kelgan NOTIFY xabarlarini ham tinglaydi
+(masalan, vazifa o'zgargani haqida).
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from database import db_postgres
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Awaitable[None]]
+NotifyHandler = Callable[[str], Awaitable[None]]
+
+
+class LeaderElection:
+    """PostgreSQL advisory lock asosidagi yetakchilik"""
+
+    def __init__(
+        self,
+        lock_key: int,
+        on_elected: Callback,
+        on_demoted: Callback,
+        retry_seconds: float = 5,
+        heartbeat_seconds: float = 5,
+        listeners: Optional[Dict[str, NotifyHandler]] = None
+    ):
+        self.lock_key = lock_key
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.retry_seconds = retry_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.listeners = listeners or {}
+        self._conn = None
+        self._task: Optional[asyncio.Task] = None
+        self._notify_tasks = set()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="leader_election")
+
+    async def stop(self):
+        """To'xtatish va qulfni bo'shatish (boshqa replika darhol oladi)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._step_down(release=True)
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader:
+                    await self._heartbeat()
+                else:
+                    await self._try_acquire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Leader election error: {e}")
+            await asyncio.sleep(
+                self.heartbeat_seconds if self.is_leader else self.retry_seconds
+            )
+
+    async def _try_acquire(self):
+        conn = await db_postgres.engine.connect()
+        try:
+            # Ulanish tranzaksiyada "idle" bo'lib qolmasligi uchun
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            )).scalar()
+            if not acquired:
+                await conn.close()
+                return
+
+            raw = await conn.get_raw_connection()
+            for channel, handler in self.listeners.items():
+                await raw.driver_connection.add_listener(channel, self._make_listener(handler))
+        except BaseException:
+            await conn.close()
+            raise
+
+        self._conn = conn
+        logger.info("👑 Scheduler yetakchisi: shu jarayon")
+        await self.on_elected()
+
+    async def _heartbeat(self):
+        try:
+            await self._conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Leader connection lost, stepping down: {e}")
+            await self._step_down(release=False)
+
+    async def _step_down(self, release: bool):
+        conn, self._conn = self._conn, None
+        try:
+            await self.on_demoted()
+        except Exception as e:
+            logger.error(f"Leader demote callback error: {e}")
+
+        try:
+            if release:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key}
+                )
+                await conn.close()
+            else:
+                # Buzilgan ulanish pool ga qaytmasin
+                await conn.invalidate()
+        except Exception as e:
+            logger.debug(f"Leader connection close error: {e}")
+        logger.info("Scheduler yetakchiligi bo'shatildi")
+
+    def _make_listener(self, handler: NotifyHandler):
+        def listener(connection, pid, channel, payload):
+            task = asyncio.create_task(handler(payload))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+        return listener
+
+
+async def notify(channel: str, payload: str):
+    """Yetakchiga NOTIFY xabar yuborish"""
+    async with db_postgres.get_session() as session:
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": payload}
+        )
+        await session.commit()
@@ -0,0 +1,88 @@
+"""
+Notification outbox drainer
+
+Bildirishnomalar avval notification_outbox jadvaliga yoziladi
+(takroriy xabarlar UNIQUE constraint orqali rad etiladi), keyin
+drainer ularni partiyalab yuboradi. Yuborilmagan xabarlar
+eksponensial kutish bilan qayta urinishga qo'yiladi, shuning uchun
+bot qayta ishga tushsa ham xabarlar yo'qolmaydi.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from config import OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+from database import db
+from database.profiler import profiled
+from utils import helpers
+from utils.broadcast import broadcaster, BroadcastMessage
+
+logger = logging.getLogger(__name__)
+
+# Birinchi qayta urinishgacha kutish, keyin har safar 2 barobar
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+# Bir vaqtda faqat bitta drain (jarayon ichida)
+_drain_lock = asyncio.Lock()
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_BASE_DELAY * (2 ** (attempts - 1)), RETRY_MAX_DELAY)
+
+
+async def enqueue(rows: list) -> int:
+    """Xabarlarni navbatga qo'yish. Yangi qo'shilganlar sonini qaytaradi."""
+    inserted = await db.enqueue_notifications(rows)
+    return len(inserted)
+
+
+async def drain_outbox(bot) -> int:
+    """Navbatdagi barcha muddati kelgan xabarlarni yuborish.
+    Yuborilgan xabarlar sonini qaytaradi.
+    """
+    total_sent = 0
+    async with _drain_lock:
+        while True:
+            batch = await db.claim_outbox_batch(limit=OUTBOX_BATCH_SIZE)
+            if not batch:
+                break
+
+            job = await broadcaster.send(
+                bot,
+                [
+                    BroadcastMessage(chat_id=row['chat_id'], text=row['text'], key=row)
+                    for row in batch
+                ],
+                name="outbox"
+            )
+
+            await db.mark_outbox_sent([m.key['id'] for m in job.delivered])
+            total_sent += job.sent
+
+            failures = []
+            for message in job.failures:
+                row = message.key
+                retry_at = None
+                if row['attempts'] < OUTBOX_MAX_ATTEMPTS:
+                    retry_at = helpers.now() + _retry_delay(row['attempts'])
+                failures.append({
+                    'id': row['id'],
+                    'error': message.error or "send failed",
+                    'retry_at': retry_at,
+                })
+            await db.mark_outbox_failed(failures)
+
+            if len(batch) < OUTBOX_BATCH_SIZE:
+                break
+
+    return total_sent
+
+
+@profiled("scheduler:drain_outbox")
+async def drain_outbox_job(bot):
+    """Scheduler uchun: xatoliklar job ni to'xtatmasligi kerak"""
+    try:
+        await drain_outbox(bot)
+    except Exception as e:
+        logger.error(f"Outbox drain error: {e}")
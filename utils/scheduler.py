@@ -7,274 +7,386 @@ import logging
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import pytz
 
-from config import TIMEZONE, ADMIN_IDS
+from config import (
+    TIMEZONE, ADMIN_IDS, OUTBOX_POLL_SECONDS, DATABASE_TYPE, DAILY_RESET_HOUR, DAILY_RESET_MINUTE,
+    SCHEDULER_LOCK_KEY, LEADER_RETRY_SECONDS, LEADER_HEARTBEAT_SECONDS
+)
 from database import db
+from database.profiler import profiled
 from utils import helpers
+from utils import leader
+from utils import outbox
+from utils.broadcast import broadcaster, BroadcastMessage
 
 logger = logging.getLogger(__name__)
 
-# Global scheduler reference
+# Global scheduler va bot reference
 _scheduler = None
+_bot = None
+_leader = None
 
 
-async def check_task_notifications(bot):
-    """Vazifa bildirishnomalarini tekshirish"""
+# Vazifa hodisalari va ularning deadline ga nisbatan vaqti
+TASK_EVENTS = ('task_started', 'warning_30min', 'deadline_ended')
+
+# Yaratilgan paytda biroz o'tib ketgan hodisalar ham yuboriladi
+# (eski 1 daqiqalik tekshiruvdagi ±90 soniya oynasiga mos)
+PAST_EVENT_GRACE = timedelta(seconds=90)
+
+# Ichki sinxronlash oralig'i (boshqa jarayonda yaratilgan vazifalar uchun)
+SYNC_INTERVAL_MINUTES = 10
+
+# Shu oraliqda yuz bergan hodisalar bitta snapshot bilan qayta ishlanadi (soniya)
+EVENT_BATCH_WINDOW = 1.0
+_event_batch = None
+
+# Yangi yetakchi oldingi yetakchi o'tkazib yuborgan hodisalarni ham qayta ko'radi
+# (takroriy xabarlar outbox UNIQUE kaliti orqali rad etiladi)
+LEADER_CATCHUP = timedelta(minutes=SYNC_INTERVAL_MINUTES)
+
+# Boshqa replikalardan vazifa o'zgarishi haqida xabar kanali
+TASK_CHANGED_CHANNEL = 'task_changed'
+
+
+def resolve_task_times(task: dict, now: datetime):
+    """Vazifaning boshlanish va deadline vaqtini NAIVE datetime sifatida olish.
+    Har kunlik vazifa uchun sana bugungi kunga moslanadi.
+    """
+    start_time = helpers.to_naive(task['start_time'])
+    deadline = helpers.to_naive(task['deadline'])
+
+    if task.get('task_type') == 'har_kunlik':
+        if start_time.date() < now.date():
+            start_time = start_time.replace(year=now.year, month=now.month, day=now.day)
+        if deadline.date() < now.date() or deadline <= start_time:
+            deadline = deadline.replace(year=now.year, month=now.month, day=now.day)
+        if deadline <= start_time:
+            deadline += timedelta(days=1)
+
+    return start_time, deadline
+
+
+def get_task_event_times(task: dict, now: datetime) -> dict:
+    """Vazifa hodisalari qachon yuz berishini hisoblash"""
+    start_time, deadline = resolve_task_times(task, now)
+    return {
+        'task_started': start_time,
+        'warning_30min': deadline - timedelta(minutes=30),
+        'deadline_ended': deadline,
+    }
+
+
+def _event_job_id(task_id: int, event: str) -> str:
+    return f"task_{task_id}_{event}"
+
+
+def unschedule_task_events(task_id: int):
+    """Vazifaning rejalashtirilgan hodisalarini bekor qilish"""
+    if _scheduler is None:
+        return
+    for event in TASK_EVENTS:
+        job = _scheduler.get_job(_event_job_id(task_id, event))
+        if job:
+            job.remove()
+
+
+def schedule_task_events(task: dict, past_grace: timedelta = PAST_EVENT_GRACE) -> int:
+    """Vazifa hodisalarini aniq vaqtiga rejalashtirish.
+    Rejalashtirilgan hodisalar sonini qaytaradi.
+    """
+    if _scheduler is None:
+        return 0
+
+    if not task.get('is_active', 1):
+        unschedule_task_events(task['id'])
+        return 0
+
+    tz = helpers.get_timezone()
+    now = helpers.now()
+    due = tz.localize(now)
+    scheduled = 0
+
+    for event, run_at in get_task_event_times(task, now).items():
+        job = _scheduler.get_job(_event_job_id(task['id'], event))
+        # Vaqti kelgan, lekin hali bajarilmagan job tegilmaydi (loop band bo'lsa
+        # yoki sinxronlash bilan bir vaqtga tushsa) - aks holda hodisa yo'qoladi.
+        # Takroriy xabarlar outbox / sent_notifications kaliti orqali rad etiladi
+        if job is not None and job.next_run_time is not None and job.next_run_time <= due:
+            scheduled += 1
+            continue
+        if run_at < now - past_grace:
+            if job is not None:
+                job.remove()
+            continue
+        _scheduler.add_job(
+            run_task_event,
+            DateTrigger(run_date=tz.localize(run_at)),
+            args=[_bot, task['id'], event],
+            id=_event_job_id(task['id'], event),
+            replace_existing=True,
+            # Kechikkan hodisa ham bajarilsin (tick uzoq davom etsa ham)
+            misfire_grace_time=None,
+            coalesce=True
+        )
+        scheduled += 1
+
+    return scheduled
+
+
+async def reschedule_task(task_id: int):
+    """Vazifa yaratilgan, o'zgartirilgan yoki o'chirilgandan keyin hodisalarni qayta hisoblash.
+    Bu jarayon yetakchi bo'lmasa, yetakchiga ham xabar beriladi.
+    """
     try:
-        tasks = await db.get_active_tasks()
-        tz = pytz.timezone(TIMEZONE)
-        # NAIVE Tashkent vaqti - DB dagi vaqtlar bilan taqqoslash uchun
-        now = datetime.now(tz).replace(tzinfo=None)
+        task = await db.get_task(task_id)
+        if task:
+            schedule_task_events(task)
+        else:
+            unschedule_task_events(task_id)
+    except Exception as e:
+        logger.error(f"Reschedule error for task {task_id}: {e}")
+
+    if _leader is not None and not _leader.is_leader:
+        try:
+            await leader.notify(TASK_CHANGED_CHANNEL, str(task_id))
+        except Exception as e:
+            logger.error(f"Task change notify error for task {task_id}: {e}")
+
+
+@profiled("scheduler:task_changed")
+async def _on_task_changed(payload: str):
+    """Boshqa replikada vazifa o'zgardi (faqat yetakchida chaqiriladi)"""
+    await reschedule_task(int(payload))
 
+
+@profiled("scheduler:sync_task_events")
+async def sync_task_events(past_grace: timedelta = timedelta(0)):
+    """Barcha faol vazifalar hodisalarini qayta rejalashtirish.
+    Ishga tushganda, kunlik qayta tiklashdan keyin va davriy ravishda chaqiriladi.
+    Faqat hali yuz bermagan hodisalar qayta qo'shiladi; vaqti kelgan, lekin
+    hali bajarilmagan joblar saqlanadi.
+    """
+    try:
+        tasks = await db.get_active_tasks()
+        total = 0
         for task in tasks:
             try:
-                start_time_str = task['start_time']
-                deadline_str = task['deadline']
-
-                for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]:
-                    try:
-                        start_time = datetime.strptime(start_time_str, fmt)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    start_time = datetime.fromisoformat(start_time_str)
-
-                for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]:
-                    try:
-                        deadline = datetime.strptime(deadline_str, fmt)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    deadline = datetime.fromisoformat(deadline_str)
-
-                # Naive qilish (agar tz-aware bo'lsa)
-                if start_time.tzinfo is not None:
-                    start_time = start_time.astimezone(tz).replace(tzinfo=None)
-                if deadline.tzinfo is not None:
-                    deadline = deadline.astimezone(tz).replace(tzinfo=None)
-                    
-                # Har kunlik vazifa uchun sanani bugungi kunga moslash
-                if task.get('task_type') == 'har_kunlik':
-                    if start_time.date() < now.date():
-                        start_time = start_time.replace(year=now.year, month=now.month, day=now.day)
-                    if deadline.date() < now.date() or deadline <= start_time:
-                        deadline = deadline.replace(year=now.year, month=now.month, day=now.day)
-                    if deadline <= start_time:
-                        deadline += timedelta(days=1)
-
-                employees = await db.get_employees_for_task(task['id'])
-
-                # Filial bo'yicha xodimlarni guruhlash
-                branch_employees = {}
+                total += schedule_task_events(task, past_grace=past_grace)
+            except Exception as e:
+                logger.error(f"Schedule error for task {task['id']}: {e}")
+        logger.debug(f"{len(tasks)} ta vazifa uchun {total} ta hodisa rejalashtirildi")
+    except Exception as e:
+        logger.error(f"Task events sync error: {e}")
+
+
+def _pending_employees(snapshot: dict, task_id: int, notification_type: str) -> list:
+    """Hali hech kim bajarmagan filiallardagi xodimlar (snapshot dan, xotirada).
+    Filialda birorta xodim bajargan bo'lsa, o'sha filialga xabar yuborilmaydi.
+    Bu xabarni allaqachon olgan xodimlar ham chiqarib tashlanadi.
+    """
+    employees = snapshot['employees'].get(task_id, [])
+    results = snapshot['results'].get(task_id, {})
+    sent = snapshot['sent']
+
+    completed_branches = {emp['branch_id'] for emp in employees if emp['id'] in results}
+    return [
+        emp for emp in employees
+        if emp['branch_id'] not in completed_branches
+        and (task_id, emp['id'], notification_type) not in sent
+    ]
+
+
+def _notification_rows(task: dict, employees: list, notification_type: str, text: str) -> list:
+    """Outbox yozuvlari. Takroriy xabarlar UNIQUE kalit
+    (task_id, employee_id, notification_type) orqali rad etiladi.
+    """
+    return [
+        {
+            'task_id': task['id'],
+            'employee_id': emp['id'],
+            'notification_type': notification_type,
+            'chat_id': emp['telegram_id'],
+            'text': text,
+        }
+        for emp in employees
+    ]
+
+
+def build_task_started(snapshot: dict, task: dict, deadline: datetime) -> list:
+    """Vazifa boshlanganda ogohlantirish (faqat 1 marta)"""
+    employees = _pending_employees(snapshot, task['id'], 'task_started')
+    return _notification_rows(
+        task, employees, 'task_started',
+        f"🔔 <b>Vazifa boshlandi!</b>\n\n"
+        f"📋 {task['title']}\n"
+        f"⏰ Deadline: {helpers.format_datetime(deadline)}\n\n"
+        f"Vazifani bajarish uchun '📋 Vazifalarim' tugmasini bosing."
+    )
+
+
+def build_deadline_warning(snapshot: dict, task: dict) -> list:
+    """30 daqiqa qoldi ogohlantirish (faqat 1 marta)"""
+    employees = _pending_employees(snapshot, task['id'], 'warning_30min')
+    return _notification_rows(
+        task, employees, 'warning_30min',
+        f"⚠️ <b>Ogohlantirish!</b>\n\n"
+        f"📋 {task['title']}\n"
+        f"⏰ Deadline tugashiga 30 daqiqa qoldi!\n\n"
+        f"Vazifani bajarish uchun '📋 Vazifalarim' tugmasini bosing."
+    )
+
+
+def build_deadline_ended(snapshot: dict, task: dict, deadline: datetime) -> list:
+    """Deadline tugadi: adminlarga hisobot va bajarmaganlarga xabar (faqat 1 marta)"""
+    rows = []
+
+    # Faqat hech kim vazifa bajarmagan filiallar (tartib snapshot dan)
+    branches_with_incomplete = {}
+    for emp in _pending_employees(snapshot, task['id'], None):
+        branches_with_incomplete.setdefault(emp['branch_name'], []).append(emp)
+
+    # Admin uchun hisobotni faqat 1 marta yuborish (employee_id=0 admin uchun)
+    if (task['id'], 0, 'deadline_report') not in snapshot['sent']:
+        report_text = f"📊 <b>Vazifa muddati yakunlandi!</b>\n\n"
+        report_text += f"📋 {task['title']}\n"
+        report_text += f"⏰ Deadline: {helpers.format_datetime(deadline)}\n\n"
+
+        if branches_with_incomplete:
+            total_not_completed = 0
+            report_text += "<b>❌ Vazifa yubormaganlar:</b>\n"
+            for branch_name, employees in branches_with_incomplete.items():
+                report_text += f"\n🏢 <b>{branch_name}</b>\n"
                 for emp in employees:
-                    bid = emp.get('branch_id') or emp.get('branch_name', 'unknown')
-                    if bid not in branch_employees:
-                        branch_employees[bid] = []
-                    branch_employees[bid].append(emp)
-
-                # Har bir filial uchun bajarilganligini tekshirish
-                branch_has_completion = {}
-                for bid in branch_employees:
-                    branch_has_completion[bid] = await db.has_branch_completion(
-                        task['id'], bid, task['shift']
-                    )
+                    report_text += f"  • {emp['first_name']} {emp['last_name']}\n"
+                total_not_completed += len(employees)
+
+            report_text += f"\n<b>Jami yubormaganlar: {total_not_completed} ta</b>"
+        else:
+            report_text += "✅ <b>Barcha filiallardan vazifa bajarilgan!</b>"
+
+        rows += [
+            {
+                'task_id': task['id'],
+                'employee_id': 0,
+                'notification_type': 'deadline_report',
+                'chat_id': admin_id,
+                'text': report_text,
+            }
+            for admin_id in ADMIN_IDS
+        ]
+
+    sent = snapshot['sent']
+    employees = [
+        emp
+        for employees in branches_with_incomplete.values()
+        for emp in employees
+        if (task['id'], emp['id'], 'deadline_ended') not in sent
+    ]
+    rows += _notification_rows(
+        task, employees, 'deadline_ended',
+        f"❌ <b>Vazifa muddati tugadi!</b>\n\n"
+        f"📋 {task['title']}\n\n"
+        f"Siz bu vazifani bajarmadingiz.\n"
+        f"Endi yuborilgan natijalar 'Kechiktirilgan' deb belgilanadi."
+    )
+    return rows
 
-                # Vazifa boshlanganda ogohlantirish (faqat 1 marta)
-                time_diff = abs((start_time - now).total_seconds())
-                if time_diff <= 90:  # 90 soniya oraliqda tekshirish
-                    for emp in employees:
-                        bid = emp.get('branch_id') or emp.get('branch_name', 'unknown')
-                        # Agar filialda birorta xodim bajargan bo'lsa, xabar yubormasin
-                        if branch_has_completion.get(bid, False):
-                            continue
-                        result = await db.get_task_result(task['id'], emp['id'])
-                        if not result:
-                            # Avval yuborilganligini tekshirish
-                            already_sent = await db.check_notification_sent(
-                                task['id'], emp['id'], 'task_started'
-                            )
-                            if not already_sent:
-                                try:
-                                    await bot.send_message(
-                                        chat_id=emp['telegram_id'],
-                                        text=f"🔔 <b>Vazifa boshlandi!</b>\n\n"
-                                             f"📋 {task['title']}\n"
-                                             f"⏰ Deadline: {helpers.format_datetime(deadline)}\n\n"
-                                             f"Vazifani bajarish uchun '📋 Vazifalarim' tugmasini bosing.",
-                                        parse_mode="HTML"
-                                    )
-                                    # Yuborilganligini belgilash
-                                    await db.mark_notification_sent(
-                                        task['id'], emp['id'], 'task_started'
-                                    )
-                                except Exception as e:
-                                    logger.error(f"Notification error: {e}")
-
-                # 30 daqiqa qoldi ogohlantirish (faqat 1 marta)
-                time_to_deadline = (deadline - now).total_seconds()
-                if 1680 <= time_to_deadline <= 1920:  # 28-32 daqiqa oralig'ida
-                    for emp in employees:
-                        bid = emp.get('branch_id') or emp.get('branch_name', 'unknown')
-                        # Agar filialda birorta xodim bajargan bo'lsa, xabar yubormasin
-                        if branch_has_completion.get(bid, False):
-                            continue
-                        result = await db.get_task_result(task['id'], emp['id'])
-                        if not result:
-                            # Avval yuborilganligini tekshirish
-                            already_sent = await db.check_notification_sent(
-                                task['id'], emp['id'], 'warning_30min'
-                            )
-                            if not already_sent:
-                                try:
-                                    await bot.send_message(
-                                        chat_id=emp['telegram_id'],
-                                        text=f"⚠️ <b>Ogohlantirish!</b>\n\n"
-                                             f"📋 {task['title']}\n"
-                                             f"⏰ Deadline tugashiga 30 daqiqa qoldi!\n\n"
-                                             f"Vazifani bajarish uchun '📋 Vazifalarim' tugmasini bosing.",
-                                        parse_mode="HTML"
-                                    )
-                                    # Yuborilganligini belgilash
-                                    await db.mark_notification_sent(
-                                        task['id'], emp['id'], 'warning_30min'
-                                    )
-                                except Exception as e:
-                                    logger.error(f"Notification error: {e}")
-
-                # Deadline tugadi (faqat 1 marta)
-                if -90 <= time_to_deadline <= 0:
-                    # Admin uchun hisobotni faqat 1 marta yuborish
-                    admin_notified = await db.check_notification_sent(
-                        task['id'], 0, 'deadline_report'  # employee_id=0 admin uchun
-                    )
 
-                    if not admin_notified:
-                        # Filial bo'yicha xodimlarni guruhlash
-                        stats = await db.get_task_statistics(task['id'])
-
-                        # Faqat vazifa yubormaganlarni ko'rsatish
-                        report_text = f"📊 <b>Vazifa muddati yakunlandi!</b>\n\n"
-                        report_text += f"📋 {task['title']}\n"
-                        report_text += f"⏰ Deadline: {helpers.format_datetime(deadline)}\n\n"
-
-                        total_not_completed = 0
-                        branches_with_incomplete = []
-
-                        for branch_stat in stats.get('branches', []):
-                            # Filialda birorta xodim bajargan bo'lsa, bu filialni o'tkazib yuborish
-                            has_completed = len(branch_stat['completed']) > 0 or len(branch_stat['late']) > 0
-                            if has_completed:
-                                continue
-
-                            not_completed = branch_stat['not_completed']
-                            if not_completed:
-                                branches_with_incomplete.append(branch_stat)
-                                total_not_completed += len(not_completed)
-
-                        if branches_with_incomplete:
-                            report_text += "<b>❌ Vazifa yubormaganlar:</b>\n"
-                            for branch_stat in branches_with_incomplete:
-                                report_text += f"\n🏢 <b>{branch_stat['name']}</b>\n"
-                                for emp_info in branch_stat['not_completed']:
-                                    report_text += f"  • {emp_info['name']}\n"
-
-                            report_text += f"\n<b>Jami yubormaganlar: {total_not_completed} ta</b>"
-                        else:
-                            report_text += "✅ <b>Barcha filiallardan vazifa bajarilgan!</b>"
-
-                        for admin_id in ADMIN_IDS:
-                            try:
-                                await bot.send_message(chat_id=admin_id, text=report_text, parse_mode="HTML")
-                            except Exception as e:
-                                logger.error(f"Admin notification error: {e}")
-
-                        # Admin hisoboti yuborilganligini belgilash
-                        await db.mark_notification_sent(task['id'], 0, 'deadline_report')
-
-                    # Filial bo'yicha guruhlangan xodimlar ro'yxatini olish
-                    stats = await db.get_task_statistics(task['id'])
-
-                    # Filial bo'yicha: agar bitta xodim vazifa bajargan bo'lsa,
-                    # o'sha filialdagi boshqalarga xabar yuborilmasin
-                    for branch_stat in stats.get('branches', []):
-                        # Agar filialdan hech bo'lmaganda 1 ta xodim vazifa bajargan bo'lsa
-                        has_completed_in_branch = len(branch_stat['completed']) > 0 or len(branch_stat['late']) > 0
-
-                        if not has_completed_in_branch:
-                            # Faqat hech kim vazifa bajarmagan filiallar uchun xabar yuborish
-                            for emp_info in branch_stat['not_completed']:
-                                emp_id = emp_info['id']
-                                telegram_id = emp_info['telegram_id']
-
-                                # Avval yuborilganligini tekshirish
-                                already_sent = await db.check_notification_sent(
-                                    task['id'], emp_id, 'deadline_ended'
-                                )
-                                if not already_sent:
-                                    try:
-                                        await bot.send_message(
-                                            chat_id=telegram_id,
-                                            text=f"❌ <b>Vazifa muddati tugadi!</b>\n\n"
-                                                 f"📋 {task['title']}\n\n"
-                                                 f"Siz bu vazifani bajarmadingiz.\n"
-                                                 f"Endi yuborilgan natijalar 'Kechiktirilgan' deb belgilanadi.",
-                                            parse_mode="HTML"
-                                        )
-                                        # Yuborilganligini belgilash
-                                        await db.mark_notification_sent(
-                                            task['id'], emp_id, 'deadline_ended'
-                                        )
-                                    except Exception as e:
-                                        logger.error(f"Employee notification error: {e}")
-
-                    if task['task_type'] == 'bir_martalik':
-                        await db.deactivate_task(task['id'])
+async def process_task_events(bot, events: list):
+    """Bir vaqtda yuz bergan hodisalarni bitta snapshot bilan qayta ishlash.
+    events: [(task_id, event), ...]
+    """
+    snapshot = await db.get_notification_snapshot(list({task_id for task_id, _ in events}))
+    now = helpers.now()
+    rows = []
+    reported = []
+    finished = []
+
+    for task_id, event in events:
+        task = snapshot['tasks'].get(task_id)
+        if not task:
+            continue
+        try:
+            _, deadline = resolve_task_times(task, now)
+
+            if event == 'task_started':
+                rows += build_task_started(snapshot, task, deadline)
+            elif event == 'warning_30min':
+                rows += build_deadline_warning(snapshot, task)
+            elif event == 'deadline_ended':
+                rows += build_deadline_ended(snapshot, task, deadline)
+                reported.append(task_id)
+                if task['task_type'] == 'bir_martalik':
+                    finished.append(task_id)
+        except Exception as e:
+            logger.error(f"Task notification error for task {task_id} ({event}): {e}")
+
+    # Admin hisobotini avval band qilish (claim-then-send): faqat yangi
+    # belgilangan vazifalar hisoboti yuboriladi - ikki jarayon bir vaqtda
+    # ishlasa ham hisobot bir marta ketadi
+    if reported:
+        claimed = await db.mark_notifications_sent([
+            {'task_id': task_id, 'employee_id': 0, 'notification_type': 'deadline_report'}
+            for task_id in reported
+        ])
+        claimed_tasks = {task_id for task_id, _, _ in claimed}
+        rows = [
+            row for row in rows
+            if row['notification_type'] != 'deadline_report'
+            or row['task_id'] in claimed_tasks
+        ]
+
+    # Avval outbox ga yozish, keyin vazifani yopish - xabarlar yo'qolmaydi
+    await outbox.enqueue(rows)
+
+    for task_id in finished:
+        await db.deactivate_task(task_id)
+
+    await outbox.drain_outbox(bot)
+
+
+@profiled("scheduler:run_task_event")
+async def run_task_event(bot, task_id: int, event: str):
+    """Rejalashtirilgan vazifa hodisasini bajarish.
+    EVENT_BATCH_WINDOW ichida kelgan hodisalar bitta to'plamga yig'iladi.
+    """
+    global _event_batch
+    if _event_batch is not None:
+        _event_batch.append((task_id, event))
+        return
 
-            except Exception as e:
-                logger.error(f"Task notification error for task {task['id']}: {e}")
+    _event_batch = [(task_id, event)]
+    try:
+        await asyncio.sleep(EVENT_BATCH_WINDOW)
+    finally:
+        events, _event_batch = _event_batch, None
 
+    try:
+        await process_task_events(bot, events)
     except Exception as e:
-        logger.error(f"Notification error: {e}")
+        logger.error(f"Task notification error for {len(events)} events: {e}")
 
 
 async def recreate_daily_tasks(bot):
     """Har kunlik vazifalarni qayta yaratish"""
     try:
         daily_tasks = await db.get_daily_tasks()
-        tz = pytz.timezone(TIMEZONE)
         # NAIVE Tashkent vaqti
-        now = datetime.now(tz).replace(tzinfo=None)
+        now = helpers.now()
 
         for task in daily_tasks:
             try:
                 # Eski vazifaning bildirishnomalarini tozalash
                 await db.clear_task_notifications(task['id'])
                 await db.deactivate_task(task['id'])
+                unschedule_task_events(task['id'])
 
-                start_time_str = task['start_time']
-                deadline_str = task['deadline']
-
-                for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]:
-                    try:
-                        start_time = datetime.strptime(start_time_str, fmt)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    start_time = datetime.fromisoformat(start_time_str)
-
-                for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]:
-                    try:
-                        deadline = datetime.strptime(deadline_str, fmt)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    deadline = datetime.fromisoformat(deadline_str)
+                start_time = helpers.to_naive(task['start_time'])
+                deadline = helpers.to_naive(task['deadline'])
 
                 # NAIVE datetime - Tashkent mahalliy vaqti
                 new_start = datetime(now.year, now.month, now.day, start_time.hour, start_time.minute)
@@ -297,22 +409,23 @@ async def recreate_daily_tasks(bot):
                         deadline=new_deadline,
                         branch_ids=branch_ids
                     )
+                    await reschedule_task(new_task_id)
 
                     employees = await db.get_employees_for_task(new_task_id)
-                    for emp in employees:
-                        try:
-                            await bot.send_message(
-                                chat_id=emp['telegram_id'],
-                                text=f"📋 <b>Kunlik vazifa!</b>\n\n"
-                                     f"📝 {task['title']}\n"
-                                     f"📄 {task['description']}\n\n"
-                                     f"🕐 Boshlanish: {helpers.format_datetime(new_start)}\n"
-                                     f"⏰ Deadline: {helpers.format_datetime(new_deadline)}\n\n"
-                                     f"Vazifalarni ko'rish uchun '📋 Vazifalarim' tugmasini bosing.",
-                                parse_mode="HTML"
-                            )
-                        except Exception as e:
-                            logger.error(f"Daily task notification error: {e}")
+                    text = (
+                        f"📋 <b>Kunlik vazifa!</b>\n\n"
+                        f"📝 {task['title']}\n"
+                        f"📄 {task['description']}\n\n"
+                        f"🕐 Boshlanish: {helpers.format_datetime(new_start)}\n"
+                        f"⏰ Deadline: {helpers.format_datetime(new_deadline)}\n\n"
+                        f"Vazifalarni ko'rish uchun '📋 Vazifalarim' tugmasini bosing."
+                    )
+                    await broadcaster.send(
+                        bot,
+                        [BroadcastMessage(chat_id=emp['telegram_id'], text=text, key=emp['id'])
+                         for emp in employees],
+                        name=f"daily_task_{new_task_id}"
+                    )
 
             except Exception as e:
                 logger.error(f"Daily task recreate error for task {task['id']}: {e}")
@@ -321,6 +434,7 @@ async def recreate_daily_tasks(bot):
         logger.error(f"Daily tasks error: {e}")
 
 
+@profiled("scheduler:reset_daily_results")
 async def reset_daily_results(bot):
     """
     Har kuni soat 01:00 da barcha natijalarni tozalash.
@@ -338,12 +452,14 @@ async def reset_daily_results(bot):
         # await db.clear_all_used_photos()  # BU O'CHIRILDI - rasmlar abadiy saqlanadi!
         
         logger.info("✅ Kunlik natijalar muvaffaqiyatli qayta tiklandi!")
+
+        # Har kunlik vazifalarning yangi kun hodisalarini rejalashtirish
+        await sync_task_events()
         
         # Faqat adminlarga xabar yuborish
         for admin_id in ADMIN_IDS:
             try:
-                tz = pytz.timezone(TIMEZONE)
-                now = datetime.now(tz)
+                now = helpers.now_aware()
                 await bot.send_message(
                     chat_id=admin_id,
                     text=f"🔄 <b>Kunlik natijalar qayta tiklandi</b>\n\n"
@@ -362,33 +478,115 @@ async def reset_daily_results(bot):
 
 async def setup_scheduler(scheduler: AsyncIOScheduler, bot):
     """Schedulerni sozlash"""
-    global _scheduler
+    global _scheduler, _bot
     _scheduler = scheduler
+    _bot = bot
 
+    # Har bir vazifa hodisasi o'z vaqtiga alohida job sifatida rejalashtiriladi.
+    # Bu job faqat boshqa jarayonlarda qilingan o'zgarishlarni yig'ib oladi.
     scheduler.add_job(
-        check_task_notifications,
-        IntervalTrigger(minutes=1),
-        args=[bot],
-        id='check_notifications',
+        sync_task_events,
+        IntervalTrigger(minutes=SYNC_INTERVAL_MINUTES),
+        id='sync_task_events',
         replace_existing=True
     )
 
+    # Outbox dagi yuborilmagan/qayta urinish kerak bo'lgan xabarlar
+    scheduler.add_job(
+        outbox.drain_outbox_job,
+        IntervalTrigger(seconds=OUTBOX_POLL_SECONDS),
+        args=[bot],
+        id='drain_outbox',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    # Eskirgan FSM holatlarini tozalash (PostgreSQL storage)
+    if DATABASE_TYPE == "postgresql":
+        scheduler.add_job(
+            cleanup_fsm_states,
+            IntervalTrigger(hours=1),
+            id='cleanup_fsm_states',
+            replace_existing=True
+        )
+
     # Soat 01:20 da kunlik natijalarni 0 ga qaytarish
     tz = pytz.timezone(TIMEZONE)
     scheduler.add_job(
         reset_daily_results,
-        CronTrigger(hour=1, minute=20, timezone=tz),  # 01:20 ga o'zgartirildi
+        CronTrigger(hour=DAILY_RESET_HOUR, minute=DAILY_RESET_MINUTE, timezone=tz),
         args=[bot],
         id='reset_daily_results',
         replace_existing=True
     )
 
+    # Mavjud faol vazifalar hodisalarini rejalashtirish
+    await sync_task_events()
+
     logger.info("✅ Scheduler setup completed")
     logger.info("📋 Scheduled jobs:")
-    logger.info("   • check_notifications: har 1 daqiqada")
+    logger.info("   • task events: har bir vazifa uchun aniq vaqtda")
+    logger.info(f"   • sync_task_events: har {SYNC_INTERVAL_MINUTES} daqiqada")
+    logger.info(f"   • drain_outbox: har {OUTBOX_POLL_SECONDS} soniyada")
+    if DATABASE_TYPE == "postgresql":
+        logger.info("   • cleanup_fsm_states: har soatda")
     logger.info("   • reset_daily_results: har kuni soat 01:20 da")
 
 
+async def _on_elected():
+    """Yetakchilik olindi - o'tkazib yuborilgan hodisalarni tiklab, joblarni yoqish"""
+    await sync_task_events(past_grace=LEADER_CATCHUP)
+    _scheduler.resume()
+
+
+async def _on_demoted():
+    """Yetakchilik yo'qotildi - boshqa replika ishlayotganda joblar bajarilmaydi"""
+    _scheduler.pause()
+
+
+def start_scheduler(scheduler: AsyncIOScheduler):
+    """Schedulerni ishga tushirish.
+    PostgreSQL da joblar faqat yetakchi replikada bajariladi,
+    qolganlarida scheduler to'xtatilgan (paused) holatda turadi.
+    """
+    global _leader
+    if DATABASE_TYPE != "postgresql":
+        scheduler.start()
+        return
+
+    scheduler.start(paused=True)
+    _leader = leader.LeaderElection(
+        SCHEDULER_LOCK_KEY,
+        on_elected=_on_elected,
+        on_demoted=_on_demoted,
+        retry_seconds=LEADER_RETRY_SECONDS,
+        heartbeat_seconds=LEADER_HEARTBEAT_SECONDS,
+        listeners={TASK_CHANGED_CHANNEL: _on_task_changed}
+    )
+    _leader.start()
+
+
+@profiled("scheduler:cleanup_fsm_states")
+async def cleanup_fsm_states():
+    """Eskirgan FSM holatlarini o'chirish"""
+    try:
+        from database.fsm_storage import delete_expired_states
+        deleted = await delete_expired_states()
+        if deleted:
+            logger.info(f"🧹 {deleted} ta eskirgan FSM holati o'chirildi")
+    except Exception as e:
+        logger.error(f"FSM cleanup error: {e}")
+
+
+async def stop_leader_election():
+    """Yetakchilikni bo'shatish - boshqa replika kutmasdan scheduler ni oladi"""
+    global _leader
+    if _leader:
+        await _leader.stop()
+        _leader = None
+
+
 def stop_scheduler():
     """Schedulerni to'xtatish"""
     global _scheduler